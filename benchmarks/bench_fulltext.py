@@ -0,0 +1,85 @@
+#
+# Benchmarks the pure-Python BM25 engine (lambda/fulltext.py) on
+# synthetic resumes stored in SQLite: index build time, query latency,
+# and the LIKE '%...%' scan it replaces. Also prints the top hits so the
+# ranking can be eyeballed offline.
+#
+# Usage: python benchmarks/bench_fulltext.py [num_resumes]
+#
+
+import os
+import sys
+import time
+import random
+import sqlite3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+import fulltext
+
+
+VOCABULARY = (
+    "python java javascript aws gcp azure docker kubernetes terraform sql "
+    "postgresql react angular django flask spark kafka pandas tensorflow "
+    "pytorch machine learning data pipelines microservices distributed "
+    "systems backend frontend engineer developer led team designed built "
+    "scalable services latency throughput customers analytics dashboards"
+).split()
+
+FILLER = (
+    "responsible worked project company university degree bachelor master "
+    "experience years using various tools including improved reduced "
+    "collaborated stakeholders delivered features"
+).split()
+
+QUERIES = [
+    ('kubernetes terraform', 'natural'),
+    ('machine learning pytorch', 'natural'),
+    ('+python +aws -java', 'boolean'),
+]
+
+
+def make_resume(rng):
+    words = rng.choices(VOCABULARY, k=rng.randint(30, 120)) + rng.choices(FILLER, k=rng.randint(200, 600))
+    rng.shuffle(words)
+    return " ".join(words)
+
+
+def main():
+    num_resumes = int(sys.argv[1]) if len(sys.argv) > 1 else 10000
+    rng = random.Random(7)
+
+    conn = sqlite3.connect(':memory:')
+    conn.execute("""
+        CREATE TABLE users (userid TEXT PRIMARY KEY, firstname TEXT, lastname TEXT,
+                            email TEXT, skills TEXT, resume_text TEXT)
+    """)
+    conn.executemany(
+        "INSERT INTO users VALUES (?, ?, ?, ?, ?, ?)",
+        [(f'user-{i:07d}', 'First', f'Last{i}', f'user{i}@example.com', '', make_resume(rng)) for i in range(num_resumes)])
+    conn.commit()
+
+    start = time.perf_counter()
+    engine = fulltext.BM25Search().load(conn)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"{num_resumes} resumes, {len(engine.postings)} terms, BM25 index built in {build_ms:.0f} ms")
+
+    for query, mode in QUERIES:
+        start = time.perf_counter()
+        for _ in range(5):
+            results, has_more = engine.search(query, mode, limit=20)
+        bm25_ms = (time.perf_counter() - start) / 5 * 1000
+
+        words = [word.lstrip('+') for word in query.split() if not word.startswith('-')]
+        where = " AND ".join(["resume_text LIKE ?"] * len(words))
+        start = time.perf_counter()
+        like_rows = conn.execute(f"SELECT userid FROM users WHERE {where}", [f"%{w}%" for w in words]).fetchall()
+        like_ms = (time.perf_counter() - start) * 1000
+
+        print(f"\n{mode:>8}: {query!r}: BM25 {bm25_ms:.1f} ms (ranked), LIKE scan {like_ms:.1f} ms (unranked, {len(like_rows)} rows)")
+        for result in results[:3]:
+            print(f"          {result['userid']}  score {result['score']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#
+# Benchmarks "did you mean" lookups (lambda/fuzzyskill.py) over a
+# synthetic skill vocabulary: trigram index build time and suggestion
+# latency for misspelled queries, against a brute-force edit-distance
+# scan of the whole vocabulary.
+#
+# Usage: python benchmarks/bench_fuzzy_skill.py [vocabulary_size]
+#
+
+import os
+import sys
+import time
+import random
+import string
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+import fuzzyskill
+
+
+REAL_SKILLS = [
+    'python', 'java', 'javascript', 'typescript', 'kubernetes', 'terraform',
+    'tensorflow', 'pytorch', 'postgresql', 'mongodb', 'react', 'angular',
+    'node.js', 'docker', 'machine learning', 'scikit-learn', 'spark', 'kafka',
+]
+
+QUERIES = ['kubernets', 'tensorflw', 'pyhton', 'postgressql', 'machne learning', 'reactt', 'xqzvw']
+
+
+def make_vocabulary(size, seed=3):
+    rng = random.Random(seed)
+    vocabulary = {skill: rng.randint(100, 5000) for skill in REAL_SKILLS}
+    while len(vocabulary) < size:
+        words = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 10))) for _ in range(rng.randint(1, 2))]
+        vocabulary[' '.join(words)] = rng.randint(1, 50)
+    return list(vocabulary.items())
+
+
+def brute_force(vocabulary, query):
+    bound = fuzzyskill.max_distance_for(query)
+    matches = []
+    for term, weight in vocabulary:
+        distance = fuzzyskill.bounded_edit_distance(query, term, bound)
+        if distance is not None and term != query:
+            matches.append((distance, term))
+    return sorted(matches)[:5]
+
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 50000
+    vocabulary = make_vocabulary(size)
+
+    start = time.perf_counter()
+    index = fuzzyskill.TrigramIndex(vocabulary)
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"{len(index)} skills, {len(index.postings)} trigrams, index built in {build_ms:.0f} ms")
+    print(f"{'query':<18} {'trigram index':>14} {'brute force':>12}  suggestions")
+
+    for query in QUERIES:
+        start = time.perf_counter()
+        for _ in range(20):
+            suggestions = index.suggest(query)
+        index_ms = (time.perf_counter() - start) / 20 * 1000
+
+        start = time.perf_counter()
+        brute_force(vocabulary, query)
+        brute_ms = (time.perf_counter() - start) * 1000
+
+        print(f"{query:<18} {index_ms:>11.2f} ms {brute_ms:>9.1f} ms  {[s['skill'] for s in suggestions[:3]]}")
+
+
+if __name__ == "__main__":
+    main()
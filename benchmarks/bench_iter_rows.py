@@ -0,0 +1,95 @@
+#
+# Compares peak memory (RSS) of datatier.retrieve_all_rows, which
+# buffers the whole result set, with datatier.iter_rows, which streams
+# it through an unbuffered server-side cursor. The rows are generated
+# by MySQL itself (a recursive CTE), so no table is needed; each mode
+# runs in its own child process so the peaks don't mix.
+#
+# Needs a reachable MySQL server, configured in the [rds] section of
+# the given config file (the Lambdas' resumeapp-config.ini works).
+#
+# Usage: python benchmarks/bench_iter_rows.py config.ini [num_rows] [row_bytes]
+#
+
+import os
+import sys
+import time
+import resource
+import subprocess
+
+from configparser import ConfigParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+import datatier
+
+
+SQL = """
+  WITH RECURSIVE seq (n) AS (
+    SELECT 1 UNION ALL SELECT n + 1 FROM seq WHERE n < %s
+  )
+  SELECT n, REPEAT('x', %s) FROM seq;
+  """
+
+
+def connect(config_file):
+    configur = ConfigParser()
+    configur.read(config_file)
+    return datatier.get_dbConn(
+        configur.get('rds', 'endpoint'),
+        int(configur.get('rds', 'port_number')),
+        configur.get('rds', 'user_name'),
+        configur.get('rds', 'user_pwd'),
+        configur.get('rds', 'db_name'))
+
+
+def peak_rss_mb():
+    # ru_maxrss is in KB on Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_mode(mode, config_file, num_rows, row_bytes):
+    dbConn = connect(config_file)
+    datatier.perform_action(dbConn, "SET SESSION cte_max_recursion_depth = %s;", [num_rows + 1])
+    baseline = peak_rss_mb()
+
+    start = time.perf_counter()
+    count = 0
+    total = 0
+    if mode == 'fetchall':
+        rows = datatier.retrieve_all_rows(dbConn, SQL, [num_rows, row_bytes])
+        for n, payload in rows:
+            count += 1
+            total += len(payload)
+    else:
+        for n, payload in datatier.iter_rows(dbConn, SQL, [num_rows, row_bytes]):
+            count += 1
+            total += len(payload)
+    elapsed = time.perf_counter() - start
+
+    dbConn.close()
+    print(f"{mode:>9}: {count} rows, {total / 2**20:.0f} MB of payload in {elapsed:.2f} s, "
+          f"peak RSS {peak_rss_mb():.0f} MB ({peak_rss_mb() - baseline:+.0f} MB over baseline)")
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '--mode':
+        mode, config_file, num_rows, row_bytes = sys.argv[2], sys.argv[3], int(sys.argv[4]), int(sys.argv[5])
+        run_mode(mode, config_file, num_rows, row_bytes)
+        return
+
+    if len(sys.argv) < 2:
+        print("Usage: python benchmarks/bench_iter_rows.py config.ini [num_rows] [row_bytes]")
+        sys.exit(1)
+
+    config_file = sys.argv[1]
+    num_rows = int(sys.argv[2]) if len(sys.argv) > 2 else 1000000
+    row_bytes = int(sys.argv[3]) if len(sys.argv) > 3 else 200
+
+    for mode in ('fetchall', 'iter_rows'):
+        subprocess.run([sys.executable, os.path.abspath(__file__), '--mode', mode,
+                        config_file, str(num_rows), str(row_bytes)], check=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#
+# Benchmarks job description -> resume matching (lambda/semanticindex.py)
+# over synthetic resumes, each written around one of a few hundred
+# specialties (a job family plus its own niche terms): embedding
+# throughput, then top-10 latency of the exact (brute-force) scan and of
+# the IVF index for several nprobe, with IVF recall@10 measured against
+# the exact top 10.
+#
+# Usage: python benchmarks/bench_semantic.py [resumes ...]   (default 10000 100000)
+#
+
+import os
+import sys
+import time
+import random
+import string
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+import semanticindex
+
+
+FAMILIES = {
+    'backend': 'python java go microservices postgresql kafka rest api distributed systems redis grpc',
+    'frontend': 'javascript typescript react angular css html accessibility webpack design systems ui',
+    'data': 'machine learning pytorch tensorflow statistics pandas spark feature engineering models',
+    'devops': 'kubernetes terraform docker aws ci cd monitoring prometheus linux infrastructure',
+    'finance': 'accounting audit excel financial reporting forecasting budgeting compliance tax',
+    'sales': 'sales negotiation crm salesforce pipeline quota accounts customer relationships',
+    'nursing': 'patient care nursing clinical medication icu emergency triage healthcare records',
+    'design': 'figma illustrator branding typography user research prototyping visual design',
+}
+FILLER = 'team experience project responsible worked led developed managed company years role'.split()
+
+SPECIALTIES = 400
+QUERIES = 20
+
+NPROBES = [1, 4, 8, 16]
+
+
+def make_specialties(rng):
+    specialties = []
+    for _ in range(SPECIALTIES):
+        family = rng.choice(list(FAMILIES.values())).split()
+        niche = [''.join(rng.choices(string.ascii_lowercase, k=rng.randint(4, 9))) for _ in range(8)]
+        specialties.append((family, niche))
+    return specialties
+
+
+def make_text(rng, specialty, words):
+    family, niche = specialty
+    text = rng.choices(family, k=words // 2) + rng.choices(niche, k=words // 4) + rng.choices(FILLER, k=words // 4)
+    rng.shuffle(text)
+    return ' '.join(text)
+
+
+def timed(fn, repeat=5):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench(size, rng):
+    specialties = make_specialties(rng)
+    texts = [make_text(rng, rng.choice(specialties), 80) for _ in range(size)]
+
+    start = time.perf_counter()
+    idf = semanticindex.fit_idf(texts[:10000])
+    embedder = semanticindex.HashedEmbedder(idf=idf)
+    index = semanticindex.VectorIndex(embedder.dim, embedder.model_id)
+    for i, text in enumerate(texts):
+        index.add(f"user{i}", embedder.embed(text))
+    embed_s = time.perf_counter() - start
+    print(f"\n{size} resumes: embedded in {embed_s:.1f} s ({embed_s / size * 1000:.2f} ms/resume)")
+
+    queries = [embedder.embed(make_text(rng, rng.choice(specialties), 24)) for _ in range(QUERIES)]
+    exact = []
+    exact_ms = []
+    for query in queries:
+        elapsed, matches = timed(lambda: index.search(query, 10))
+        exact.append({userid for userid, _ in matches})
+        exact_ms.append(elapsed)
+    print(f"  {'exact':<12} {np.mean(exact_ms):8.2f} ms/query   recall@10 1.000")
+
+    nlist = int(size ** 0.5)
+    start = time.perf_counter()
+    index.build_ivf(nlist)
+    print(f"  IVF: {nlist} lists built in {time.perf_counter() - start:.1f} s")
+
+    for nprobe in NPROBES:
+        latencies = []
+        recalls = []
+        for query, truth in zip(queries, exact):
+            elapsed, matches = timed(lambda: index.search(query, 10, nprobe))
+            latencies.append(elapsed)
+            recalls.append(len(truth & {userid for userid, _ in matches}) / len(truth))
+        print(f"  {'nprobe=' + str(nprobe):<12} {np.mean(latencies):8.2f} ms/query   recall@10 {np.mean(recalls):.3f}")
+
+
+def main():
+    sizes = [int(arg) for arg in sys.argv[1:]] or [10000, 100000]
+    rng = random.Random(7)
+    for size in sizes:
+        bench(size, rng)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#
+# Benchmarks boolean skill queries on the in-process inverted index
+# (lambda/skillindex.py) against the old SQL path, a LIKE '%skill%'
+# scan over a comma-joined skills column, on synthetic users. SQLite
+# stands in for MySQL so the benchmark runs anywhere.
+#
+# Usage: python benchmarks/bench_skill_search.py [num_users]
+#
+
+import os
+import sys
+import time
+import random
+import sqlite3
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+import skillindex
+
+
+SKILLS = [
+    'python', 'java', 'javascript', 'typescript', 'go', 'rust', 'c++', 'php',
+    'ruby', 'aws', 'gcp', 'azure', 'docker', 'kubernetes', 'terraform', 'sql',
+    'mysql', 'postgresql', 'react', 'angular', 'node.js', 'django', 'flask',
+    'spark', 'kafka', 'pandas', 'tensorflow', 'pytorch', 'machine learning',
+    'linux', 'git', 'graphql',
+] + [f'skill{i}' for i in range(500)]
+
+QUERIES = [
+    'python',
+    'python AND (aws OR gcp) AND NOT php',
+    'kubernetes AND docker AND terraform',
+    '"machine learning" AND (tensorflow OR pytorch)',
+]
+
+
+def make_users(num_users, seed=42):
+    rng = random.Random(seed)
+    # a few popular skills, a long tail of rare ones:
+    weights = [50 if i < 32 else 1 for i in range(len(SKILLS))]
+    users = []
+    for i in range(num_users):
+        skills = set(rng.choices(SKILLS, weights=weights, k=rng.randint(3, 12)))
+        users.append((f'user-{i:08d}', sorted(skills)))
+    return users
+
+
+def timeit(fn, repeat):
+    fn()  # warm-up
+    start = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - start) / repeat * 1000, result
+
+
+def sql_like(conn, query):
+    # the best the LIKE path can do for a boolean query: one LIKE per
+    # term, combined in SQL
+    tree = skillindex.parse_query(query)
+
+    def to_sql(node, params):
+        kind = node[0]
+        if kind == 'term':
+            params.append(f"%{node[1]}%")
+            return "lower(skills) LIKE lower(?)"
+        if kind == 'not':
+            return f"NOT ({to_sql(node[1], params)})"
+        joiner = " AND " if kind == 'and' else " OR "
+        return "(" + joiner.join(to_sql(child, params) for child in node[1]) + ")"
+
+    params = []
+    where = to_sql(tree, params)
+    return conn.execute(f"SELECT userid FROM users WHERE {where} ORDER BY userid", params).fetchall()
+
+
+def main():
+    num_users = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    users = make_users(num_users)
+
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE users (userid TEXT PRIMARY KEY, skills TEXT)")
+    conn.executemany("INSERT INTO users VALUES (?, ?)", [(u, ", ".join(s)) for u, s in users])
+    conn.commit()
+
+    index = skillindex.SkillIndex()
+    rows = []
+    rowid = 0
+    for userid, skills in users:
+        for skill in skills:
+            rowid += 1
+            rows.append((rowid, userid, skill))
+
+    start = time.perf_counter()
+    index.apply_rows(rows)
+    build_ms = (time.perf_counter() - start) * 1000
+
+    print(f"{num_users} users, {len(rows)} user_skills rows, index built in {build_ms:.0f} ms")
+    # the index column includes turning the first 100 matches back
+    # into userids, as the endpoint does
+    print(f"{'query':<50} {'LIKE scan':>12} {'index':>12} {'matches':>9}")
+
+    for query in QUERIES:
+        like_ms, like_rows = timeit(lambda: sql_like(conn, query), 3)
+        tree = skillindex.parse_query(query)
+        index_ms, _ = timeit(lambda: index.userids_of(index.evaluate(tree), 100), 200)
+        matches = skillindex.bitmap_count(index.evaluate(tree))
+        # LIKE has false positives (e.g. 'go' in 'django', 'java' in
+        # 'javascript'), so its match count is an upper bound
+        print(f"{query:<50} {like_ms:>9.2f} ms {index_ms:>9.3f} ms {matches:>9} (LIKE: {len(like_rows)})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#
+# Compares the upload path proj05_upload used to have (write the PDF
+# to /tmp/resume.pdf, then bucket.upload_file) with the in-memory one
+# it has now (proj05_upload.upload_bytes: put_object, or a parallel
+# multipart upload above the threshold), for a range of file sizes.
+#
+# It then runs a burst of concurrent uploads through each path, as
+# overlapping requests in one container would, and reads every object
+# back to count the ones whose content is not what was sent.
+#
+# Needs boto3 and an S3 bucket, configured in the [s3] section of the
+# given config file, with the s3readwrite profile. Use a scratch
+# bucket or a local stand-in ([s3] endpoint_url, e.g. MinIO): the
+# resume bucket's event notification would queue these objects for
+# parsing. Objects are written under bench-upload/ and deleted.
+#
+# Usage: python benchmarks/bench_upload.py config.ini [size_mb ...]
+#
+
+import os
+import sys
+import time
+import uuid
+import hashlib
+import threading
+
+import boto3
+
+from configparser import ConfigParser
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'lambda'))
+
+import proj05_upload
+
+
+EXTRA_ARGS = {'ContentType': 'application/pdf'}
+CONCURRENT = 8
+REPEAT = 3
+
+
+def upload_via_tmp(bucket, bucketkey, file_bytes):
+    # the path proj05_upload had before, one shared file per container
+    local_filename = "/tmp/resume.pdf"
+    with open(local_filename, "wb") as f:
+        f.write(file_bytes)
+    bucket.upload_file(local_filename, bucketkey, ExtraArgs=EXTRA_ARGS)
+
+
+def upload_in_memory(bucket, bucketkey, file_bytes, transfer_config):
+    proj05_upload.upload_bytes(bucket, bucketkey, file_bytes, transfer_config, EXTRA_ARGS)
+
+
+def make_pdf(size):
+    return b'%PDF-1.4\n' + os.urandom(size - 9)
+
+
+def timed_ms(fn):
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        fn()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def corrupted_after_burst(bucket, upload):
+    # CONCURRENT threads upload distinct files at once; returns how
+    # many objects don't hold the bytes their thread sent
+    payloads = {f"bench-upload/{uuid.uuid4()}.pdf": make_pdf(256 * 1024) for _ in range(CONCURRENT)}
+    threads = [threading.Thread(target=upload, args=(bucket, key, data)) for key, data in payloads.items()]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    corrupted = 0
+    for key, data in payloads.items():
+        stored = bucket.Object(key).get()['Body'].read()
+        if hashlib.sha256(stored).digest() != hashlib.sha256(data).digest():
+            corrupted += 1
+        bucket.Object(key).delete()
+    return corrupted
+
+
+def main():
+    if len(sys.argv) < 2:
+        print("usage: python benchmarks/bench_upload.py config.ini [size_mb ...]")
+        sys.exit(1)
+
+    config_file = sys.argv[1]
+    sizes_mb = [float(arg) for arg in sys.argv[2:]] or [0.1, 1, 10, 50]
+
+    os.environ['AWS_SHARED_CREDENTIALS_FILE'] = config_file
+    configur = ConfigParser()
+    configur.read(config_file)
+
+    boto3.setup_default_session(profile_name='s3readwrite')
+    endpoint_url = configur.get('s3', 'endpoint_url', fallback='') or None
+    bucket = boto3.resource('s3', endpoint_url=endpoint_url).Bucket(configur.get('s3', 'bucket_name'))
+    transfer_config = proj05_upload.transfer_config_from(configur)
+
+    print(f"multipart above {transfer_config.multipart_threshold / proj05_upload.MB:.0f} MB, "
+          f"{transfer_config.multipart_chunksize / proj05_upload.MB:.0f} MB parts, "
+          f"{transfer_config.max_concurrency} at a time")
+    print(f"{'size':>9} {'/tmp + upload_file':>19} {'in memory':>11}")
+
+    for size_mb in sizes_mb:
+        data = make_pdf(int(size_mb * proj05_upload.MB))
+        key = f"bench-upload/{uuid.uuid4()}.pdf"
+        tmp_ms = timed_ms(lambda: upload_via_tmp(bucket, key, data))
+        memory_ms = timed_ms(lambda: upload_in_memory(bucket, key, data, transfer_config))
+        bucket.Object(key).delete()
+        print(f"{size_mb:>6g} MB {tmp_ms:>16.0f} ms {memory_ms:>8.0f} ms")
+
+    print(f"\n{CONCURRENT} concurrent uploads, objects with the wrong content:")
+    print(f"  /tmp + upload_file: {corrupted_after_burst(bucket, upload_via_tmp)}")
+    print(f"  in memory:          "
+          f"{corrupted_after_burst(bucket, lambda b, k, d: upload_in_memory(b, k, d, transfer_config))}")
+
+    if os.path.exists("/tmp/resume.pdf"):
+        os.remove("/tmp/resume.pdf")
+
+
+if __name__ == "__main__":
+    main()
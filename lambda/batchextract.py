@@ -0,0 +1,159 @@
+#
+# batchextract.py
+#
+# Micro-batched extraction for bulk ingestion: several (compacted)
+# resumes are packed into one Bedrock prompt, each between its own
+# delimiters and tagged with a document id, and the model is asked for
+# a JSON array with one object per document. Results are mapped back by
+# document id; documents whose result is missing or malformed are
+# bisected and retried in smaller batches, down to a single document.
+#
+
+import json
+import threading
+
+import compaction
+
+
+BATCH_PREAMBLE = """
+    You are an expert recruiter. Below are {count} resumes, each between
+    <<<DOC id=...>>> and <<<END DOC>>> markers. For every resume extract:
+    - Full Name
+    - Email (if available)
+    - List of skills
+
+    Reply with only a JSON array containing exactly one object per resume,
+    with keys: 'doc_id' (the id from the marker), 'fullname', 'email',
+    'skills' (a list of strings).
+    """
+
+# output tokens to allow per document in the reply:
+MAX_TOKENS_PER_DOC = 800
+
+
+class BatchStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.stats = {
+            'calls': 0, 'docs_sent': 0, 'docs_resolved': 0, 'docs_failed': 0,
+            'bisections': 0, 'prompt_tokens': 0,
+        }
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.stats[name] += amount
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        calls = stats['calls']
+        stats['docs_per_call'] = round(stats['docs_sent'] / calls, 2) if calls else 0.0
+        stats['prompt_tokens_per_doc'] = round(stats['prompt_tokens'] / stats['docs_sent'], 1) if stats['docs_sent'] else 0.0
+        return stats
+
+
+def build_batch_prompt(docs):
+    """
+    docs is a list of (doc_id, text); returns the prompt text
+    """
+    parts = [BATCH_PREAMBLE.format(count=len(docs))]
+    for doc_id, text in docs:
+        parts.append(f"<<<DOC id={doc_id}>>>\n{text}\n<<<END DOC>>>")
+    return "\n".join(parts)
+
+
+def parse_batch_output(output, doc_ids):
+    """
+    Returns {doc_id: fields} for every well-formed object in the first
+    JSON array of the model output whose doc_id is one of doc_ids.
+    Raises ValueError if there is no JSON array at all.
+    """
+    start = output.find('[')
+    if start < 0:
+        raise ValueError('no JSON array in model output')
+    items, _ = json.JSONDecoder().raw_decode(output, start)
+    if not isinstance(items, list):
+        raise ValueError('model output is not a JSON array')
+
+    wanted = set(doc_ids)
+    results = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
+        doc_id = str(item.get('doc_id', ''))
+        if doc_id in wanted and doc_id not in results:
+            results[doc_id] = {
+                'fullname': item.get('fullname', ''),
+                'email': item.get('email', 'unknown@example.com'),
+                'skills': item.get('skills', []),
+            }
+    return results
+
+
+def extract_batch(docs, invoke_text, stats=None):
+    """
+    Extracts fields for a batch of documents
+
+    Parameters
+    ----------
+    docs : list of (doc_id, text), text already compacted,
+    invoke_text : function (prompt, max_tokens) -> model output text;
+                  an error it raises (e.g. throttling) fails only the
+                  documents of that call,
+    stats : optional BatchStats to record calls and tokens in
+
+    Returns
+    -------
+    (results, failed): results maps doc_id -> fields dict, failed maps
+    doc_id -> reason (a message, or the exception invoke_text raised)
+    for documents that could not be reconciled even on their own
+    """
+    stats = stats or BatchStats()
+    results = {}
+    failed = {}
+
+    def run(batch):
+        prompt = build_batch_prompt(batch)
+        stats.count('calls')
+        stats.count('docs_sent', len(batch))
+        stats.count('prompt_tokens', compaction.estimate_tokens(prompt))
+
+        doc_ids = [doc_id for doc_id, _ in batch]
+        try:
+            output = invoke_text(prompt, MAX_TOKENS_PER_DOC * len(batch))
+        except Exception as err:
+            # keep what other calls resolved; only this call's
+            # documents fail, with the error for the caller to judge:
+            print('batchextract: call failed:', str(err))
+            for doc_id in doc_ids:
+                failed[doc_id] = err
+            stats.count('docs_failed', len(doc_ids))
+            return
+
+        try:
+            parsed = parse_batch_output(output, doc_ids)
+        except ValueError as err:
+            print('batchextract: could not parse output:', str(err))
+            parsed = {}
+
+        results.update(parsed)
+        stats.count('docs_resolved', len(parsed))
+
+        missing = [(doc_id, text) for doc_id, text in batch if doc_id not in parsed]
+        if not missing:
+            return
+        if len(batch) == 1:
+            failed[batch[0][0]] = 'model output could not be reconciled'
+            stats.count('docs_failed')
+            return
+
+        # retry only the unreconciled documents, in halves:
+        stats.count('bisections')
+        middle = (len(missing) + 1) // 2
+        for half in (missing[:middle], missing[middle:]):
+            if half:
+                run(half)
+
+    if docs:
+        run(list(docs))
+    return results, failed
@@ -0,0 +1,212 @@
+#
+# bedrockcall.py
+#
+# Throttle-aware invocation layer for Bedrock. Every call goes through
+#
+#   - a client-side token bucket, which caps the request rate of the
+#     container,
+#   - an AIMD concurrency limiter, which grows the number of calls in
+#     flight by about one per round of successes and halves it on
+#     every throttle response,
+#   - retries with full-jitter exponential backoff, bounded by the time
+#     left in the Lambda invocation.
+#
+# The invoker only needs a zero-argument callable, so a local fake
+# client that raises throttling errors on demand can stand in for
+# bedrock-runtime.
+#
+
+import time
+import random
+import threading
+
+
+# error codes that mean "slow down and try again":
+THROTTLE_CODES = {
+    'ThrottlingException',
+    'TooManyRequestsException',
+    'ServiceQuotaExceededException',
+}
+RETRYABLE_CODES = THROTTLE_CODES | {
+    'ServiceUnavailableException',
+    'ModelStreamErrorException',
+    'ModelNotReadyException',
+    'InternalServerException',
+}
+
+
+class BedrockThrottled(Exception):
+    """
+    Raised when a call is still throttled when the retry attempts or
+    the time budget run out
+    """
+    pass
+
+
+def error_code(err):
+    """
+    Returns the AWS error code of a botocore ClientError, or None.
+    Errors raised inside a response event stream carry camelCase codes
+    ("throttlingException"); they are returned capitalized like the
+    API's ("ThrottlingException").
+    """
+    response = getattr(err, 'response', None)
+    if isinstance(response, dict):
+        code = response.get('Error', {}).get('Code')
+        if code:
+            return code[:1].upper() + code[1:]
+    return None
+
+
+###################################################################
+#
+# TokenBucket
+#
+class TokenBucket:
+    """
+    Classic token bucket: refills at rate tokens per second up to
+    capacity; acquire() blocks until a token is available or the
+    deadline (time.monotonic() based) passes.
+    """
+
+    def __init__(self, rate, capacity):
+        self.rate = float(rate)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self, deadline=None):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+
+            if deadline is not None and time.monotonic() + wait > deadline:
+                return False
+            time.sleep(wait)
+
+
+###################################################################
+#
+# AdaptiveLimiter
+#
+class AdaptiveLimiter:
+    """
+    AIMD limit on the number of calls in flight: each success adds
+    1/limit (so roughly +1 per window of successes), each throttle
+    multiplies the limit by decrease_factor.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=16, decrease_factor=0.5):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self._in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self, deadline=None):
+        with self._cond:
+            while self._in_flight >= int(self.limit):
+                timeout = None if deadline is None else deadline - time.monotonic()
+                if timeout is not None and timeout <= 0:
+                    return False
+                self._cond.wait(timeout)
+            self._in_flight += 1
+            return True
+
+    def release(self, throttled=False):
+        with self._cond:
+            self._in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit * self.decrease_factor)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+###################################################################
+#
+# ThrottledInvoker
+#
+class ThrottledInvoker:
+    """
+    Runs Bedrock calls through the token bucket and the adaptive
+    limiter, retrying throttled and transient failures with
+    full-jitter exponential backoff while time remains.
+    """
+
+    def __init__(self, bucket, limiter, max_attempts=6, base_delay=0.5, max_delay=20.0):
+        self.bucket = bucket
+        self.limiter = limiter
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self.stats = {'calls': 0, 'throttles': 0, 'retries': 0, 'gave_up': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def snapshot(self):
+        with self._lock:
+            stats = dict(self.stats)
+        stats['concurrency_limit'] = round(self.limiter.limit, 2)
+        return stats
+
+    def call(self, fn, deadline=None):
+        """
+        Calls fn() and returns its result
+
+        Parameters
+        ----------
+        fn : zero-argument callable performing one Bedrock request,
+        deadline : time.monotonic() value after which no new attempt
+                   or backoff sleep is started (None = no limit)
+
+        Returns
+        -------
+        whatever fn returns; raises BedrockThrottled if throttling
+        outlasts the attempts or the deadline, and re-raises any
+        non-retryable error
+        """
+        attempt = 0
+        while True:
+            attempt += 1
+
+            if not self.bucket.acquire(deadline) or not self.limiter.acquire(deadline):
+                self._count('gave_up')
+                raise BedrockThrottled('no capacity to call Bedrock before the deadline')
+
+            throttled = False
+            try:
+                self._count('calls')
+                return fn()
+            except Exception as err:
+                code = error_code(err)
+                if code not in RETRYABLE_CODES:
+                    raise
+                throttled = code in THROTTLE_CODES
+                if throttled:
+                    self._count('throttles')
+                print(f'bedrockcall: attempt {attempt} failed with {code}')
+
+                delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+                out_of_time = deadline is not None and time.monotonic() + delay > deadline
+                if attempt >= self.max_attempts or out_of_time:
+                    self._count('gave_up')
+                    if throttled:
+                        raise BedrockThrottled(f'Bedrock still throttling after {attempt} attempt(s)') from err
+                    raise
+            finally:
+                self.limiter.release(throttled=throttled)
+
+            self._count('retries')
+            time.sleep(delay)
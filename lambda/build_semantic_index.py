@@ -0,0 +1,97 @@
+#
+# Batch job for semantic matching (see semanticindex.py):
+#
+#   1. fits the IDF table on every resume_text and saves it to the
+#      [semantic] idf_path file (deploy it with proj05_parse_resume
+#      and proj05_match),
+#   2. re-embeds every resume with it into resume_vectors,
+#   3. optionally writes a memory-mappable snapshot of the index to
+#      [semantic] snapshot_path, for proj05_match to start from.
+#
+# Run it once before turning on [semantic] embed_at_parse, and again
+# whenever the IDF should be refitted (vectors from an older table are
+# ignored by proj05_match until they are re-embedded).
+#
+# Usage: python build_semantic_index.py [batch_size]
+#
+
+import sys
+import os
+import numpy as np
+import datatier
+import semanticindex
+
+from configparser import ConfigParser
+
+
+def iter_resume_texts(dbConn):
+  for userid, resume_text in datatier.iter_rows(dbConn, "SELECT userid, resume_text FROM users ORDER BY userid;"):
+    yield userid, resume_text or ''
+
+
+if __name__ == "__main__":
+  batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+
+  config_file = 'resumeapp-config.ini'
+  os.environ['AWS_SHARED_CREDENTIALS_FILE'] = config_file
+
+  configur = ConfigParser()
+  configur.read(config_file)
+
+  rds_endpoint = configur.get('rds', 'endpoint')
+  rds_portnum = int(configur.get('rds', 'port_number'))
+  rds_username = configur.get('rds', 'user_name')
+  rds_pwd = configur.get('rds', 'user_pwd')
+  rds_dbname = configur.get('rds', 'db_name')
+
+  idf_path = configur.get('semantic', 'idf_path')
+  snapshot_path = configur.get('semantic', 'snapshot_path', fallback='')
+
+  # one connection streams the resumes, the other writes vectors:
+  readConn = datatier.get_dbConn(rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname)
+  writeConn = datatier.get_dbConn(rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname)
+
+  print("**Fitting IDF**")
+  idf = semanticindex.fit_idf(text for _, text in iter_resume_texts(readConn))
+  np.save(idf_path, idf)
+  if not idf_path.endswith('.npy'):
+    os.replace(idf_path + '.npy', idf_path)
+
+  embedder = semanticindex.HashedEmbedder(
+    dim=configur.getint('semantic', 'dim', fallback=semanticindex.DEFAULT_DIM),
+    spread=configur.getint('semantic', 'spread', fallback=semanticindex.DEFAULT_SPREAD),
+    idf=idf)
+  print("model:", embedder.model_id)
+
+  # vectors written from here on (ours, and any the parse Lambda
+  # upserts meanwhile) have a larger seq:
+  row = datatier.retrieve_one_row(writeConn, "SELECT MAX(seq) FROM resume_vectors;")
+  start_seq = (row[0] if row else None) or 0
+
+  print("**Embedding resumes**")
+  batch = []
+  total = 0
+  for userid, text in iter_resume_texts(readConn):
+    row = semanticindex.vector_row(userid, embedder, text)
+    batch.append(row)
+    if len(batch) >= batch_size:
+      datatier.perform_many(writeConn, semanticindex.UPSERT_VECTOR_SQL, batch, batch_size)
+      total += len(batch)
+      batch = []
+      print(f"  {total} resumes embedded")
+  if batch:
+    datatier.perform_many(writeConn, semanticindex.UPSERT_VECTOR_SQL, batch, batch_size)
+    total += len(batch)
+
+  if snapshot_path:
+    # built from the table rather than from the batches above, so
+    # that the mark covers exactly the rows the snapshot holds
+    print("**Writing snapshot**")
+    index = semanticindex.VectorIndex(embedder.dim, embedder.model_id)
+    index.high_water_mark = start_seq
+    index.refresh(writeConn, embedder.model_id)
+    index.save(snapshot_path)
+
+  print(f"**DONE: {total} resumes embedded, IDF saved to {idf_path}**")
+  readConn.close()
+  writeConn.close()
@@ -0,0 +1,160 @@
+#
+# compaction.py
+#
+# Shrinks resume text before it is pasted into the Bedrock prompt:
+# normalizes unicode and whitespace, drops headers/footers that repeat
+# on most pages and page numbers at the top or bottom of a page, strips
+# glyphs that carry no information (bullets, private-use icons, control
+# characters), and finally truncates to a token budget measured with a
+# local estimator.
+#
+# The stored resume_text is not affected; only the prompt is.
+#
+
+import re
+import math
+import unicodedata
+
+
+WHITESPACE_RE = re.compile(r"[ \t\u00a0\u2000-\u200b\u3000]+")
+BLANK_LINES_RE = re.compile(r"\n{3,}")
+# "Page 3", "Page 3 of 7", "3 / 7", "- 3 of 7 -":
+PAGE_LABEL_RE = re.compile(r"^[-–(\[]?\s*(?:page\s*\d{1,3}(?:\s*(?:of|/)\s*\d{1,3})?|\d{1,3}\s*(?:of|/)\s*\d{1,3})\s*[-–)\]]?$",
+                           re.IGNORECASE)
+# "3", "- 3 -", "(3)": only a page number as the first or last line of
+# a page (empty pages are dropped before compaction, so the number
+# need not match the page's position)
+BARE_NUMBER_RE = re.compile(r"^[-–(\[]?\s*(\d{1,3})\s*[-–)\]]?$")
+TOKEN_RE = re.compile(r"\w+|[^\w\s]")
+
+# unicode categories with no informational value in a prompt: control,
+# format, private use (icon fonts), unassigned, and "other" symbols
+# (bullets, dingbats, emoji):
+DROPPED_CATEGORIES = {'Cc', 'Cf', 'Co', 'Cn', 'So'}
+
+# bullets that unicode files under punctuation or math rather than
+# symbols, plus the replacement character left by broken glyphs:
+DROPPED_CHARS = set('\u2022\u2023\u2043\u2219\u22c5\u00b7\ufffd')
+
+# header/footer candidates are the first and last EDGE_LINES lines of
+# a page; one is dropped when the exact same line is at the edge of at
+# least REPEATED_LINE_FRACTION of the pages, for resumes of at least
+# MIN_PAGES_FOR_REPEATS pages (on shorter ones, repeats are as likely
+# to be content: section headings, job titles)
+EDGE_LINES = 3
+REPEATED_LINE_FRACTION = 0.6
+MIN_PAGES_FOR_REPEATS = 3
+
+
+def estimate_tokens(text):
+    """
+    Rough local token count: one token per punctuation mark and per
+    started 4 characters of each word, which tracks BPE tokenizers
+    closely enough for budgeting
+    """
+    return sum(math.ceil(len(token) / 4) for token in TOKEN_RE.findall(text))
+
+
+def normalize_text(text):
+    """
+    NFKC-normalizes (expands ligatures such as 'ﬁ'), drops
+    non-informative glyphs, and collapses runs of whitespace
+    """
+    text = unicodedata.normalize('NFKC', text)
+    text = "".join(
+        ch for ch in text
+        if ch in '\n\t' or (ch not in DROPPED_CHARS and unicodedata.category(ch) not in DROPPED_CATEGORIES)
+    )
+    lines = [WHITESPACE_RE.sub(' ', line).strip() for line in text.split('\n')]
+    return BLANK_LINES_RE.sub('\n\n', '\n'.join(lines)).strip()
+
+
+def _edge_lines(lines):
+    # indexes of the first and last EDGE_LINES non-empty lines, and of
+    # the first and last one
+    filled = [i for i, line in enumerate(lines) if line]
+    return set(filled[:EDGE_LINES] + filled[-EDGE_LINES:]), set(filled[:1] + filled[-1:])
+
+
+def _is_page_number(line, outermost):
+    return bool(PAGE_LABEL_RE.match(line) or (outermost and BARE_NUMBER_RE.match(line)))
+
+
+def remove_repeated_lines(pages):
+    """
+    Removes, from the top and bottom lines of each page, page numbers
+    and lines repeated exactly at the edges of most pages. Returns
+    (pages, number of lines removed).
+    """
+    split_pages = [page.split('\n') for page in pages]
+    edges = [_edge_lines(lines) for lines in split_pages]
+
+    repeated = set()
+    if len(pages) >= MIN_PAGES_FOR_REPEATS:
+        page_counts = {}
+        for lines, (edge, _) in zip(split_pages, edges):
+            for line in {lines[i] for i in edge}:
+                page_counts[line] = page_counts.get(line, 0) + 1
+        threshold = math.ceil(len(pages) * REPEATED_LINE_FRACTION)
+        repeated = {line for line, count in page_counts.items() if count >= threshold}
+
+    removed = 0
+    kept_pages = []
+    for lines, (edge, outermost) in zip(split_pages, edges):
+        kept = []
+        for i, line in enumerate(lines):
+            if i in edge and (line in repeated or _is_page_number(line, i in outermost)):
+                removed += 1
+                continue
+            kept.append(line)
+        kept_pages.append('\n'.join(kept))
+    return kept_pages, removed
+
+
+def truncate_to_budget(text, token_budget):
+    """
+    Cuts text at the first token that no longer fits in token_budget
+    tokens. Returns (text, True if it was truncated).
+    """
+    if token_budget is None or estimate_tokens(text) <= token_budget:
+        return text, False
+
+    used = 0
+    for match in TOKEN_RE.finditer(text):
+        used += math.ceil(len(match.group(0)) / 4)
+        if used > token_budget:
+            return text[:match.start()].rstrip(), True
+    return text, False
+
+
+def compact(pages, token_budget=None):
+    """
+    Compacts resume text for the prompt
+
+    Parameters
+    ----------
+    pages : list of page texts (a single string is treated as one page),
+    token_budget : maximum estimated tokens in the result, or None
+
+    Returns
+    -------
+    (compacted text, stats dict with tokens_before, tokens_after,
+    lines_removed and truncated)
+    """
+    if isinstance(pages, str):
+        pages = [pages]
+
+    tokens_before = estimate_tokens('\n'.join(pages))
+
+    pages = [normalize_text(page) for page in pages]
+    pages, lines_removed = remove_repeated_lines(pages)
+    text = BLANK_LINES_RE.sub('\n\n', '\n'.join(page for page in pages if page)).strip()
+    text, truncated = truncate_to_budget(text, token_budget)
+
+    stats = {
+        'tokens_before': tokens_before,
+        'tokens_after': estimate_tokens(text),
+        'lines_removed': lines_removed,
+        'truncated': truncated,
+    }
+    return text, stats
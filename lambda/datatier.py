@@ -9,6 +9,9 @@
 #
 
 import pymysql
+import pymysql.cursors
+
+from contextlib import contextmanager
 
 
 ###################################################################
@@ -143,6 +146,64 @@ def retrieve_all_rows(dbConn, sql, parameters=[]):
     dbCursor.close()
 
 
+##################################################################
+#
+# iter_rows:
+#
+# Given a database connection and an SQL Select query,
+# executes this query with an unbuffered (server-side)
+# cursor and yields the rows (tuples) one at a time, fetching
+# batch_size rows per round trip. Memory use stays constant
+# however many rows the query retrieves. The query can be
+# parameterized using %s, in which case pass the values as a
+# list [value1, value2, ...]
+#
+# While the generator is alive the connection is busy
+# streaming: exhaust or close() it before running other
+# queries on the same connection. A generator abandoned
+# early releases its cursor when closed or garbage collected
+# (wrap it in contextlib.closing() to make that explicit).
+#
+def iter_rows(dbConn, sql, parameters=[], batch_size=1000):
+  """
+  Executes an sql SELECT query against the database connection
+  and yields the rows as tuples, streaming them from the server
+  batch_size rows at a time
+
+  Parameters
+  __________
+  dbConn : the database connection,
+  sql : the SQL SELECT query (can be parameterized with %s),
+  parameters: optional list of values if parameterized,
+  batch_size: rows fetched per round trip
+
+  Returns
+  _______
+  generator of rows as tuples
+  """
+
+  dbCursor = dbConn.cursor(pymysql.cursors.SSCursor)
+
+  try:
+    dbCursor.execute(sql, parameters)
+
+    while True:
+      rows = dbCursor.fetchmany(batch_size)
+      if not rows:
+        break
+      yield from rows
+
+  except Exception as err:
+    print("datatier.iter_rows() failed:")
+    print(str(err))
+    raise
+
+  finally:
+    # closing an unbuffered cursor reads and discards any rows
+    # still in flight, leaving the connection usable:
+    dbCursor.close()
+
+
 ###############################################################
 #
 # perform_action:
@@ -190,3 +251,98 @@ def perform_action(dbConn, sql, parameters=[]):
 
   finally:
     dbCursor.close()
+
+
+###############################################################
+#
+# transaction:
+#
+# Given a database connection, returns a context manager
+# that yields a cursor for running several statements as one
+# transaction: the changes are committed once when the block
+# exits normally, and rolled back if it raises. Example:
+#
+#   with datatier.transaction(dbConn) as dbCursor:
+#     dbCursor.execute(sql1, parameters1)
+#     dbCursor.executemany(sql2, rows)
+#
+@contextmanager
+def transaction(dbConn):
+  """
+  Runs the statements executed on the yielded cursor as a single
+  transaction: commit on success, rollback on failure
+
+  Parameters
+  __________
+  dbConn : the database connection
+
+  Returns
+  _______
+  a context manager yielding a cursor
+  """
+
+  dbCursor = dbConn.cursor()
+
+  try:
+    yield dbCursor
+    dbConn.commit()
+
+  except Exception as err:
+    # failed, rollback any possible changes and log error:
+    dbConn.rollback()
+    print("datatier.transaction() failed:")
+    print(str(err))
+    raise
+
+  finally:
+    dbCursor.close()
+
+
+###############################################################
+#
+# perform_many:
+#
+# Given a database connection, an SQL action query and a list
+# of parameter lists (one per row), executes the query for
+# every row and returns the total number of rows modified.
+# The rows are sent chunk_size at a time with executemany:
+# for INSERT ... VALUES (%s, ...) statements, including
+# INSERT ... ON DUPLICATE KEY UPDATE col=VALUES(col) upserts,
+# pymysql folds each chunk into a single multi-row statement.
+# Each chunk is committed as one transaction; if a chunk
+# fails it is rolled back and the error is raised, leaving
+# the chunks before it committed.
+#
+def perform_many(dbConn, sql, rows, chunk_size=500):
+  """
+  Executes an sql ACTION query once per row, chunk_size rows
+  per round trip and per commit, and returns the number of rows
+  modified
+
+  Parameters
+  __________
+  dbConn : the database connection,
+  sql : the SQL ACTION query (parameterized with %s),
+  rows: list of parameter lists, one per execution,
+  chunk_size: rows per executemany call and per commit
+
+  Returns
+  _______
+  number of rows modified (as reported by MySQL, so an upsert
+  that updates a row counts it twice)
+  """
+
+  modified = 0
+
+  for start in range(0, len(rows), chunk_size):
+    chunk = rows[start:start + chunk_size]
+    try:
+      with transaction(dbConn) as dbCursor:
+        dbCursor.executemany(sql, chunk)
+        modified += dbCursor.rowcount
+    except Exception as err:
+      print(f"datatier.perform_many() failed on rows {start}..{start + len(chunk) - 1}:")
+      print(str(err))
+      raise
+
+  return modified
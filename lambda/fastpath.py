@@ -0,0 +1,252 @@
+#
+# fastpath.py
+#
+# Offline extraction of name, email, phone and skills from resume
+# text, without calling Bedrock. Emails and phone numbers come from
+# compiled regexes, the name from a heuristic over the first lines,
+# and skills from an Aho-Corasick automaton over a curated skill
+# dictionary, so the whole text is scanned once regardless of the
+# dictionary size.
+#
+# The result has the same keys as process_with_bedrock ('fullname',
+# 'email', 'skills') plus 'phone' and a 'confidence' in [0, 1] that
+# the hybrid mode uses to decide whether the LLM is still needed.
+#
+
+import re
+from collections import deque
+
+
+EMAIL_RE = re.compile(r"[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Za-z]{2,}")
+PHONE_RE = re.compile(r"(?<!\w)(?:\+?\d{1,3}[\s.-]?)?(?:\(\d{3}\)|\d{3})[\s.-]?\d{3}[\s.-]?\d{4}(?!\w)")
+URL_RE = re.compile(r"https?://|www\.|linkedin|github", re.IGNORECASE)
+NAME_TOKEN_RE = re.compile(r"^[A-Z][A-Za-z'\-]*\.?$|^[A-Z]+$")
+
+# lines that head a resume but are never the candidate's name:
+NON_NAME_WORDS = {
+    'resume', 'curriculum', 'vitae', 'cv', 'profile', 'summary', 'objective',
+    'education', 'experience', 'skills', 'contact', 'address', 'page',
+}
+
+# how many leading lines the name heuristic looks at:
+NAME_SEARCH_LINES = 8
+
+
+#
+# curated skill dictionary: canonical name -> spellings to match
+# (matching is case-insensitive and on word boundaries)
+#
+SKILL_DICTIONARY = {
+    'Python': ['python'],
+    'Java': ['java'],
+    'JavaScript': ['javascript', 'js', 'ecmascript'],
+    'TypeScript': ['typescript'],
+    # a lone "c" or "r" is usually an initial, a grade or a section
+    # ("C. Smith", "R&D"), so these only match in context:
+    'C': ['c/c++', 'c programming', 'ansi c'],
+    'C++': ['c++', 'cpp'],
+    'C#': ['c#', 'csharp'],
+    'Go': ['golang'],
+    'Rust': ['rust'],
+    'Ruby': ['ruby'],
+    'PHP': ['php'],
+    'Scala': ['scala'],
+    'Kotlin': ['kotlin'],
+    'Swift': ['swift'],
+    'R': ['r programming', 'r language', 'rstudio'],
+    'MATLAB': ['matlab'],
+    'SQL': ['sql'],
+    'MySQL': ['mysql'],
+    'PostgreSQL': ['postgresql', 'postgres'],
+    'MongoDB': ['mongodb', 'mongo'],
+    'Redis': ['redis'],
+    'HTML': ['html', 'html5'],
+    'CSS': ['css', 'css3'],
+    'React': ['react', 'react.js', 'reactjs'],
+    'Angular': ['angular', 'angularjs'],
+    'Vue.js': ['vue', 'vue.js', 'vuejs'],
+    'Node.js': ['node.js', 'nodejs', 'node'],
+    'Django': ['django'],
+    'Flask': ['flask'],
+    'Spring': ['spring boot', 'spring framework'],
+    '.NET': ['.net', 'dotnet'],
+    'AWS': ['aws', 'amazon web services'],
+    'GCP': ['gcp', 'google cloud'],
+    'Azure': ['azure'],
+    'Docker': ['docker'],
+    'Kubernetes': ['kubernetes', 'k8s'],
+    'Terraform': ['terraform'],
+    'Linux': ['linux'],
+    'Git': ['git'],
+    'Jenkins': ['jenkins'],
+    'Spark': ['spark', 'apache spark', 'pyspark'],
+    'Hadoop': ['hadoop'],
+    'Kafka': ['kafka'],
+    'Pandas': ['pandas'],
+    'NumPy': ['numpy'],
+    'scikit-learn': ['scikit-learn', 'sklearn'],
+    'TensorFlow': ['tensorflow'],
+    'PyTorch': ['pytorch'],
+    'Machine Learning': ['machine learning'],
+    'Deep Learning': ['deep learning'],
+    'NLP': ['nlp', 'natural language processing'],
+    'Computer Vision': ['computer vision'],
+    'Data Analysis': ['data analysis'],
+    'Tableau': ['tableau'],
+    'Power BI': ['power bi'],
+    'Excel': ['ms excel', 'microsoft excel'],
+    'REST': ['restful', 'rest api', 'rest apis'],
+    'GraphQL': ['graphql'],
+    'Agile': ['agile', 'scrum'],
+}
+
+
+###################################################################
+#
+# Aho-Corasick multi-pattern matcher
+#
+class SkillMatcher:
+    """
+    Aho-Corasick automaton over the spellings of a skill dictionary.
+    find() returns canonical skill names in order of first occurrence.
+    """
+
+    def __init__(self, dictionary):
+        self._goto = [{}]
+        self._fail = [0]
+        self._out = [[]]
+
+        for canonical, spellings in dictionary.items():
+            for spelling in spellings:
+                self._add(spelling.lower(), canonical)
+        self._build()
+
+    def _add(self, pattern, canonical):
+        state = 0
+        for ch in pattern:
+            nxt = self._goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), canonical))
+
+    def _build(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and ch not in self._goto[fail]:
+                    fail = self._fail[fail]
+                self._fail[nxt] = self._goto[fail].get(ch, 0)
+                if self._fail[nxt] == nxt:
+                    self._fail[nxt] = 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def find(self, text):
+        lowered = text.lower()
+        found = {}
+        state = 0
+        for end, ch in enumerate(lowered):
+            while state and ch not in self._goto[state]:
+                state = self._fail[state]
+            state = self._goto[state].get(ch, 0)
+            for length, canonical in self._out[state]:
+                start = end - length + 1
+                # whole words only, so 'r' does not match inside 'react':
+                if start > 0 and _is_word_char(lowered[start - 1]):
+                    continue
+                if end + 1 < len(lowered) and _is_word_char(lowered[end + 1]):
+                    continue
+                found.setdefault(canonical, start)
+        return sorted(found, key=found.get)
+
+
+def _is_word_char(ch):
+    return ch.isalnum() or ch in '+#'
+
+
+default_matcher = SkillMatcher(SKILL_DICTIONARY)
+
+
+###################################################################
+#
+# field extractors
+#
+def find_email(text):
+    match = EMAIL_RE.search(text)
+    return match.group(0) if match else None
+
+
+def find_phone(text):
+    match = PHONE_RE.search(text)
+    return match.group(0).strip() if match else None
+
+
+def find_name(text, email=None):
+    """
+    Returns (name, confidence) for the most name-like of the first
+    lines, or ('', 0.0)
+    """
+    email_local = re.sub(r"[^a-z]", "", email.split('@')[0].lower()) if email else ''
+
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    for line in lines[:NAME_SEARCH_LINES]:
+        if EMAIL_RE.search(line) or PHONE_RE.search(line) or URL_RE.search(line):
+            continue
+        if any(ch.isdigit() for ch in line):
+            continue
+
+        tokens = line.replace(',', ' ').split()
+        if not 2 <= len(tokens) <= 4:
+            continue
+        if any(token.lower().strip('.') in NON_NAME_WORDS for token in tokens):
+            continue
+        if not all(NAME_TOKEN_RE.match(token) for token in tokens):
+            continue
+
+        name = " ".join(token.title() if token.isupper() else token for token in tokens)
+
+        # much more likely to be right if the email agrees:
+        if email_local and any(token.lower().strip('.') in email_local for token in tokens if len(token) > 2):
+            return name, 1.0
+        return name, 0.7
+
+    return '', 0.0
+
+
+def extract(text, matcher=default_matcher, min_skills=5):
+    """
+    Extracts resume fields locally
+
+    Parameters
+    ----------
+    text : resume text,
+    matcher : SkillMatcher to find skills with,
+    min_skills : number of skills that counts as full confidence
+
+    Returns
+    -------
+    dict with 'fullname', 'email', 'phone', 'skills' (list) and
+    'confidence' (mean of the per-field confidences)
+    """
+    email = find_email(text)
+    phone = find_phone(text)
+    fullname, name_confidence = find_name(text, email)
+    skills = matcher.find(text)
+
+    email_confidence = 1.0 if email else 0.0
+    skills_confidence = min(1.0, len(skills) / min_skills) if min_skills else 1.0
+
+    return {
+        'fullname': fullname,
+        'email': email or 'unknown@example.com',
+        'phone': phone,
+        'skills': skills,
+        'confidence': round((name_confidence + email_confidence + skills_confidence) / 3, 3),
+    }
@@ -0,0 +1,192 @@
+#
+# fulltext.py
+#
+# Ranked full-text search over users.resume_text, with two engines
+# behind the same search(query, mode, limit, offset) interface:
+#
+#   - MySQLFulltextSearch uses the FULLTEXT index on resume_text
+#     (natural-language or boolean mode) and MySQL's relevance score,
+#   - BM25Search is a pure-Python Okapi BM25 engine over rows loaded
+#     from any DB-API connection, used with the local SQLite backend
+#     and for offline ranking benchmarks.
+#
+# search() returns (results, has_more), where results is a list of
+# dicts with userid, firstname, lastname, email, skills and score.
+#
+
+import re
+import math
+import heapq
+
+import datatier
+
+
+RESULT_COLUMNS = ['userid', 'firstname', 'lastname', 'email', 'skills']
+
+MODES = {
+    'natural': 'IN NATURAL LANGUAGE MODE',
+    'boolean': 'IN BOOLEAN MODE',
+}
+
+
+###################################################################
+#
+# MySQL FULLTEXT
+#
+class MySQLFulltextSearch:
+    def __init__(self, dbConn):
+        self.dbConn = dbConn
+
+    def search(self, query, mode='natural', limit=20, offset=0):
+        if mode not in MODES:
+            raise ValueError(f"unknown search mode '{mode}'")
+
+        # one extra row tells us whether there is a next page:
+        sql = f"""
+          SELECT {", ".join(RESULT_COLUMNS)},
+                 MATCH(resume_text) AGAINST (%s {MODES[mode]}) AS score
+          FROM users
+          WHERE MATCH(resume_text) AGAINST (%s {MODES[mode]})
+          ORDER BY score DESC, userid ASC
+          LIMIT %s OFFSET %s;
+          """
+        rows = datatier.retrieve_all_rows(self.dbConn, sql, [query, query, limit + 1, offset])
+
+        results = []
+        for row in rows[:limit]:
+            result = dict(zip(RESULT_COLUMNS, row[:-1]))
+            result['score'] = round(float(row[-1]), 4)
+            results.append(result)
+        return results, len(rows) > limit
+
+
+###################################################################
+#
+# BM25
+#
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#.]*[a-z0-9+#]|[a-z0-9]")
+
+# InnoDB's default full-text stopwords, so both engines ignore the
+# same words:
+STOPWORDS = {
+    'a', 'about', 'an', 'are', 'as', 'at', 'be', 'by', 'com', 'de', 'en',
+    'for', 'from', 'how', 'i', 'in', 'is', 'it', 'la', 'of', 'on', 'or',
+    'that', 'the', 'this', 'to', 'was', 'what', 'when', 'where', 'who',
+    'will', 'with', 'und', 'www',
+}
+
+BOOLEAN_TERM_RE = re.compile(r'([+-]?)("[^"]*"|\S+)')
+
+
+def tokenize(text):
+    return [token for token in TOKEN_RE.findall((text or '').lower()) if token not in STOPWORDS]
+
+
+class BM25Search:
+    """
+    Okapi BM25 over resume_text. Boolean mode supports the common
+    subset of MySQL's syntax: +term (required), -term (excluded) and
+    plain terms (optional, ranked).
+    """
+
+    def __init__(self, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.docs = []        # docno -> result dict (without score)
+        self.doc_lengths = []
+        self.postings = {}    # term -> {docno: term frequency}
+        self.total_length = 0
+
+    def add(self, row, resume_text):
+        """
+        Adds one user; row holds the RESULT_COLUMNS values
+        """
+        docno = len(self.docs)
+        self.docs.append(dict(zip(RESULT_COLUMNS, row)))
+
+        tokens = tokenize(resume_text)
+        self.doc_lengths.append(len(tokens))
+        self.total_length += len(tokens)
+
+        counts = {}
+        for token in tokens:
+            counts[token] = counts.get(token, 0) + 1
+        for token, count in counts.items():
+            self.postings.setdefault(token, {})[docno] = count
+
+    def load(self, dbConn, batch_size=1000):
+        """
+        Loads every user from a DB-API connection (e.g. sqlite3),
+        batch_size rows at a time so the resume texts are never all
+        held at once
+        """
+        cursor = dbConn.cursor()
+        try:
+            cursor.execute(f"SELECT {', '.join(RESULT_COLUMNS)}, resume_text FROM users ORDER BY userid;")
+            while True:
+                rows = cursor.fetchmany(batch_size)
+                if not rows:
+                    break
+                for row in rows:
+                    self.add(row[:-1], row[-1])
+        finally:
+            cursor.close()
+        return self
+
+    def _idf(self, term):
+        n = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.docs) - n + 0.5) / (n + 0.5))
+
+    def score_terms(self, terms):
+        """
+        Returns {docno: BM25 score} summed over terms
+        """
+        scores = {}
+        if not self.docs:
+            return scores
+        avg_length = self.total_length / len(self.docs) or 1
+        for term in terms:
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = self._idf(term)
+            for docno, tf in postings.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_lengths[docno] / avg_length)
+                scores[docno] = scores.get(docno, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+        return scores
+
+    def _matching_docs(self, query, mode):
+        if mode == 'natural':
+            return self.score_terms(tokenize(query))
+
+        required, excluded, optional = [], [], []
+        for sign, term in BOOLEAN_TERM_RE.findall(query):
+            tokens = tokenize(term.strip('"'))
+            {'+': required, '-': excluded}.get(sign, optional).extend(tokens)
+
+        scores = self.score_terms(required + optional)
+        for term in required:
+            docs = self.postings.get(term, {})
+            scores = {docno: score for docno, score in scores.items() if docno in docs}
+        for term in excluded:
+            docs = self.postings.get(term, {})
+            scores = {docno: score for docno, score in scores.items() if docno not in docs}
+        return scores
+
+    def search(self, query, mode='natural', limit=20, offset=0):
+        if mode not in MODES:
+            raise ValueError(f"unknown search mode '{mode}'")
+
+        scores = self._matching_docs(query, mode)
+        ranked = heapq.nsmallest(
+            offset + limit + 1,
+            scores.items(),
+            key=lambda item: (-item[1], self.docs[item[0]]['userid'])
+        )
+
+        results = []
+        for docno, score in ranked[offset:offset + limit]:
+            result = dict(self.docs[docno])
+            result['score'] = round(score, 4)
+            results.append(result)
+        return results, len(ranked) > offset + limit
@@ -0,0 +1,143 @@
+#
+# fuzzyskill.py
+#
+# Typo-tolerant lookup over the distinct skill vocabulary (the
+# canonical ids in user_skills), for "did you mean" suggestions when a
+# skill search finds nothing, e.g. "kubernets" -> "kubernetes".
+#
+# Candidates come from a trigram index (terms sharing enough trigrams
+# with the query), and are then verified with an edit distance that
+# gives up as soon as it exceeds the allowed bound. Everything runs in
+# memory over the vocabulary, never over the users table.
+#
+
+import datatier
+
+
+# minimum Dice similarity of the trigram sets for a term to be a
+# candidate, and how many candidates are verified at most:
+MIN_SIMILARITY = 0.3
+MAX_CANDIDATES = 100
+
+
+def trigrams(term):
+    """
+    Returns the set of trigrams of a term, padded so that short terms
+    and word starts get trigrams of their own
+    """
+    padded = f"  {term} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def max_distance_for(term):
+    """
+    The number of typos tolerated for a query of this length
+    """
+    if len(term) <= 4:
+        return 1
+    if len(term) <= 8:
+        return 2
+    return 3
+
+
+def bounded_edit_distance(a, b, bound):
+    """
+    Returns the edit distance between a and b, counting insertions,
+    deletions, substitutions and swaps of adjacent characters ("pyhton")
+    as one edit each, or None if it is larger than bound
+    """
+    if abs(len(a) - len(b)) > bound:
+        return None
+
+    before = None
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i] + [0] * len(b)
+        for j, char_b in enumerate(b, 1):
+            current[j] = min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b))
+            if before is not None and j > 1 and char_a == b[j - 2] and a[i - 2] == char_b:
+                current[j] = min(current[j], before[j - 2] + 1)
+        # every later row is at least this row's minimum:
+        if min(current) > bound:
+            return None
+        before, previous = previous, current
+
+    return previous[-1] if previous[-1] <= bound else None
+
+
+class TrigramIndex:
+    """
+    Trigram index over a vocabulary of terms, each with a weight (the
+    number of users with that skill) used to break ties
+    """
+
+    def __init__(self, vocabulary):
+        self.terms = []
+        self.weights = []
+        self.sizes = []
+        self.postings = {}    # trigram -> list of term numbers
+
+        for term, weight in vocabulary:
+            termno = len(self.terms)
+            grams = trigrams(term)
+            self.terms.append(term)
+            self.weights.append(weight)
+            self.sizes.append(len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, []).append(termno)
+
+    def __len__(self):
+        return len(self.terms)
+
+    def candidates(self, query):
+        """
+        Returns [(similarity, termno)] for the terms sharing enough
+        trigrams with the query, most similar first
+        """
+        grams = trigrams(query)
+        overlaps = {}
+        for gram in grams:
+            for termno in self.postings.get(gram, ()):
+                overlaps[termno] = overlaps.get(termno, 0) + 1
+
+        scored = []
+        for termno, overlap in overlaps.items():
+            similarity = 2 * overlap / (len(grams) + self.sizes[termno])
+            if similarity >= MIN_SIMILARITY:
+                scored.append((similarity, termno))
+        scored.sort(reverse=True)
+        return scored[:MAX_CANDIDATES]
+
+    def suggest(self, query, limit=5, max_distance=None):
+        """
+        Returns up to limit suggestions for a query, closest first, as
+        dicts with skill, distance and users
+        """
+        if max_distance is None:
+            max_distance = max_distance_for(query)
+
+        verified = []
+        for similarity, termno in self.candidates(query):
+            term = self.terms[termno]
+            if term == query:
+                continue
+            distance = bounded_edit_distance(query, term, max_distance)
+            if distance is not None:
+                verified.append((distance, -similarity, -self.weights[termno], term, termno))
+        verified.sort()
+
+        return [
+            {'skill': term, 'distance': distance, 'users': self.weights[termno]}
+            for distance, _, _, term, termno in verified[:limit]
+        ]
+
+
+def load_vocabulary(dbConn):
+    """
+    Returns [(skill_norm, number of users)] over user_skills
+    """
+    sql = "SELECT skill_norm, COUNT(*) FROM user_skills GROUP BY skill_norm;"
+    return [(row[0], row[1]) for row in datatier.iter_rows(dbConn, sql)]
@@ -0,0 +1,111 @@
+#
+# jsonstream.py
+#
+# Incremental extraction of one JSON object from streamed model
+# output. Text before the first '{' (prose, a ```json fence) is
+# skipped, top-level string fields are reported as soon as their
+# closing quote arrives, and the extractor reports completion at the
+# matching closing brace so the caller can stop reading the stream.
+#
+
+import json
+
+
+class IncrementalJSONExtractor:
+    """
+    Feed text chunks with feed(); once done is True, result holds the
+    parsed object. on_field(key, value) is called for each top-level
+    key whose value is a string, as soon as that value is complete.
+    """
+
+    def __init__(self, on_field=None):
+        self.on_field = on_field
+        self.fields = {}
+        self.done = False
+        self.result = None
+
+        self._buffer = []
+        self._started = False
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._length = 0
+        self._expect_key = True
+        self._key = None
+
+    def feed(self, text):
+        """
+        Consumes a chunk of text; returns True once the object is
+        complete (the rest of the chunk, and of the stream, is ignored)
+        """
+        if self.done:
+            return True
+
+        for ch in text:
+            if not self._started:
+                if ch != '{':
+                    continue
+                self._started = True
+
+            self._buffer.append(ch)
+            self._length += 1
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == '\\':
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._depth == 1:
+                        self._top_level_string(''.join(self._buffer[self._string_start:]))
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._string_start = self._length - 1
+            elif ch in '{[':
+                self._depth += 1
+            elif ch in '}]':
+                self._depth -= 1
+                if self._depth == 0:
+                    self.result = json.loads(''.join(self._buffer))
+                    self.done = True
+                    return True
+            elif self._depth == 1:
+                if ch == ':':
+                    self._expect_key = False
+                elif ch == ',':
+                    self._expect_key = True
+                    self._key = None
+
+        return False
+
+    def _top_level_string(self, literal):
+        value = json.loads(literal)
+        if self._expect_key:
+            self._key = value
+        elif self._key is not None:
+            self.fields[self._key] = value
+            if self.on_field:
+                self.on_field(self._key, value)
+
+    def close(self):
+        """
+        Returns the parsed object, or raises ValueError if the text
+        ended before the object was complete
+        """
+        if not self.done:
+            raise ValueError('model output ended before the JSON object was complete')
+        return self.result
+
+
+def extract_json_object(text):
+    """
+    Returns the first JSON object found in text, ignoring any
+    surrounding prose or markdown fences
+    """
+    extractor = IncrementalJSONExtractor()
+    extractor.feed(text)
+    return extractor.close()
@@ -14,6 +14,12 @@ import logging
 import sys
 import os
 import time
+import io
+import uuid
+import glob
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import quote
 from configparser import ConfigParser
 
 ############################################################
@@ -27,13 +33,51 @@ class User:
         self.email = user_data.get('email')
         self.phone = user_data.get('lastname')
 
+
+class MultipartFileBody:
+    """
+    A multipart/form-data body of form fields followed by one file,
+    read from disk as it is sent rather than loaded into memory.
+    requests streams any object with read(), and takes len() as the
+    Content-Length, which S3 requires (it rejects chunked uploads).
+    """
+
+    def __init__(self, fields, infile, filename, size, content_type):
+        boundary = uuid.uuid4().hex
+        head = b""
+        for name, value in fields.items():
+            head += (f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n'
+                     f'{value}\r\n').encode()
+        head += (f'--{boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+                 f'Content-Type: {content_type}\r\n\r\n').encode()
+        tail = f'\r\n--{boundary}--\r\n'.encode()
+
+        self.content_type = f"multipart/form-data; boundary={boundary}"
+        self.length = len(head) + size + len(tail)
+        self.parts = [io.BytesIO(head), infile, io.BytesIO(tail)]
+
+    def __len__(self):
+        return self.length
+
+    def read(self, size=-1):
+        chunks = []
+        while self.parts and (size < 0 or size > 0):
+            chunk = self.parts[0].read(size)
+            if not chunk:
+                self.parts.pop(0)
+                continue
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+        return b"".join(chunks)
+
 ###################################################################
 #
 # web_service_call
 #
 # Handles HTTP requests with retries for network failures.
 #
-def web_service_call(url, method="GET", data=None, json_data=None, files=None):
+def web_service_call(url, method="GET", data=None, json_data=None, files=None, session=None):
     """
     Submits a request to a web service at most 3 times, since 
     web services can fail to respond due to network issues.
@@ -45,6 +89,7 @@ def web_service_call(url, method="GET", data=None, json_data=None, files=None):
     data: form data for POST requests
     json_data: JSON data for POST requests
     files: files for multipart/form-data requests
+    session: optional requests.Session, to reuse its connections
     
     Returns
     -------
@@ -52,20 +97,21 @@ def web_service_call(url, method="GET", data=None, json_data=None, files=None):
     """
 
     try:
+        http = session or requests
         retries = 0
         
         while True:
             if method.upper() == "GET":
-                response = requests.get(url)
+                response = http.get(url)
             elif method.upper() == "POST":
-                response = requests.post(url, data=data, json=json_data, files=files)
+                response = http.post(url, data=data, json=json_data, files=files)
             elif method.upper() == "DELETE":
-                response = requests.delete(url)
+                response = http.delete(url)
             else:
                 print(f"Unsupported method: {method}")
                 return None
                 
-            if response.status_code in [200, 400, 404, 500]:
+            if response.status_code in [200, 400, 403, 404, 500]:
                 # we consider this a successful call and response
                 break
 
@@ -112,6 +158,10 @@ def prompt():
         print("   3 => list skills of a user")
         print("   4 => upload resume")
         print("   5 => download resume")
+        print("   6 => search users by skill query")
+        print("   7 => full-text resume search")
+        print("   8 => match resumes to a job description")
+        print("   9 => bulk upload resumes from a directory")
 
         cmd = input()
 
@@ -132,24 +182,31 @@ def prompt():
 
 ############################################################
 #
-# list_all_users
+# iter_user_pages
 #
-def list_all_users(baseurl):
+def iter_user_pages(baseurl, limit=50):
     """
-    Prints out all the users in the database with their details
+    Yields the users one page at a time, following the server's
+    next_cursor; a page is only requested when the previous one
+    has been consumed
 
     Parameters
     ----------
     baseurl: baseurl for web service
+    limit: number of users per page
 
     Returns
     -------
-    nothing
+    generator of (list of user rows, whether more pages follow)
     """
 
-    try:
+    cursor = None
+
+    while True:
         # call the web service:
-        api = '/users'
+        api = f'/users?limit={limit}'
+        if cursor:
+            api += f'&cursor={quote(cursor)}'
         url = baseurl + api
 
         res = web_service_call(url)
@@ -170,15 +227,59 @@ def list_all_users(baseurl):
         # deserialize and extract users:
         body = res.json()
 
-        users = json.loads(body.get('body', []))
+        if body.get('statusCode', 200) != 200:
+            print("Failed with status code:", body.get('statusCode'))
+            print("Error message:", body.get('body'))
+            return
+
+        page = json.loads(body.get('body', '{}'))
+
+        cursor = page.get('next_cursor')
+
+        yield page.get('users', []), cursor is not None
+
+        if not cursor:
+            return
+
+
+############################################################
+#
+# list_all_users
+#
+def list_all_users(baseurl):
+    """
+    Prints out the users in the database with their details, one
+    page at a time
+
+    Parameters
+    ----------
+    baseurl: baseurl for web service
+
+    Returns
+    -------
+    nothing
+    """
 
+    try:
         print("\n--- USER LIST ---")
-        for user in users:
-            print(f"  ID: {user[0]}")
-            print(f"  Full name: {user[3]} {user[2]}")
-            print(f"  Email: {user[1]}")
-            print(f"  Skills: {user[5]}")
-            print("-" * 20)
+
+        count = 0
+        for users, has_more in iter_user_pages(baseurl):
+            for user in users:
+                print(f"  ID: {user[0]}")
+                print(f"  Full name: {user[3]} {user[2]}")
+                print(f"  Email: {user[1]}")
+                print(f"  Skills: {user[5]}")
+                print("-" * 20)
+            count += len(users)
+
+            if not has_more:
+                print(f"{count} users in total")
+                break
+
+            print(f"{count} users shown. Press ENTER for more, or q to stop>")
+            if input().strip().lower() == 'q':
+                break
 
     except Exception as e:
         logging.error("**ERROR: list_all_users() failed:")
@@ -210,18 +311,37 @@ def find_users_by_skill(baseurl):
             print("Skill name cannot be empty")
             return
 
-        # call the web service:
-        api = f'/skill/{skill_name}/users'
-        url = baseurl + api
+        while True:
+            # call the web service:
+            api = f'/skill/{quote(skill_name)}/users'
+            url = baseurl + api
 
-        res = web_service_call(url)
+            res = web_service_call(url)
+
+            if res.status_code != 404:
+                break
+
+            # no exact match; the service suggests close spellings:
+            print(f"No users found with skill '{skill_name}'")
+            try:
+                suggestions = res.json().get('suggestions', [])
+            except Exception:
+                suggestions = []
+            if not suggestions:
+                return
+
+            print("Did you mean:")
+            for i, suggestion in enumerate(suggestions, 1):
+                print(f"   {i} => {suggestion['skill']} ({suggestion['users']} users)")
+            print("Enter a number to search for it, or ENTER to stop>")
+            choice = input().strip()
+            if not choice.isdigit() or not 1 <= int(choice) <= len(suggestions):
+                return
+            skill_name = suggestions[int(choice) - 1]['skill']
 
         # let's look at what we got back:
         if res.status_code == 200: # success
             pass
-        elif res.status_code == 404:
-            print(f"No users found with skill '{skill_name}'")
-            return
         else:
             # failed:
             print("Failed with status code:", res.status_code)
@@ -322,7 +442,9 @@ def list_user_skills(baseurl):
 #
 def upload_resume(baseurl):
     """
-    Uploads a resume file for a user
+    Uploads a resume file: asks the web service for a presigned POST
+    and streams the file straight to S3, falling back to posting it
+    through the upload Lambda if there is no presign endpoint
 
     Parameters
     ----------
@@ -341,67 +463,472 @@ def upload_resume(baseurl):
             print("Resume file '", local_filename, "' does not exist...")
             return
 
-        # print("Enter user ID>")
-        # userid = input()
-
-        # if not userid:
-        #     print("User ID cannot be empty")
-        #     return
+        size = os.path.getsize(local_filename)
 
-        # read the file as binary data:
-        with open(local_filename, "rb") as infile:
-            file_bytes = infile.read()
-
-        # encode as base64 for transmission
-        datastr = base64.b64encode(file_bytes).decode('utf-8')
-        
-        # prepare the data packet
-        data = {
-            "filename": os.path.basename(local_filename),
-            "data": datastr
-        }
-
-        # call the web service:
-        api = f'/resume/upload'
-        # api = f'/resume/{userid}'
-        url = baseurl + api
+        # skip the upload (and the parse) if this exact PDF is stored:
+        sha256 = file_sha256(local_filename)
+        existing = find_existing_hashes(baseurl, [sha256])
+        if sha256 in existing:
+            print(f"Resume '{local_filename}' is already stored (user {existing[sha256]}), not uploading")
+            return
 
-        res = web_service_call(url, method="POST", json_data=data)
+        # ask for a presigned POST:
+        res = request_presigned_post(baseurl, local_filename, size)
 
         # let's look at what we got back:
         if res.status_code == 200: # success
             pass
-        elif res.status_code == 404:
-            print('Status 404')
-            # print(f"User with ID '{userid}' not found")
+        elif res.status_code in [403, 404]:
+            # presign endpoint not deployed:
+            upload_resume_via_lambda(baseurl, local_filename)
+            return
+        elif res.status_code == 400:
+            print("Upload refused:", res.json())
             return
         else:
             # failed:
             print("Failed with status code:", res.status_code)
-            print("url: " + url)
+            print("url: " + res.url)
             if res.status_code == 500:
                 # we'll have an error message
                 body = res.json()
                 print("Error message:", body)
             return
 
-        # success message
-        response_data = res.json()
+        presigned = res.json()
+
+        start = time.perf_counter()
+        res = post_file_to_s3(presigned, local_filename, size)
+        elapsed = time.perf_counter() - start
+
+        if res is None or res.status_code not in [200, 201, 204]:
+            print("Upload to S3 failed")
+            if res is not None:
+                print("Status code:", res.status_code)
+                print(res.text[:500])
+            return
+
         print(f"Resume '{local_filename}' successfully uploaded!")
-        print(f"Response: {response_data}")
+        print(f"{size / 1024:.0f} KB in {elapsed:.2f} s ({size / 1024 / 1024 / max(elapsed, 1e-6):.1f} MB/s), key {presigned['key']}")
 
     except Exception as e:
         logging.error("**ERROR: upload_resume() failed:")
         logging.error(e)
         return
 
+
+############################################################
+#
+# file_sha256
+#
+def file_sha256(local_filename, chunk_size=1024 * 1024):
+    """
+    Returns the hex SHA-256 of a file's contents, read in chunks
+    """
+    digest = hashlib.sha256()
+    with open(local_filename, "rb") as infile:
+        for chunk in iter(lambda: infile.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+############################################################
+#
+# find_existing_hashes
+#
+def find_existing_hashes(baseurl, hashes, session=None, batch_size=100):
+    """
+    Asks the web service which resume contents are already stored
+
+    Parameters
+    ----------
+    baseurl: baseurl for web service
+    hashes: hex SHA-256 digests of PDF files
+    session: optional requests.Session to send it with
+    batch_size: digests per request (at most 100)
+
+    Returns
+    -------
+    dict {sha256: userid} of the stored ones; empty if the service has
+    no existence check, so that everything is uploaded
+    """
+
+    existing = {}
+    hashes = list(hashes)
+
+    for i in range(0, len(hashes), batch_size):
+        url = baseurl + '/resume/exists?sha256=' + ",".join(hashes[i:i + batch_size])
+        res = web_service_call(url, session=session)
+
+        if res is None or res.status_code != 200:
+            if res is not None and res.status_code not in [403, 404]:
+                print("Existence check failed with status code:", res.status_code)
+            return existing
+
+        existing.update(res.json().get('existing', {}))
+
+    return existing
+
+
+############################################################
+#
+# request_presigned_post
+#
+def request_presigned_post(baseurl, local_filename, size, session=None):
+    """
+    Asks the web service for a presigned S3 POST for a resume
+
+    Parameters
+    ----------
+    baseurl: baseurl for web service
+    local_filename: file to upload
+    size: size of the file in bytes
+    session: optional requests.Session to send it with
+
+    Returns
+    -------
+    response received from web service
+    """
+
+    data = {
+        "filename": os.path.basename(local_filename),
+        "size": size
+    }
+
+    url = baseurl + '/resume/presign'
+
+    return web_service_call(url, method="POST", json_data=data, session=session)
+
+
+############################################################
+#
+# post_file_to_s3
+#
+def post_file_to_s3(presigned, local_filename, size, session=None):
+    """
+    Streams a file to S3 with a presigned POST, at most 3 times
+
+    Parameters
+    ----------
+    presigned: dict with the url and fields returned by /resume/presign
+    local_filename: file to upload
+    size: size of the file in bytes
+    session: optional requests.Session to send it with
+
+    Returns
+    -------
+    response received from S3, or None if it could not be reached
+    """
+
+    http = session or requests
+    retries = 0
+
+    while True:
+        try:
+            with open(local_filename, "rb") as infile:
+                body = MultipartFileBody(presigned['fields'], infile,
+                                         os.path.basename(local_filename), size, 'application/pdf')
+                response = http.post(presigned['url'], data=body,
+                                     headers={'Content-Type': body.content_type})
+            if response.status_code < 500:
+                return response
+        except requests.exceptions.ConnectionError as e:
+            logging.error(f"post_file_to_s3() failed: {e}")
+            response = None
+
+        # failed, try again?
+        retries = retries + 1
+        if retries < 3:
+            time.sleep(retries)
+            continue
+
+        return response
+
+
+############################################################
+#
+# upload_resume_via_lambda
+#
+def upload_resume_via_lambda(baseurl, local_filename):
+    """
+    Uploads a resume as base64 in JSON through the upload Lambda
+
+    Parameters
+    ----------
+    baseurl: baseurl for web service
+    local_filename: file to upload
+
+    Returns
+    -------
+    nothing
+    """
+
+    # read the file as binary data:
+    with open(local_filename, "rb") as infile:
+        file_bytes = infile.read()
+
+    # encode as base64 for transmission
+    datastr = base64.b64encode(file_bytes).decode('utf-8')
+
+    # prepare the data packet
+    data = {
+        "filename": os.path.basename(local_filename),
+        "data": datastr
+    }
+
+    # call the web service:
+    api = f'/resume/upload'
+    url = baseurl + api
+
+    res = web_service_call(url, method="POST", json_data=data)
+
+    # let's look at what we got back:
+    if res.status_code == 200: # success
+        pass
+    elif res.status_code == 404:
+        print('Status 404')
+        return
+    else:
+        # failed:
+        print("Failed with status code:", res.status_code)
+        print("url: " + url)
+        if res.status_code == 500:
+            # we'll have an error message
+            body = res.json()
+            print("Error message:", body)
+        return
+
+    # success message
+    response_data = res.json()
+    print(f"Resume '{local_filename}' successfully uploaded!")
+    print(f"Response: {response_data}")
+
+############################################################
+#
+# bulk uploads
+#
+# Completed uploads are appended to this manifest, one JSON object per
+# line, so that an interrupted bulk upload can be resumed by running
+# it again:
+#
+MANIFEST_FILE = 'resume-upload-manifest.jsonl'
+
+
+def find_resumes(pattern):
+    """
+    Returns the sorted PDF files in a directory (recursively) or
+    matching a glob pattern
+    """
+    if os.path.isdir(pattern):
+        pattern = os.path.join(pattern, '**', '*.pdf')
+    return sorted(path for path in glob.glob(pattern, recursive=True) if os.path.isfile(path))
+
+
+def manifest_entry_id(path):
+    """
+    Identifies a file version: a file that is modified after its
+    upload is uploaded again
+    """
+    stat = os.stat(path)
+    return f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime_ns}"
+
+
+def load_manifest(manifest_file):
+    """
+    Returns the set of entry ids already uploaded; a partly written
+    last line (from an interrupted run) is ignored
+    """
+    done = set()
+    if not os.path.exists(manifest_file):
+        return done
+    with open(manifest_file) as infile:
+        for line in infile:
+            try:
+                done.add(json.loads(line)['id'])
+            except (ValueError, KeyError):
+                continue
+    return done
+
+
+def upload_one(baseurl, local_filename, session):
+    """
+    Uploads one resume through a presigned POST
+
+    Returns
+    -------
+    (S3 key, None) on success, or (None, error message)
+    """
+    size = os.path.getsize(local_filename)
+
+    res = request_presigned_post(baseurl, local_filename, size, session=session)
+    if res is None:
+        return None, "presign request failed"
+    if res.status_code != 200:
+        return None, f"presign failed with status code {res.status_code}: {res.text[:200]}"
+
+    presigned = res.json()
+    res = post_file_to_s3(presigned, local_filename, size, session=session)
+    if res is None or res.status_code not in [200, 201, 204]:
+        return None, f"S3 upload failed with status code {res.status_code if res is not None else 'none'}"
+
+    return presigned['key'], None
+
+
+def bulk_upload_resumes(baseurl):
+    """
+    Uploads every PDF in a directory or matching a glob pattern, on a
+    bounded pool of threads sharing one keep-alive session. Files in
+    the manifest from an earlier run are skipped, and so are files
+    whose contents are already stored or repeat another file's.
+
+    Parameters
+    ----------
+    baseurl: baseurl for web service
+
+    Returns
+    -------
+    nothing
+    """
+
+    try:
+        print("Enter directory or glob pattern (e.g. resumes/**/*.pdf)>")
+        pattern = input().strip()
+
+        paths = find_resumes(pattern)
+        if not paths:
+            print(f"No PDF files found for '{pattern}'")
+            return
+
+        print("Number of parallel uploads (ENTER for 8)>")
+        workers = input().strip()
+        workers = int(workers) if workers.isdigit() and int(workers) > 0 else 8
+
+        done = load_manifest(MANIFEST_FILE)
+        pending = [(path, manifest_entry_id(path)) for path in paths]
+        pending = [(path, entry_id) for path, entry_id in pending if entry_id not in done]
+
+        print(f"{len(paths)} files found, {len(paths) - len(pending)} already uploaded")
+        if not pending:
+            return
+
+        # one connection pool shared by the workers, kept alive
+        # between requests:
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=4, pool_maxsize=workers)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+
+        #
+        # hash the files, then only upload contents the service does
+        # not have yet, once each:
+        #
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            hashes = list(executor.map(file_sha256, [path for path, _ in pending]))
+
+        existing = find_existing_hashes(baseurl, set(hashes), session=session)
+
+        # files repeating one earlier in this batch are only recorded
+        # once that file has uploaded, so a failed or interrupted upload
+        # leaves them to the next run:
+        repeats = {}  # sha256 -> [(path, entry_id), ...]
+        to_upload = []
+        duplicates = 0
+        with open(MANIFEST_FILE, "a") as manifest:
+            for (path, entry_id), sha256 in zip(pending, hashes):
+                if sha256 in existing:
+                    manifest.write(json.dumps({'id': entry_id, 'path': path, 'sha256': sha256,
+                                               'duplicate_of': existing[sha256]}) + "\n")
+                    duplicates += 1
+                elif sha256 in repeats:
+                    repeats[sha256].append((path, entry_id))
+                    duplicates += 1
+                else:
+                    repeats[sha256] = []
+                    to_upload.append((path, entry_id, sha256))
+
+        print(f"{duplicates} duplicates (already stored or repeated) skipped, {len(to_upload)} to upload")
+        pending = to_upload
+        if not pending:
+            session.close()
+            return
+
+        uploaded = 0
+        uploaded_bytes = 0
+        failures = []
+        interrupted = False
+        start = time.perf_counter()
+
+        with open(MANIFEST_FILE, "a") as manifest, ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(upload_one, baseurl, path, session): (path, entry_id, sha256)
+                for path, entry_id, sha256 in pending
+            }
+            remaining = set(futures)
+
+            while remaining:
+                try:
+                    for future in as_completed(remaining):
+                        remaining.discard(future)
+                        path, entry_id, sha256 = futures[future]
+                        try:
+                            key, error = future.result()
+                        except Exception as e:
+                            key, error = None, str(e)
+
+                        if key:
+                            uploaded += 1
+                            uploaded_bytes += os.path.getsize(path)
+                            manifest.write(json.dumps({'id': entry_id, 'path': path, 'sha256': sha256,
+                                                       'key': key}) + "\n")
+                            for repeat_path, repeat_id in repeats[sha256]:
+                                manifest.write(json.dumps({'id': repeat_id, 'path': repeat_path, 'sha256': sha256,
+                                                           'duplicate_of': path}) + "\n")
+                            manifest.flush()
+                        else:
+                            failures.append((path, error))
+
+                        elapsed = max(time.perf_counter() - start, 1e-6)
+                        print(f"\r  {uploaded + len(failures)}/{len(pending)} files, "
+                              f"{uploaded_bytes / 1024 / 1024:.1f} MB, "
+                              f"{uploaded / elapsed:.1f} files/s, "
+                              f"{uploaded_bytes / 1024 / 1024 / elapsed:.2f} MB/s, "
+                              f"{len(failures)} failed", end="", flush=True)
+
+                except KeyboardInterrupt:
+                    # stop starting uploads, but record the ones in
+                    # flight so a resumed run does not send them again:
+                    interrupted = True
+                    print("\nInterrupted, finishing uploads in progress...")
+                    remaining = {future for future in remaining if not future.cancel()}
+
+        session.close()
+
+        if interrupted:
+            print(f"\n{uploaded} resumes uploaded; run again to upload the rest")
+            return
+
+        print()
+        print(f"{uploaded} resumes uploaded in {time.perf_counter() - start:.1f} s")
+        if failures:
+            print(f"{len(failures)} failed (run again to retry them):")
+            for path, error in failures[:10]:
+                print(f"  {path}: {error}")
+
+    except Exception as e:
+        logging.error("**ERROR: bulk_upload_resumes() failed:")
+        logging.error(e)
+        return
+
+
 ############################################################
 #
 # download_resume
 #
 def download_resume(baseurl):
     """
-    Downloads a resume file for a user
+    Downloads a resume file for a user, streaming it from S3 through a
+    presigned URL (or decoding it from the response if the service
+    returns it inline)
 
     Parameters
     ----------
@@ -421,21 +948,44 @@ def download_resume(baseurl):
             return
 
         # call the web service:
-        api = f'/resume/{userid}'
+        api = f'/resume/{quote(userid)}?mode=url'
         url = baseurl + api
 
         res = web_service_call(url)
-        # print('res file')
-        # print(res.json())
-        # res = res.json()
-        # print(res['resume_file'])
-        # print(res['file_content'])
+
+        # let's look at what we got back:
+        if res.status_code == 200: # success
+            pass
+        elif res.status_code == 404:
+            print(f"No resume found for user '{userid}'")
+            return
+        else:
+            # failed:
+            print("Failed with status code:", res.status_code)
+            print("url: " + url)
+            if res.status_code == 500:
+                # we'll have an error message
+                body = res.json()
+                print("Error message:", body)
+            return
 
         # if we get here, success! deserialize response:
         response_data = res.json()
         filename = response_data.get("filename", f"resume_user_{userid}.pdf")
+        output_filename = f"downloaded_{filename}"
+
+        if response_data.get("url"):
+            start = time.perf_counter()
+            size = stream_to_file(response_data["url"], output_filename)
+            if size is None:
+                return
+            elapsed = time.perf_counter() - start
+            print(f"Resume successfully downloaded and saved as '{output_filename}'")
+            print(f"{size / 1024:.0f} KB in {elapsed:.2f} s")
+            return
+
         datastr = response_data.get("file_content")
-        
+
         if not datastr:
             print("Error: No resume data in response")
             return
@@ -446,7 +996,6 @@ def download_resume(baseurl):
             decoded_bytes = base64.b64decode(base64_bytes)
             
             # Save to file
-            output_filename = f"downloaded_{filename}"
             with open(output_filename, "wb") as outfile:
                 outfile.write(decoded_bytes)
                 
@@ -461,6 +1010,272 @@ def download_resume(baseurl):
         return
 
 
+############################################################
+#
+# stream_to_file
+#
+def stream_to_file(url, output_filename, chunk_size=1024 * 1024):
+    """
+    Streams a URL to a file in chunks, writing to a .part file that
+    is renamed once complete, so a failed download leaves no partial
+    file under the final name
+
+    Parameters
+    ----------
+    url: URL to download, e.g. a presigned S3 GET
+    output_filename: file to save to
+    chunk_size: bytes read and written at a time
+
+    Returns
+    -------
+    number of bytes written, or None on failure
+    """
+
+    part_filename = output_filename + ".part"
+    size = 0
+
+    try:
+        with requests.get(url, stream=True, timeout=60) as response:
+            if response.status_code != 200:
+                print("Download from S3 failed with status code:", response.status_code)
+                return None
+
+            with open(part_filename, "wb") as outfile:
+                for chunk in response.iter_content(chunk_size=chunk_size):
+                    outfile.write(chunk)
+                    size += len(chunk)
+
+        os.replace(part_filename, output_filename)
+        return size
+
+    except Exception as e:
+        logging.error(f"stream_to_file() failed: {e}")
+        if os.path.exists(part_filename):
+            os.remove(part_filename)
+        return None
+
+
+############################################################
+#
+# search_users_by_skills
+#
+def search_users_by_skills(baseurl):
+    """
+    Finds users matching a boolean skill query, e.g.
+    python AND (aws OR gcp) AND NOT php
+
+    Parameters
+    ----------
+    baseurl: baseurl for web service
+
+    Returns
+    -------
+    nothing
+    """
+
+    try:
+        print("Enter the skill query (AND, OR, NOT, parentheses)>")
+        query = input()
+
+        if not query:
+            print("Skill query cannot be empty")
+            return
+
+        # call the web service:
+        api = f'/search/skills?q={quote(query)}'
+        url = baseurl + api
+
+        res = web_service_call(url)
+
+        # let's look at what we got back:
+        if res.status_code == 200: # success
+            pass
+        elif res.status_code == 400:
+            print("Invalid query:", res.json())
+            return
+        else:
+            # failed:
+            print("Failed with status code:", res.status_code)
+            print("url: " + url)
+            if res.status_code == 500:
+                # we'll have an error message
+                body = res.json()
+                print("Error message:", body)
+            return
+
+        # deserialize and extract users:
+        users = res.json()
+        if len(users) == 0:
+            print(f"No users match '{query}'")
+            return
+
+        print("\n--- MATCHING USER LIST ---")
+        for user in users:
+            print(f"  ID: {user[0]}")
+            print(f"  Full name: {user[1]} {user[2]}")
+            print(f"  Email: {user[3]}")
+            print(f"  Skills: {user[4]}")
+            print("-" * 20)
+
+    except Exception as e:
+        logging.error("**ERROR: search_users_by_skills() failed:")
+        logging.error(e)
+        return
+
+
+############################################################
+#
+# search_resumes
+#
+def search_resumes(baseurl):
+    """
+    Ranked full-text search over resume text, one page at a time
+
+    Parameters
+    ----------
+    baseurl: baseurl for web service
+
+    Returns
+    -------
+    nothing
+    """
+
+    try:
+        print("Enter search text (prefix words with + or - for boolean mode)>")
+        query = input()
+
+        if not query:
+            print("Search text cannot be empty")
+            return
+
+        mode = "boolean" if any(word[0] in "+-" for word in query.split()) else "natural"
+        page = 1
+
+        while True:
+            # call the web service:
+            api = f'/search?q={quote(query)}&mode={mode}&page={page}'
+            url = baseurl + api
+
+            res = web_service_call(url)
+
+            # let's look at what we got back:
+            if res.status_code == 200: # success
+                pass
+            elif res.status_code == 400:
+                print("Invalid search:", res.json())
+                return
+            else:
+                # failed:
+                print("Failed with status code:", res.status_code)
+                print("url: " + url)
+                if res.status_code == 500:
+                    # we'll have an error message
+                    body = res.json()
+                    print("Error message:", body)
+                return
+
+            # deserialize and extract results:
+            body = res.json()
+            results = body.get('results', [])
+            if page == 1 and len(results) == 0:
+                print(f"No resumes match '{query}'")
+                return
+
+            print(f"\n--- SEARCH RESULTS, PAGE {page} ---")
+            for result in results:
+                print(f"  ID: {result['userid']}  (score {result['score']})")
+                print(f"  Full name: {result['firstname']} {result['lastname']}")
+                print(f"  Email: {result['email']}")
+                print(f"  Skills: {result['skills']}")
+                print("-" * 20)
+
+            if not body.get('has_more'):
+                return
+
+            print("Press ENTER for the next page, or q to stop>")
+            if input().strip().lower() == 'q':
+                return
+            page = page + 1
+
+    except Exception as e:
+        logging.error("**ERROR: search_resumes() failed:")
+        logging.error(e)
+        return
+
+
+############################################################
+#
+# match_job_description
+#
+def match_job_description(baseurl):
+    """
+    Lists the resumes closest in meaning to a job description
+
+    Parameters
+    ----------
+    baseurl: baseurl for web service
+
+    Returns
+    -------
+    nothing
+    """
+
+    try:
+        print("Enter job description (end with an empty line)>")
+        lines = []
+        while True:
+            line = input()
+            if not line:
+                break
+            lines.append(line)
+        description = "\n".join(lines)
+
+        if not description:
+            print("Job description cannot be empty")
+            return
+
+        print("Number of matches (ENTER for 10)>")
+        k = input().strip() or "10"
+
+        # call the web service:
+        url = baseurl + '/match'
+        res = web_service_call(url, method="POST", json_data={"job_description": description, "k": int(k)})
+
+        # let's look at what we got back:
+        if res.status_code == 200: # success
+            pass
+        elif res.status_code == 400:
+            print("Invalid request:", res.json())
+            return
+        else:
+            # failed:
+            print("Failed with status code:", res.status_code)
+            print("url: " + url)
+            if res.status_code == 500:
+                # we'll have an error message
+                body = res.json()
+                print("Error message:", body)
+            return
+
+        matches = res.json()
+        if len(matches) == 0:
+            print("No resumes to match against")
+            return
+
+        print("\n--- CLOSEST RESUMES ---")
+        for match in matches:
+            print(f"  ID: {match['userid']}  (similarity {match['score']})")
+            print(f"  Full name: {match['firstname']} {match['lastname']}")
+            print(f"  Email: {match['email']}")
+            print(f"  Skills: {match['skills']}")
+            print("-" * 20)
+
+    except Exception as e:
+        logging.error("**ERROR: match_job_description() failed:")
+        logging.error(e)
+        return
+
+
 ############################################################
 # main
 #
@@ -525,6 +1340,14 @@ try:
             upload_resume(baseurl)
         elif cmd == 5:
             download_resume(baseurl)
+        elif cmd == 6:
+            search_users_by_skills(baseurl)
+        elif cmd == 7:
+            search_resumes(baseurl)
+        elif cmd == 8:
+            match_job_description(baseurl)
+        elif cmd == 9:
+            bulk_upload_resumes(baseurl)
         else:
             print("** Unknown command, try again...")
         #
@@ -0,0 +1,116 @@
+#
+# One-time migration: adds users.resume_sha256 (the SHA-256 of the
+# resume PDF, which proj05_resume_exists looks up) and its index, and
+# backfills it for existing users by streaming their resume_file from
+# S3. Safe to run again; users that already have a hash are skipped.
+#
+# Usage: python migrate_resume_hashes.py [batch_size]
+#
+
+import sys
+import os
+import hashlib
+import boto3
+import datatier
+
+from configparser import ConfigParser
+
+
+ADD_COLUMN = """
+  ALTER TABLE users
+    ADD COLUMN resume_sha256 CHAR(64) NULL,
+    ADD KEY idx_resume_sha256 (resume_sha256);
+  """
+
+HAS_COLUMN = """
+  SELECT COUNT(*) FROM information_schema.columns
+  WHERE table_schema = DATABASE() AND table_name = 'users' AND column_name = 'resume_sha256';
+  """
+
+
+def object_sha256(bucket, key, chunk_size=1024 * 1024):
+  """
+  Returns the hex SHA-256 of an S3 object, read in chunks
+  """
+  digest = hashlib.sha256()
+  body = bucket.Object(key).get()['Body']
+  for chunk in body.iter_chunks(chunk_size):
+    digest.update(chunk)
+  return digest.hexdigest()
+
+
+def backfill(dbConn, bucket, batch_size):
+  """
+  Walks the users without a hash in userid order, batch_size rows at
+  a time, and stores the hash of each one's resume file
+
+  Returns
+  -------
+  (number of users hashed, number of users whose file could not be read)
+  """
+  last_userid = ''
+  hashed = 0
+  missing = 0
+
+  while True:
+    sql = """
+      SELECT userid, resume_file FROM users
+      WHERE userid > %s AND resume_sha256 IS NULL
+      ORDER BY userid
+      LIMIT %s;
+      """
+    rows = datatier.retrieve_all_rows(dbConn, sql, [last_userid, batch_size])
+    if not rows:
+      break
+
+    updates = []
+    for userid, resume_file in rows:
+      if not resume_file:
+        continue
+      try:
+        updates.append((object_sha256(bucket, resume_file), userid))
+      except Exception as err:
+        print(f"  {userid}: cannot read '{resume_file}': {err}")
+        missing += 1
+
+    if updates:
+      datatier.perform_many(dbConn, "UPDATE users SET resume_sha256 = %s WHERE userid = %s;", updates)
+
+    hashed += len(updates)
+    last_userid = rows[-1][0]
+    print(f"  {hashed} users hashed")
+
+  return hashed, missing
+
+
+if __name__ == "__main__":
+  batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+
+  config_file = 'resumeapp-config.ini'
+  os.environ['AWS_SHARED_CREDENTIALS_FILE'] = config_file
+
+  configur = ConfigParser()
+  configur.read(config_file)
+
+  rds_endpoint = configur.get('rds', 'endpoint')
+  rds_portnum = int(configur.get('rds', 'port_number'))
+  rds_username = configur.get('rds', 'user_name')
+  rds_pwd = configur.get('rds', 'user_pwd')
+  rds_dbname = configur.get('rds', 'db_name')
+
+  boto3.setup_default_session(profile_name='s3readonly')
+  endpoint_url = configur.get('s3', 'endpoint_url', fallback='') or None
+  bucket = boto3.resource('s3', endpoint_url=endpoint_url).Bucket(configur.get('s3', 'bucket_name'))
+
+  dbConn = datatier.get_dbConn(rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname)
+
+  row = datatier.retrieve_one_row(dbConn, HAS_COLUMN)
+  if not row or row[0] == 0:
+    print("**Adding users.resume_sha256**")
+    datatier.perform_action(dbConn, ADD_COLUMN)
+
+  print("**Backfilling resume hashes**")
+  hashed, missing = backfill(dbConn, bucket, batch_size)
+
+  print(f"**DONE: {hashed} users hashed, {missing} resume files not found**")
+  dbConn.close()
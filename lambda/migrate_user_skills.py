@@ -0,0 +1,103 @@
+#
+# One-time migration: creates the normalized user_skills table and
+# backfills it from the comma-joined users.skills column. Safe to run
+# again; existing (userid, skill_norm) pairs are left alone.
+#
+# Usage: python migrate_user_skills.py [batch_size]
+#
+
+import sys
+import os
+import datatier
+import skillnorm
+import resultcache
+
+from configparser import ConfigParser
+
+
+CREATE_USER_SKILLS = """
+  CREATE TABLE IF NOT EXISTS user_skills
+  (
+    id          BIGINT not null AUTO_INCREMENT,
+    userid      VARCHAR(64) not null,
+    skill_norm  VARCHAR(128) not null,
+    PRIMARY KEY (id),
+    UNIQUE      KEY uq_user_skill (userid, skill_norm),
+    KEY         idx_skill_user (skill_norm, userid)
+  );
+  """
+
+
+def backfill(dbConn, batch_size):
+  """
+  Walks the users table in userid order, batch_size rows at a time,
+  and inserts the normalized skills of each user
+
+  Returns
+  -------
+  (number of users read, number of user_skills rows inserted)
+  """
+  last_userid = ''
+  users = 0
+  inserted = 0
+
+  while True:
+    sql = """
+      SELECT userid, skills FROM users
+      WHERE userid > %s
+      ORDER BY userid
+      LIMIT %s;
+      """
+    rows = datatier.retrieve_all_rows(dbConn, sql, [last_userid, batch_size])
+    if not rows:
+      break
+
+    pairs = []
+    for userid, skills in rows:
+      for skill_norm in skillnorm.split_skills(skills):
+        pairs.append((userid, skill_norm))
+
+    if pairs:
+      inserted += datatier.perform_many(
+        dbConn,
+        "INSERT IGNORE INTO user_skills (userid, skill_norm) VALUES (%s, %s);",
+        pairs)
+
+    users += len(rows)
+    last_userid = rows[-1][0]
+    print(f"  {users} users processed, {inserted} skill rows inserted")
+
+  # cached skill lookups were answered from the old rows:
+  with datatier.transaction(dbConn) as dbCursor:
+    resultcache.bump_version(dbCursor)
+
+  return users, inserted
+
+
+if __name__ == "__main__":
+  batch_size = int(sys.argv[1]) if len(sys.argv) > 1 else 1000
+
+  config_file = 'resumeapp-config.ini'
+  os.environ['AWS_SHARED_CREDENTIALS_FILE'] = config_file
+
+  configur = ConfigParser()
+  configur.read(config_file)
+
+  rds_endpoint = configur.get('rds', 'endpoint')
+  rds_portnum = int(configur.get('rds', 'port_number'))
+  rds_username = configur.get('rds', 'user_name')
+  rds_pwd = configur.get('rds', 'user_pwd')
+  rds_dbname = configur.get('rds', 'db_name')
+
+  dbConn = datatier.get_dbConn(rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname)
+
+  print("**Creating user_skills table**")
+  datatier.perform_action(dbConn, CREATE_USER_SKILLS)
+
+  print("**Backfilling user_skills from users.skills**")
+  users, inserted = backfill(dbConn, batch_size)
+
+  resultcache.publish_version(resultcache.make_shared_tier(configur))
+
+  print(f"**DONE: {users} users, {inserted} rows inserted**")
+  dbConn.close()
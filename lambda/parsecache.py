@@ -0,0 +1,167 @@
+#
+# parsecache.py
+#
+# Content-addressed cache of parse results. A resume is identified by
+# the SHA-256 of its PDF bytes, so re-uploading the same file under a
+# new S3 key skips text extraction and the Bedrock call entirely. The
+# key also includes the prompt version and model id, so changing
+# either one naturally invalidates old entries.
+#
+# Backends are pluggable: MySQL in production, SQLite or in-memory for
+# local runs.
+#
+
+import json
+import hashlib
+import sqlite3
+import threading
+
+
+def content_hash(pdf_bytes):
+    """
+    Returns the hex SHA-256 digest of the given bytes
+    """
+    return hashlib.sha256(pdf_bytes).hexdigest()
+
+
+###################################################################
+#
+# backends: each stores (resume_text, parsed_json) under a
+# (content_sha256, prompt_version, model_id) key
+#
+class MemoryBackend:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key):
+        with self._lock:
+            return self._entries.get(key)
+
+    def put(self, key, resume_text, parsed_json):
+        with self._lock:
+            self._entries[key] = (resume_text, parsed_json)
+
+
+class SQLiteBackend:
+    def __init__(self, path=':memory:'):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS parse_cache (
+                content_sha256 TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                model_id       TEXT NOT NULL,
+                resume_text    TEXT,
+                parsed_json    TEXT,
+                PRIMARY KEY (content_sha256, prompt_version, model_id)
+            )
+        """)
+        self._conn.commit()
+
+    def get(self, key):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT resume_text, parsed_json FROM parse_cache "
+                "WHERE content_sha256 = ? AND prompt_version = ? AND model_id = ?",
+                key).fetchone()
+        return tuple(row) if row else None
+
+    def put(self, key, resume_text, parsed_json):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO parse_cache "
+                "(content_sha256, prompt_version, model_id, resume_text, parsed_json) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (*key, resume_text, parsed_json))
+            self._conn.commit()
+
+
+class MySQLBackend:
+    """
+    Stores entries in the parse_cache table (see setup-instructions.md).
+    connection_factory is a context manager factory yielding a pymysql
+    connection, e.g. ResourceRegistry.db_connection.
+    """
+
+    def __init__(self, connection_factory):
+        self._connection_factory = connection_factory
+
+    def get(self, key):
+        with self._connection_factory() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    "SELECT resume_text, parsed_json FROM parse_cache "
+                    "WHERE content_sha256 = %s AND prompt_version = %s AND model_id = %s;",
+                    key)
+                row = cursor.fetchone()
+            # end the read snapshot so later lookups see new rows:
+            connection.commit()
+        return tuple(row) if row else None
+
+    def put(self, key, resume_text, parsed_json):
+        with self._connection_factory() as connection:
+            try:
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "INSERT INTO parse_cache "
+                        "(content_sha256, prompt_version, model_id, resume_text, parsed_json) "
+                        "VALUES (%s, %s, %s, %s, %s) "
+                        "ON DUPLICATE KEY UPDATE resume_text=VALUES(resume_text), parsed_json=VALUES(parsed_json);",
+                        (*key, resume_text, parsed_json))
+                connection.commit()
+            except Exception:
+                connection.rollback()
+                raise
+
+
+###################################################################
+#
+# ParseCache
+#
+class ParseCache:
+    """
+    Front end over a backend that serializes the parsed response and
+    keeps hit/miss counters. Backend errors are logged and treated as
+    misses, so a cache outage never fails a parse.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'errors': 0}
+
+    def get(self, sha256, prompt_version, model_id):
+        """
+        Returns (resume_text, parsed_dict) on a hit, None on a miss
+        """
+        try:
+            entry = self.backend.get((sha256, prompt_version, model_id))
+        except Exception as err:
+            print("parsecache.get() failed:", str(err))
+            entry = None
+            self._count('errors')
+
+        if entry is None:
+            self._count('misses')
+            return None
+
+        self._count('hits')
+        resume_text, parsed_json = entry
+        return resume_text, json.loads(parsed_json)
+
+    def put(self, sha256, prompt_version, model_id, resume_text, parsed):
+        try:
+            self.backend.put((sha256, prompt_version, model_id), resume_text, json.dumps(parsed))
+        except Exception as err:
+            print("parsecache.put() failed:", str(err))
+            self._count('errors')
+
+    def hit_rate(self):
+        with self._lock:
+            lookups = self.stats['hits'] + self.stats['misses']
+            return self.stats['hits'] / lookups if lookups else 0.0
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
@@ -0,0 +1,241 @@
+#
+# pdftext.py
+#
+# Bounded-memory PDF ingestion: S3 objects are spooled to a
+# size-capped temporary file (memory first, disk beyond the cap) while
+# being hashed, and page text is produced lazily by a generator so
+# extraction can stop early once a page cap or character budget is
+# reached.
+#
+# Large PDFs can also be extracted page-parallel on a process pool,
+# each worker opening its own PdfReader over the same buffer. That
+# buffer holds the whole PDF in memory, so this path is opt-in; the
+# serial generator is the default.
+#
+
+import os
+import hashlib
+from io import BytesIO
+from tempfile import SpooledTemporaryFile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+
+from pypdf import PdfReader
+
+
+DEFAULT_CHUNK_SIZE = 256 * 1024
+
+
+def spool_s3_object(s3, bucket_name, file_key, max_memory_bytes, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Streams an S3 object into a SpooledTemporaryFile, computing its
+    SHA-256 on the way
+
+    Parameters
+    ----------
+    s3 : boto3 S3 client,
+    bucket_name : bucket holding the object (string),
+    file_key : object key (string),
+    max_memory_bytes : size above which the spool rolls over to disk,
+    chunk_size : bytes read from the response body at a time
+
+    Returns
+    -------
+    (spooled file positioned at 0, hex sha256 digest)
+    """
+    response = s3.get_object(Bucket=bucket_name, Key=file_key)
+    body = response['Body']
+
+    spool = SpooledTemporaryFile(max_size=max_memory_bytes)
+    digest = hashlib.sha256()
+    try:
+        for chunk in body.iter_chunks(chunk_size):
+            digest.update(chunk)
+            spool.write(chunk)
+    except Exception:
+        spool.close()
+        raise
+    finally:
+        body.close()
+
+    spool.seek(0)
+    return spool, digest.hexdigest()
+
+
+def _limit_chars(page_texts, max_chars):
+    """
+    Drops empty pages and stops once max_chars characters have been
+    yielded, cutting the last page to fit the budget
+    """
+    remaining = max_chars
+    for pageno, page_text in enumerate(page_texts):
+        if not page_text:
+            continue
+
+        if remaining is not None:
+            if len(page_text) >= remaining:
+                print(f'pdftext: character budget of {max_chars} reached on page {pageno + 1}')
+                yield page_text[:remaining]
+                return
+            remaining -= len(page_text)
+
+        yield page_text
+
+
+def _iter_raw_pages(reader, max_pages):
+    for pageno, page in enumerate(reader.pages):
+        if max_pages is not None and pageno >= max_pages:
+            print(f'pdftext: page cap of {max_pages} reached, skipping remaining pages')
+            return
+        yield page.extract_text()
+
+
+def _open_reader(source):
+    if isinstance(source, (bytes, bytearray)):
+        source = BytesIO(source)
+    return PdfReader(source)
+
+
+def iter_page_text(source, max_pages=None, max_chars=None):
+    """
+    Yields the text of each non-empty page, in order. Stops after
+    max_pages pages, or once max_chars characters have been yielded
+    (the last page is cut to fit the budget).
+
+    source may be bytes or a binary file object.
+    """
+    reader = _open_reader(source)
+    yield from _limit_chars(_iter_raw_pages(reader, max_pages), max_chars)
+
+
+def join_pages(pages):
+    """
+    Joins page texts into one string, one newline-terminated block per
+    page
+    """
+    return "".join(page_text + "\n" for page_text in pages)
+
+
+def extract_pdf_text(source, max_pages=None, max_chars=None):
+    """
+    Returns the text of the PDF, one newline-terminated block per page
+    """
+    return join_pages(iter_page_text(source, max_pages, max_chars))
+
+
+###################################################################
+#
+# page-parallel extraction
+#
+
+# the PDF buffer, set once per worker process by _init_worker:
+_worker_pdf_bytes = None
+
+
+def _init_worker(pdf_bytes):
+    global _worker_pdf_bytes
+    _worker_pdf_bytes = pdf_bytes
+
+
+def _extract_page_range(page_range):
+    start, stop = page_range
+    reader = PdfReader(BytesIO(_worker_pdf_bytes))
+    return [reader.pages[pageno].extract_text() for pageno in range(start, stop)]
+
+
+def _split_pages(num_pages, num_chunks):
+    """
+    Splits [0, num_pages) into at most num_chunks contiguous ranges
+    """
+    size, extra = divmod(num_pages, num_chunks)
+    ranges = []
+    start = 0
+    for i in range(num_chunks):
+        stop = start + size + (1 if i < extra else 0)
+        if stop > start:
+            ranges.append((start, stop))
+        start = stop
+    return ranges
+
+
+def _iter_ranges_parallel(pdf_bytes, ranges, workers, max_chars):
+    """
+    Yields the page texts of the ranges, in order, with at most workers
+    ranges in flight; no further range is started once max_chars
+    characters have been extracted
+    """
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(pdf_bytes,)) as pool:
+        pending = list(ranges)
+        in_flight = []
+        chars = 0
+        try:
+            while pending or in_flight:
+                while pending and len(in_flight) < workers and (max_chars is None or chars < max_chars):
+                    in_flight.append(pool.submit(_extract_page_range, pending.pop(0)))
+                if not in_flight:
+                    return
+                # ranges complete in any order, but are yielded in order:
+                if not in_flight[0].done():
+                    wait(in_flight, return_when=FIRST_COMPLETED)
+                    continue
+                for page_text in in_flight.pop(0).result():
+                    chars += len(page_text or '')
+                    yield page_text
+        finally:
+            for future in in_flight:
+                future.cancel()
+
+
+def extract_pdf_pages_parallel(source, max_pages=None, max_chars=None, workers=None, min_pages=16):
+    """
+    Like iter_page_text, but splits the pages across a process pool
+    when the PDF has at least min_pages pages. Smaller PDFs, or
+    environments where a process pool cannot be created (AWS Lambda
+    has no /dev/shm), are extracted serially. Page order is preserved.
+
+    The pages are split into 2 ranges per worker (each range re-opens
+    the PDF, so few large ranges), and no further range is started
+    once max_chars characters have been extracted. The whole PDF is
+    read into memory for the workers.
+
+    Parameters
+    ----------
+    source : bytes or binary file object,
+    max_pages : page cap (or None),
+    max_chars : character budget (or None),
+    workers : number of worker processes (default: CPU count),
+    min_pages : page count below which extraction stays serial
+
+    Returns
+    -------
+    list with the text of each non-empty page, in order
+    """
+    workers = workers or os.cpu_count() or 1
+
+    reader = _open_reader(source)
+    num_pages = len(reader.pages)
+    if max_pages is not None:
+        num_pages = min(num_pages, max_pages)
+
+    if workers < 2 or num_pages < min_pages:
+        return list(_limit_chars(_iter_raw_pages(reader, max_pages), max_chars))
+
+    if isinstance(source, (bytes, bytearray)):
+        pdf_bytes = bytes(source)
+    else:
+        source.seek(0)
+        pdf_bytes = source.read()
+
+    ranges = _split_pages(num_pages, min(num_pages, workers * 2))
+    try:
+        return list(_limit_chars(_iter_ranges_parallel(pdf_bytes, ranges, workers, max_chars), max_chars))
+    except (OSError, NotImplementedError) as err:
+        print('pdftext: process pool unavailable, extracting serially:', str(err))
+        return list(_limit_chars(_iter_raw_pages(reader, max_pages), max_chars))
+
+
+def extract_pdf_text_parallel(source, max_pages=None, max_chars=None, workers=None, min_pages=16):
+    """
+    Returns the text of the PDF extracted by extract_pdf_pages_parallel,
+    one newline-terminated block per page
+    """
+    return join_pages(extract_pdf_pages_parallel(source, max_pages, max_chars, workers, min_pages))
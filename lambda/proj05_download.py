@@ -1,3 +1,14 @@
+#
+# Returns a user's resume, in one of two modes:
+#
+#   GET /resume/{userid}             the PDF, base64 in the JSON body
+#   GET /resume/{userid}?mode=url    a short-lived presigned GET URL,
+#                                    which the client streams from S3
+#
+# The url mode keeps the PDF out of Lambda memory and API Gateway's
+# payload limit; the URL expires after [download] presign_expires_secs.
+#
+
 import json
 import boto3
 import os
@@ -26,9 +37,11 @@ def lambda_handler(event, context):
         boto3.setup_default_session(profile_name=s3_profile)
 
         bucketname = configur.get('s3', 'bucket_name')
+        endpoint_url = configur.get('s3', 'endpoint_url', fallback='') or None
+
+        s3 = boto3.client('s3', endpoint_url=endpoint_url)
 
-        s3 = boto3.resource('s3')
-        bucket = s3.Bucket(bucketname)
+        expires_secs = configur.getint('download', 'presign_expires_secs', fallback=60)
 
         #
         # configure for RDS access
@@ -52,7 +65,20 @@ def lambda_handler(event, context):
         else:
             raise Exception("requires userid parameter in event")
 
+        #
+        # mode from event or query string: inline (default) or url
+        #
+        params = event.get("queryStringParameters") or {}
+        mode = event.get("mode") or params.get("mode") or "inline"
+
+        if mode not in ["inline", "url"]:
+            return {
+                'statusCode': 400,
+                'body': json.dumps("mode must be inline or url")
+            }
+
         print("userid:", userid)
+        print("mode:", mode)
 
         #
         # open connection to the database:
@@ -79,25 +105,42 @@ def lambda_handler(event, context):
         resume_key = row[0]
         print("Resume file key:", resume_key)
 
-        #
-        # Download the resume file from S3:
-        #
-        local_filename = "/tmp/resume.pdf"
+        if mode == "url":
+            #
+            # Presign a GET for the client to stream the file from S3:
+            #
+            print("**Presigning download**")
 
-        print("**Downloading resume from S3**")
-        print(f"**file : {resume_key}**")
+            url = s3.generate_presigned_url(
+                'get_object',
+                Params={
+                    'Bucket': bucketname,
+                    'Key': resume_key,
+                    'ResponseContentDisposition': f'attachment; filename="{resume_key}"'
+                },
+                ExpiresIn=expires_secs
+            )
 
-        bucket.download_file(resume_key, local_filename)
+            print("**DONE, returning presigned URL**")
+
+            return {
+                'statusCode': 200,
+                'body': json.dumps({'resume_file': resume_key, 'url': url, 'expires_in': expires_secs}),
+                'headers': {'Content-Type': 'application/json'}
+            }
 
         #
-        # Read the file and encode it as base64:
+        # Read the resume from S3 into memory and encode it as base64:
         #
-        with open(local_filename, "rb") as infile:
-            file_bytes = infile.read()
-            file_base64 = base64.b64encode(file_bytes).decode('utf-8')
+        print("**Downloading resume from S3**")
+        print(f"**file : {resume_key}**")
+
+        response = s3.get_object(Bucket=bucketname, Key=resume_key)
+        file_bytes = response['Body'].read()
+        file_base64 = base64.b64encode(file_bytes).decode('utf-8')
 
         print("**DONE, returning resume**")
-        print(f"**resume : {file_base64[:200]}**")
+        print(f"**resume : {len(file_bytes)} bytes**")
 
         return {
             'statusCode': 200,
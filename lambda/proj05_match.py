@@ -0,0 +1,163 @@
+#
+# Matches a job description to the closest resumes by meaning rather
+# than by keywords:
+#
+#   POST /match   {"job_description": "...", "k": 10}
+#
+# The description is embedded with the same local embedding the parse
+# Lambda stores in resume_vectors (see semanticindex.py), and compared
+# to every resume vector (or, past [semantic] ivf_min_rows resumes, to
+# those in the closest IVF partitions). The vector index is kept by
+# warm containers and refreshed incrementally on every call.
+#
+
+import json
+import boto3
+import os
+import time
+import datatier
+import semanticindex
+
+from configparser import ConfigParser
+
+MAX_K = 100
+
+# built on the first call, kept by warm containers:
+embedder = None
+index = None
+ivf_size = 0
+
+def lambda_handler(event, context):
+  global embedder, index, ivf_size
+
+  try:
+    print("**STARTING**")
+    print("**lambda: proj05_match**")
+
+    #
+    # setup AWS based on config file:
+    #
+    config_file = 'resumeapp-config.ini'
+    os.environ['AWS_SHARED_CREDENTIALS_FILE'] = config_file
+
+    configur = ConfigParser()
+    configur.read(config_file)
+
+    #
+    # configure for RDS access
+    #
+    rds_endpoint = configur.get('rds', 'endpoint')
+    rds_portnum = int(configur.get('rds', 'port_number'))
+    rds_username = configur.get('rds', 'user_name')
+    rds_pwd = configur.get('rds', 'user_pwd')
+    rds_dbname = configur.get('rds', 'db_name')
+
+    ivf_min_rows = configur.getint('semantic', 'ivf_min_rows', fallback=20000)
+    nlist = configur.getint('semantic', 'nlist', fallback=0)
+    nprobe = configur.getint('semantic', 'nprobe', fallback=8)
+    snapshot_path = configur.get('semantic', 'snapshot_path', fallback='')
+
+    #
+    # job description and k from the body (POST), the event or the
+    # query string:
+    #
+    if "body" in event and event["body"]:
+      body = json.loads(event["body"])
+    else:
+      body = event
+    params = event.get("queryStringParameters") or {}
+    description = body.get("job_description", params.get("q"))
+    k = str(body.get("k", params.get("k", 10)))
+
+    if not description:
+      raise Exception("requires job_description in the body, event or q query parameter")
+
+    if not k.isdigit() or not 1 <= int(k) <= MAX_K:
+      return {
+        'statusCode': 400,
+        'body': json.dumps(f"k must be between 1 and {MAX_K}")
+      }
+
+    k = int(k)
+
+    if embedder is None:
+      embedder = semanticindex.load_embedder(configur)
+      index = semanticindex.VectorIndex(embedder.dim, embedder.model_id)
+      if snapshot_path and os.path.exists(snapshot_path + '.npy'):
+        # memory-mapped; only used if made by the same embedder
+        snapshot = semanticindex.VectorIndex.load(snapshot_path)
+        if snapshot.model_id == embedder.model_id:
+          print("**Loaded index snapshot", snapshot_path, "**")
+          index = snapshot
+
+    print("**Opening connection**")
+
+    dbConn = datatier.get_dbConn(rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname)
+
+    #
+    # bring the index up to date, (re)partition it once it is large
+    # enough, then answer from memory:
+    #
+    start = time.perf_counter()
+    applied = index.refresh(dbConn, embedder.model_id)
+    if len(index) >= ivf_min_rows and (index.centroids is None or len(index) > 2 * ivf_size):
+      index.build_ivf(nlist or int(len(index) ** 0.5))
+      ivf_size = len(index)
+      print(f"IVF built: {len(index.lists)} lists")
+    refresh_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    query = embedder.embed(description)
+    matches = index.search(query, k, nprobe if index.centroids is not None else None)
+    query_ms = (time.perf_counter() - start) * 1000
+
+    print(f"index: {len(index)} resumes, {applied} vectors applied in {refresh_ms:.1f} ms")
+    print(f"query: top {len(matches)} in {query_ms:.2f} ms")
+
+    if not matches:
+      return {
+        'statusCode': 200,
+        'body': json.dumps([])
+      }
+
+    print("**Retrieving data**")
+
+    userids = [userid for userid, _ in matches]
+    placeholders = ", ".join(["%s"] * len(userids))
+    sql = f"""
+      select userid, firstname, lastname, email, skills
+      from users
+      where userid in ({placeholders});
+      """
+
+    rows = datatier.retrieve_all_rows(dbConn, sql, userids)
+    by_userid = {row[0]: row for row in rows}
+
+    results = []
+    for userid, score in matches:
+      row = by_userid.get(userid)
+      if row:
+        results.append({
+          'userid': row[0],
+          'firstname': row[1],
+          'lastname': row[2],
+          'email': row[3],
+          'skills': row[4],
+          'score': round(score, 4)
+        })
+
+    print("**DONE, returning matches**")
+
+    return {
+      'statusCode': 200,
+      'body': json.dumps(results)
+    }
+
+  except Exception as err:
+    print("**ERROR**")
+    print(str(err))
+
+    return {
+      'statusCode': 500,
+      'body': json.dumps(str(err))
+    }
@@ -0,0 +1,115 @@
+#
+# Returns a presigned S3 POST for uploading one resume straight to the
+# bucket, so the PDF never passes through API Gateway or Lambda:
+#
+#   POST /resume/presign   {"filename": "cv.pdf", "size": 123456}
+#
+# The POST policy pins the object key, the content type and the allowed
+# size ([upload] max_mb), and expires after [upload] presign_expires_secs.
+# The bucket's event notification then queues the new object for
+# parsing, as for uploads through proj05_upload.
+#
+# Set [s3] endpoint_url to presign against a local S3 stand-in.
+#
+
+import json
+import boto3
+import os
+import uuid
+from configparser import ConfigParser
+
+def lambda_handler(event, context):
+    try:
+        print("**STARTING**")
+        print("**lambda: resume_presign_upload**")
+
+        # Setup AWS based on config file
+        config_file = 'resumeapp-config.ini'
+        os.environ['AWS_SHARED_CREDENTIALS_FILE'] = config_file
+
+        configur = ConfigParser()
+        configur.read(config_file)
+
+        # Configure for S3 access
+        s3_profile = 's3readwrite'
+        boto3.setup_default_session(profile_name=s3_profile)
+
+        bucketname = configur.get('s3', 'bucket_name')
+        endpoint_url = configur.get('s3', 'endpoint_url', fallback='') or None
+
+        max_bytes = int(configur.getfloat('upload', 'max_mb', fallback=20) * 1024 * 1024)
+        expires_secs = configur.getint('upload', 'presign_expires_secs', fallback=300)
+
+        # Extract filename and size from the body (proxy) or the event
+        print("**Accessing request body**")
+
+        if "body" in event and event["body"]:
+            body = json.loads(event["body"])
+        else:
+            body = event
+
+        if "filename" not in body:
+            raise Exception("event has a body but no filename")
+
+        filename = body["filename"]
+        size = body.get("size")
+
+        print("filename:", filename)
+        print("size:", size)
+
+        if not filename.lower().endswith(".pdf"):
+            return {
+                'statusCode': 400,
+                'body': json.dumps("only PDF resumes can be uploaded")
+            }
+
+        if size is not None and (not str(size).isdigit() or not 0 < int(size) <= max_bytes):
+            return {
+                'statusCode': 400,
+                'body': json.dumps(f"resume size must be between 1 and {max_bytes} bytes")
+            }
+
+        # Presign the POST; S3 rejects anything outside the policy
+        print("**Presigning upload**")
+
+        s3 = boto3.client('s3', endpoint_url=endpoint_url)
+
+        bucketkey = str(uuid.uuid4()) + ".pdf"
+
+        presigned = s3.generate_presigned_post(
+            bucketname,
+            bucketkey,
+            Fields={
+                'acl': 'public-read',
+                'Content-Type': 'application/pdf'
+            },
+            Conditions=[
+                {'acl': 'public-read'},
+                {'Content-Type': 'application/pdf'},
+                ['content-length-range', 1, max_bytes]
+            ],
+            ExpiresIn=expires_secs
+        )
+
+        print("bucketkey:", bucketkey)
+        print("**DONE, returning presigned POST**")
+
+        return {
+            'statusCode': 200,
+            'body': json.dumps({
+                'url': presigned['url'],
+                'fields': presigned['fields'],
+                'key': bucketkey,
+                'max_bytes': max_bytes,
+                'expires_in': expires_secs
+            })
+        }
+
+    except Exception as err:
+        print("**ERROR**")
+        print(str(err))
+
+        return {
+            'statusCode': 500,
+            'body': json.dumps(str(err))
+        }
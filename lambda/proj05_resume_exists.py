@@ -0,0 +1,90 @@
+#
+# Tells a client which resume contents are already stored, so that it
+# can skip uploading (and re-parsing) identical PDFs:
+#
+#   GET /resume/exists?sha256=<hex>[,<hex>...]
+#
+# returns {"existing": {<sha256>: <userid>, ...}} for the given SHA-256
+# digests of PDF contents that a user's resume has, looked up through
+# the index on users.resume_sha256 (set by the parse Lambda).
+#
+
+import json
+import boto3
+import os
+import re
+import datatier
+
+from configparser import ConfigParser
+
+MAX_HASHES = 100
+SHA256_RE = re.compile(r'^[0-9a-f]{64}$')
+
+def lambda_handler(event, context):
+  try:
+    print("**STARTING**")
+    print("**lambda: proj05_resume_exists**")
+
+    #
+    # setup AWS based on config file:
+    #
+    config_file = 'resumeapp-config.ini'
+    os.environ['AWS_SHARED_CREDENTIALS_FILE'] = config_file
+
+    configur = ConfigParser()
+    configur.read(config_file)
+
+    #
+    # configure for RDS access
+    #
+    rds_endpoint = configur.get('rds', 'endpoint')
+    rds_portnum = int(configur.get('rds', 'port_number'))
+    rds_username = configur.get('rds', 'user_name')
+    rds_pwd = configur.get('rds', 'user_pwd')
+    rds_dbname = configur.get('rds', 'db_name')
+
+    #
+    # hashes from the event or the query string:
+    #
+    params = event.get("queryStringParameters") or {}
+    hashes = event.get("sha256") or params.get("sha256")
+
+    if not hashes:
+      raise Exception("requires sha256 parameter in event or query string")
+
+    hashes = list(dict.fromkeys(h.strip().lower() for h in hashes.split(",") if h.strip()))
+    print("hashes:", len(hashes))
+
+    if len(hashes) > MAX_HASHES or not all(SHA256_RE.match(h) for h in hashes):
+      return {
+        'statusCode': 400,
+        'body': json.dumps(f"sha256 must be 1 to {MAX_HASHES} comma-separated hex SHA-256 digests")
+      }
+
+    print("**Opening connection**")
+
+    dbConn = datatier.get_dbConn(rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname)
+
+    print("**Retrieving data**")
+
+    placeholders = ", ".join(["%s"] * len(hashes))
+    sql = f"SELECT resume_sha256, userid FROM users WHERE resume_sha256 IN ({placeholders});"
+
+    rows = datatier.retrieve_all_rows(dbConn, sql, hashes)
+    existing = {row[0]: row[1] for row in rows}
+
+    print(f"**DONE, {len(existing)} of {len(hashes)} exist**")
+
+    return {
+      'statusCode': 200,
+      'body': json.dumps({'existing': existing})
+    }
+
+  except Exception as err:
+    print("**ERROR**")
+    print(str(err))
+
+    return {
+      'statusCode': 500,
+      'body': json.dumps(str(err))
+    }
@@ -0,0 +1,115 @@
+#
+# Full-text search over the stored resume text:
+#
+#   GET /search?q=...&mode=natural|boolean&page=1&page_size=20
+#
+# Returns ranked users with relevance scores. In production this uses
+# the FULLTEXT index on users.resume_text; with [search] backend =
+# sqlite it ranks a local SQLite copy with the pure-Python BM25 engine.
+#
+
+import json
+import boto3
+import os
+import sqlite3
+import datatier
+import fulltext
+
+from configparser import ConfigParser
+
+MAX_PAGE_SIZE = 100
+
+# BM25 engine for the sqlite backend, kept by warm containers:
+bm25_engine = None
+
+def lambda_handler(event, context):
+  global bm25_engine
+
+  try:
+    print("**STARTING**")
+    print("**lambda: proj05_search**")
+
+    #
+    # setup AWS based on config file:
+    #
+    config_file = 'resumeapp-config.ini'
+    os.environ['AWS_SHARED_CREDENTIALS_FILE'] = config_file
+
+    configur = ConfigParser()
+    configur.read(config_file)
+
+    backend = configur.get('search', 'backend', fallback='mysql')
+
+    #
+    # query and paging from event: could be parameters or part of the
+    # query string
+    #
+    params = event.get("queryStringParameters") or {}
+    query = event.get("q", params.get("q"))
+    mode = event.get("mode", params.get("mode", "natural"))
+
+    try:
+      page = int(event.get("page", params.get("page", 1)))
+      page_size = int(event.get("page_size", params.get("page_size", 20)))
+      valid = mode in fulltext.MODES and page >= 1 and 1 <= page_size <= MAX_PAGE_SIZE
+    except (TypeError, ValueError):
+      valid = False
+
+    if not query:
+      raise Exception("requires q parameter in event or queryStringParameters")
+
+    if not valid:
+      return {
+        'statusCode': 400,
+        'body': json.dumps(f"mode must be one of {sorted(fulltext.MODES)}, page >= 1 and page_size between 1 and {MAX_PAGE_SIZE}")
+      }
+
+    print("query:", query, "mode:", mode, "page:", page, "page_size:", page_size)
+
+    if backend == 'sqlite':
+      if bm25_engine is None:
+        sqlite_path = configur.get('search', 'sqlite_path')
+        print("**Building BM25 index from", sqlite_path, "**")
+        dbConn = sqlite3.connect(sqlite_path)
+        bm25_engine = fulltext.BM25Search().load(dbConn)
+        dbConn.close()
+      engine = bm25_engine
+    else:
+      #
+      # configure for RDS access
+      #
+      rds_endpoint = configur.get('rds', 'endpoint')
+      rds_portnum = int(configur.get('rds', 'port_number'))
+      rds_username = configur.get('rds', 'user_name')
+      rds_pwd = configur.get('rds', 'user_pwd')
+      rds_dbname = configur.get('rds', 'db_name')
+
+      print("**Opening connection**")
+
+      dbConn = datatier.get_dbConn(rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname)
+      engine = fulltext.MySQLFulltextSearch(dbConn)
+
+    print("**Searching**")
+
+    results, has_more = engine.search(query, mode, limit=page_size, offset=(page - 1) * page_size)
+
+    print(f"**DONE, returning {len(results)} results**")
+
+    return {
+      'statusCode': 200,
+      'body': json.dumps({
+        'results': results,
+        'page': page,
+        'page_size': page_size,
+        'has_more': has_more
+      })
+    }
+
+  except Exception as err:
+    print("**ERROR**")
+    print(str(err))
+
+    return {
+      'statusCode': 500,
+      'body': json.dumps(str(err))
+    }
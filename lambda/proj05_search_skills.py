@@ -0,0 +1,130 @@
+#
+# Returns the users matching a boolean skill query, e.g.
+#
+#   GET /search/skills?q=python AND (aws OR gcp) AND NOT php
+#
+# The query is answered from an in-process inverted index over the
+# user_skills table, which is kept across warm invocations and
+# refreshed incrementally on every call.
+#
+
+import json
+import boto3
+import os
+import time
+import datatier
+import skillindex
+
+from configparser import ConfigParser
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+# built on the first call, kept by warm containers:
+index = skillindex.SkillIndex()
+
+def lambda_handler(event, context):
+  try:
+    print("**STARTING**")
+    print("**lambda: proj05_search_skills**")
+
+    #
+    # setup AWS based on config file:
+    #
+    config_file = 'resumeapp-config.ini'
+    os.environ['AWS_SHARED_CREDENTIALS_FILE'] = config_file
+
+    configur = ConfigParser()
+    configur.read(config_file)
+
+    #
+    # configure for RDS access
+    #
+    rds_endpoint = configur.get('rds', 'endpoint')
+    rds_portnum = int(configur.get('rds', 'port_number'))
+    rds_username = configur.get('rds', 'user_name')
+    rds_pwd = configur.get('rds', 'user_pwd')
+    rds_dbname = configur.get('rds', 'db_name')
+
+    #
+    # query and limit from event: could be parameters or part of the
+    # query string; an empty limit means the default
+    #
+    params = event.get("queryStringParameters") or {}
+    query = event.get("q", params.get("q"))
+
+    if not query:
+      raise Exception("requires q parameter in event or queryStringParameters")
+
+    try:
+      limit = int(event.get("limit") or params.get("limit") or DEFAULT_LIMIT)
+      if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+    except ValueError as err:
+      return {
+        'statusCode': 400,
+        'body': json.dumps(str(err))
+      }
+
+    print("query:", query)
+
+    try:
+      tree = skillindex.parse_query(query)
+    except skillindex.QueryError as err:
+      return {
+        'statusCode': 400,
+        'body': json.dumps(f"invalid query: {err}")
+      }
+
+    print("**Opening connection**")
+
+    dbConn = datatier.get_dbConn(rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname)
+
+    #
+    # bring the index up to date, then answer from memory:
+    #
+    start = time.perf_counter()
+    applied = index.refresh(dbConn)
+    refresh_ms = (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    matches = index.evaluate(tree)
+    userids = index.userids_of(matches, limit)
+    query_ms = (time.perf_counter() - start) * 1000
+
+    print(f"index: {len(index.userids)} users, {len(index.postings)} skills, {applied} rows applied in {refresh_ms:.1f} ms")
+    print(f"query matched {skillindex.bitmap_count(matches)} users in {query_ms:.3f} ms")
+
+    if not userids:
+      return {
+        'statusCode': 200,
+        'body': json.dumps([])
+      }
+
+    print("**Retrieving data**")
+
+    placeholders = ", ".join(["%s"] * len(userids))
+    sql = f"""
+      select userid, firstname, lastname, email, skills
+      from users
+      where userid in ({placeholders})
+      order by userid asc;
+      """
+
+    rows = datatier.retrieve_all_rows(dbConn, sql, userids)
+
+    print("**DONE, returning rows**")
+
+    return {
+      'statusCode': 200,
+      'body': json.dumps(rows)
+    }
+
+  except Exception as err:
+    print("**ERROR**")
+    print(str(err))
+
+    return {
+      'statusCode': 500,
+      'body': json.dumps(str(err))
+    }
@@ -7,10 +7,16 @@ import json
 import boto3
 import os
 import datatier
+import resultcache
 
 from configparser import ConfigParser
 
+# built on the first call, kept by warm containers:
+result_cache = None
+
 def lambda_handler(event, context):
+  global result_cache
+
   try:
     print("**STARTING**")
     print("**lambda: proj05_skills**")
@@ -32,6 +38,9 @@ def lambda_handler(event, context):
     rds_username = configur.get('rds', 'user_name')
     rds_pwd = configur.get('rds', 'user_pwd')
     rds_dbname = configur.get('rds', 'db_name')
+
+    if result_cache is None:
+      result_cache = resultcache.from_config(configur, 'skills')
     
     
     if "userid" in event:
@@ -48,26 +57,35 @@ def lambda_handler(event, context):
 
 
     #
-    # open connection to the database:
+    # the connection is only opened if the cache needs it:
     #
-    print("**Opening connection**")
-    
-    dbConn = datatier.get_dbConn(rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname)
-    
+    dbConn = None
+
+    def get_dbConn():
+      nonlocal dbConn
+      if dbConn is None:
+        print("**Opening connection**")
+        dbConn = datatier.get_dbConn(rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname)
+      return dbConn
+
     #
-    # now retrieve all the users:
+    # now retrieve the user's skills, from the cache if this
+    # version of the data has been read before:
     #
     print("**Retrieving data**")
 
-    #
     sql = "SELECT skills FROM users WHERE userid = %s;"
 
-    
-    rows = datatier.retrieve_all_rows(dbConn, sql, [userid])
-    
+    version = result_cache.version(get_dbConn)
+    rows = result_cache.get_or_load(
+      userid, version,
+      lambda: datatier.retrieve_all_rows(get_dbConn(), sql, [userid]))
+
     for row in rows:
       print(row)
 
+    print("cache:", result_cache.snapshot(), f"hit rate {result_cache.hit_rate():.1%}")
+
     print("**DONE, returning rows**")
     
     return {
@@ -1,12 +1,65 @@
+#
+# Uploads a resume sent base64-encoded in a JSON body to S3:
+#
+#   POST /resume/upload   {"filename": "cv.pdf", "data": "<base64>"}
+#
+# The decoded PDF is uploaded from memory, never through a file in
+# /tmp, so overlapping requests in one container cannot overwrite each
+# other's file. Resumes of at least [upload] multipart_threshold_mb go
+# up as an S3 multipart upload with parts sent in parallel.
+#
+# (Clients that can should prefer the presigned flow, see
+# proj05_presign_upload.py.)
+#
+
+import io
 import json
 import boto3
 import os
 import uuid
 import base64
-import pathlib
 import datatier
+from boto3.s3.transfer import TransferConfig
 from configparser import ConfigParser
 
+MB = 1024 * 1024
+
+
+def transfer_config_from(configur):
+    """
+    Returns the TransferConfig for uploads, from the [upload] section
+    """
+    return TransferConfig(
+        multipart_threshold=int(configur.getfloat('upload', 'multipart_threshold_mb', fallback=8) * MB),
+        multipart_chunksize=int(configur.getfloat('upload', 'multipart_chunksize_mb', fallback=8) * MB),
+        max_concurrency=configur.getint('upload', 'max_concurrency', fallback=4),
+        use_threads=True
+    )
+
+
+def upload_bytes(bucket, bucketkey, file_bytes, transfer_config, extra_args):
+    """
+    Uploads a PDF held in memory: a single put_object below the
+    multipart threshold, otherwise a multipart upload of
+    multipart_chunksize parts, max_concurrency of them at a time
+
+    Returns
+    -------
+    "put" or "multipart"
+    """
+    if len(file_bytes) < transfer_config.multipart_threshold:
+        bucket.put_object(Key=bucketkey, Body=file_bytes, **extra_args)
+        return "put"
+
+    bucket.upload_fileobj(
+        io.BytesIO(file_bytes),
+        bucketkey,
+        ExtraArgs=extra_args,
+        Config=transfer_config
+    )
+    return "multipart"
+
+
 def lambda_handler(event, context):
     try:
         print("**STARTING**")
@@ -24,8 +77,9 @@ def lambda_handler(event, context):
         boto3.setup_default_session(profile_name=s3_profile)
         
         bucketname = configur.get('s3', 'bucket_name')
+        endpoint_url = configur.get('s3', 'endpoint_url', fallback='') or None
         
-        s3 = boto3.resource('s3')
+        s3 = boto3.resource('s3', endpoint_url=endpoint_url)
         bucket = s3.Bucket(bucketname)
         
         # Extract userid from event
@@ -50,28 +104,25 @@ def lambda_handler(event, context):
         print("filename:", filename)
         print("datastr (first 10 chars):", datastr[0:10])
 
-        # Prepare the file for upload
-        base64_bytes = datastr.encode()
-        file_bytes = base64.b64decode(base64_bytes)
-        
-        local_filename = "/tmp/resume.pdf"
-        
-        bucketkey = str(uuid.uuid4()) + ".pdf"        
-        # bucketkey = "resume-nu-cs310/" + str(uuid.uuid4()) + ".pdf"        
-        with open(local_filename, "wb") as f:
-            f.write(file_bytes)
-        
+        # Decode the file in memory
+        file_bytes = base64.b64decode(datastr)
+
+        bucketkey = str(uuid.uuid4()) + ".pdf"
+
         print("**Uploading to S3**")
-        
-        bucket.upload_file(
-        local_filename, 
-        bucketkey, 
-        ExtraArgs={
-            'ACL': 'public-read',
-            'ContentType': 'application/pdf'
-        }
-    )
-        
+
+        method = upload_bytes(
+            bucket,
+            bucketkey,
+            file_bytes,
+            transfer_config_from(configur),
+            {
+                'ACL': 'public-read',
+                'ContentType': 'application/pdf'
+            }
+        )
+
+        print(f"uploaded {len(file_bytes)} bytes ({method}) as {bucketkey}")
         print("**DONE, returning success**")
         
         return {
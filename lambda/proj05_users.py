@@ -1,29 +1,91 @@
 #
-# Retrieves and returns all the users in the 
-# BenfordApp database.
+# Retrieves and returns one page of the users in the
+# BenfordApp database:
+#
+#   GET /users?limit=100&cursor=...&include=resume_text
+#
+# Pages are keyset-paginated on userid: the response carries an
+# opaque next_cursor, which is passed back to get the following
+# page (null on the last page). resume_text is only returned when
+# asked for with include=resume_text.
 #
 
 import json
 import boto3
 import os
+import base64
+import binascii
 import datatier
 
 from configparser import ConfigParser
 
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+# userid, email, lastname, firstname, bucketfolder, skills, resume_file
+# keep the positions of the old SELECT * so clients indexing rows by
+# position keep working; resume_text is appended when requested
+USER_COLUMNS = ['userid', 'email', 'lastname', 'firstname', 'bucketfolder', 'skills', 'resume_file']
+
+
+class CursorError(ValueError):
+  pass
+
+
+def encode_cursor(userid):
+  """
+  Encodes the last userid of a page as an opaque cursor string
+
+  Parameters
+  ----------
+  userid : last userid on the page
+
+  Returns
+  -------
+  url-safe cursor string
+  """
+  raw = json.dumps({'after': userid}).encode()
+  return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+  """
+  Decodes a cursor made by encode_cursor, raising CursorError if
+  it is malformed
+
+  Parameters
+  ----------
+  cursor : cursor string from a previous response
+
+  Returns
+  -------
+  the userid to continue after
+  """
+  try:
+    raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+    after = json.loads(raw)['after']
+  except (binascii.Error, ValueError, KeyError, TypeError):
+    raise CursorError("malformed cursor")
+
+  if not isinstance(after, str):
+    raise CursorError("malformed cursor")
+  return after
+
+
 def lambda_handler(event, context):
   try:
     print("**STARTING**")
     print("**lambda: proj05_users**")
-    
+
     #
     # setup AWS based on config file:
     #
     config_file = 'resumeapp-config.ini'
     os.environ['AWS_SHARED_CREDENTIALS_FILE'] = config_file
-    
+
     configur = ConfigParser()
     configur.read(config_file)
-    
+
     #
     # configure for RDS access
     #
@@ -33,42 +95,75 @@ def lambda_handler(event, context):
     rds_pwd = configur.get('rds', 'user_pwd')
     rds_dbname = configur.get('rds', 'db_name')
 
+    #
+    # paging from event: could be parameters or part of the
+    # query string; empty values mean the default
+    #
+    params = event.get("queryStringParameters") or {}
+    cursor = event.get("cursor") or params.get("cursor")
+    include = event.get("include") or params.get("include") or ""
+
+    try:
+      limit = int(event.get("limit") or params.get("limit") or DEFAULT_LIMIT)
+      if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+      after = decode_cursor(cursor) if cursor else ""
+    except ValueError as err:
+      return {
+        'statusCode': 400,
+        'body': json.dumps(str(err))
+      }
+
+    columns = list(USER_COLUMNS)
+    if 'resume_text' in include.split(','):
+      columns.append('resume_text')
+
+    print("limit:", limit, "after:", repr(after), "columns:", columns)
+
     #
     # open connection to the database:
     #
     print("**Opening connection**")
-    
+
     dbConn = datatier.get_dbConn(rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname)
-    
+
     #
-    # now retrieve all the users:
+    # now retrieve one page of users; one extra row tells us
+    # whether there is a next page:
     #
     print("**Retrieving data**")
 
+    sql = f"""
+      SELECT {", ".join(columns)}
+      FROM users
+      WHERE userid > %s
+      ORDER BY userid
+      LIMIT %s;
+      """
 
-    #
-    sql = "SELECT * FROM users ORDER BY userid;";
-    
-    rows = datatier.retrieve_all_rows(dbConn, sql)
-    
-    for row in rows:
-      print(row)
+    rows = datatier.retrieve_all_rows(dbConn, sql, [after, limit + 1])
+
+    users = rows[:limit]
+    next_cursor = encode_cursor(users[-1][0]) if len(rows) > limit else None
 
     #
     # respond in an HTTP-like way, i.e. with a status
     # code and body in JSON format:
     #
-    print("**DONE, returning rows**")
-    
+    print(f"**DONE, returning {len(users)} rows**")
+
     return {
       'statusCode': 200,
-      'body': json.dumps(rows)
+      'body': json.dumps({
+        'users': users,
+        'next_cursor': next_cursor
+      })
     }
-    
+
   except Exception as err:
     print("**ERROR**")
     print(str(err))
-    
+
     return {
       'statusCode': 500,
       'body': json.dumps(str(err))
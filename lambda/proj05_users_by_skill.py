@@ -1,16 +1,43 @@
 #
-# Retrieves and returns all the users in the 
-# BenfordApp database.
+# Retrieves and returns the users with a given skill:
+#
+#   GET /skill/{skill_name}/users[?fuzzy=true]
+#
+# When no user has the skill, responds 404 with "did you mean"
+# suggestions from the skill vocabulary (typo-tolerant, see
+# fuzzyskill.py); with fuzzy=true it answers with the users of the
+# closest suggestion instead, naming it in the X-Matched-Skill header.
 #
 
 import json
 import boto3
 import os
 import datatier
+import resultcache
+import skillnorm
+import fuzzyskill
 
 from configparser import ConfigParser
 
+# built on the first call, kept by warm containers; the vocabulary
+# index is rebuilt when the data version changes:
+result_cache = None
+vocabulary_index = None
+vocabulary_version = None
+
+def get_vocabulary_index(version, get_dbConn):
+  global vocabulary_index, vocabulary_version
+
+  if vocabulary_index is None or vocabulary_version != version:
+    vocabulary = fuzzyskill.load_vocabulary(get_dbConn())
+    vocabulary_index = fuzzyskill.TrigramIndex(vocabulary)
+    vocabulary_version = version
+    print(f"vocabulary index built: {len(vocabulary_index)} skills")
+  return vocabulary_index
+
 def lambda_handler(event, context):
+  global result_cache
+
   try:
     print("**STARTING**")
     print("**lambda: proj05_users_by_skill**")
@@ -32,6 +59,9 @@ def lambda_handler(event, context):
     rds_username = configur.get('rds', 'user_name')
     rds_pwd = configur.get('rds', 'user_pwd')
     rds_dbname = configur.get('rds', 'db_name')
+
+    if result_cache is None:
+      result_cache = resultcache.from_config(configur, 'users_by_skill')
     
     
     if "skill_name" in event:
@@ -43,25 +73,80 @@ def lambda_handler(event, context):
         raise Exception("requires skill_name parameter in pathParameters")
     else:
         raise Exception("requires skill_name parameter in event")
-        
-    print("**Opening connection**")
-    
-    dbConn = datatier.get_dbConn(rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname)
-    
+
+    params = event.get("queryStringParameters") or {}
+    fuzzy = str(event.get("fuzzy", params.get("fuzzy", "false"))).lower() in ("1", "true", "yes")
+
+    #
+    # the connection is only opened if the cache needs it:
+    #
+    dbConn = None
+
+    def get_dbConn():
+      nonlocal dbConn
+      if dbConn is None:
+        print("**Opening connection**")
+        dbConn = datatier.get_dbConn(rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname)
+      return dbConn
+
     print("**Retrieving data**")
 
     #
-    sql = "select distinct userid, firstname, lastname, email, skills from users where lower(skills) like lower(%s)  order by userid asc;"
-    
-    rows = datatier.retrieve_all_rows(dbConn, sql, parameters=[f"%{skill_name}%"])
-    
+    # exact match on the canonical skill id, through the
+    # (skill_norm, userid) index of user_skills; cached per
+    # version of the data:
+    #
+    sql = """
+      select u.userid, u.firstname, u.lastname, u.email, u.skills
+      from user_skills s
+      join users u on u.userid = s.userid
+      where s.skill_norm = %s
+      order by u.userid asc;
+      """
+
+    skill_norm = skillnorm.canonical_id(skill_name)
+
+    def users_with(skill_norm):
+      return result_cache.get_or_load(
+        skill_norm, version,
+        lambda: datatier.retrieve_all_rows(get_dbConn(), sql, parameters=[skill_norm]))
+
+    version = result_cache.version(get_dbConn)
+    rows = users_with(skill_norm)
+    headers = {}
+
+    if not rows:
+      #
+      # no exact match: look for close spellings in the skill
+      # vocabulary
+      #
+      index = get_vocabulary_index(version, get_dbConn)
+      suggestions = index.suggest(skill_norm)
+      print("no exact match, suggestions:", suggestions)
+
+      if not (fuzzy and suggestions):
+        return {
+          'statusCode': 404,
+          'body': json.dumps({
+            'message': f"no users with skill '{skill_name}'",
+            'suggestions': suggestions
+          })
+        }
+
+      skill_norm = suggestions[0]['skill']
+      rows = users_with(skill_norm)
+      headers['X-Matched-Skill'] = skill_norm
+
     for row in rows:
       print(row)
 
+    print("cache:", result_cache.snapshot(), f"hit rate {result_cache.hit_rate():.1%}")
+
     print("**DONE, returning rows**")
-    
+
     return {
       'statusCode': 200,
+      'headers': headers,
       'body': json.dumps(rows)
     }
     
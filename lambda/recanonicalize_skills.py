@@ -0,0 +1,109 @@
+#
+# Batch job: rewrites the skills of existing users in canonical form
+# (see skillnorm.py), i.e. users.skills becomes the distinct canonical
+# names and user_skills holds their canonical ids. Run it after
+# changing SKILL_SYNONYMS; safe to run again, unchanged users are
+# rewritten to the same rows. Names that only came from a synonym
+# since retired (skillnorm.RETIRED_SYNONYMS) go back to the spelling
+# in the user's resume text.
+#
+# Usage: python recanonicalize_skills.py [--dry-run] [batch_size]
+#
+
+import sys
+import os
+import datatier
+import skillnorm
+import resultcache
+
+from configparser import ConfigParser
+
+
+def recanonicalize(dbConn, batch_size, dry_run=False):
+  """
+  Walks the users table in userid order, batch_size rows at a time,
+  and rewrites each batch's skills in one transaction
+
+  Returns
+  -------
+  (number of users read, number of users whose skills string changed)
+  """
+  last_userid = ''
+  users = 0
+  changed = 0
+
+  while True:
+    sql = """
+      SELECT userid, skills, resume_text FROM users
+      WHERE userid > %s
+      ORDER BY userid
+      LIMIT %s;
+      """
+    rows = datatier.retrieve_all_rows(dbConn, sql, [last_userid, batch_size])
+    if not rows:
+      break
+
+    updates = []
+    pairs = []
+    for userid, skills, resume_text in rows:
+      canonical = skillnorm.canonicalize_skills(skillnorm.restore_retired(
+        skillnorm.canonicalize_skills(skills), resume_text))
+      new_skills = ", ".join(canonical)
+      if new_skills != (skills or ''):
+        updates.append((new_skills, userid))
+        if dry_run:
+          print(f"  {userid}: '{skills}' -> '{new_skills}'")
+      for name in canonical:
+        pairs.append((userid, skillnorm.normalize_skill(name)))
+
+    if not dry_run:
+      userids = [row[0] for row in rows]
+      placeholders = ", ".join(["%s"] * len(userids))
+      with datatier.transaction(dbConn) as dbCursor:
+        if updates:
+          dbCursor.executemany("UPDATE users SET skills = %s WHERE userid = %s;", updates)
+        dbCursor.execute(f"DELETE FROM user_skills WHERE userid IN ({placeholders});", userids)
+        if pairs:
+          dbCursor.executemany("INSERT IGNORE INTO user_skills (userid, skill_norm) VALUES (%s, %s);", pairs)
+
+    users += len(rows)
+    changed += len(updates)
+    last_userid = rows[-1][0]
+    print(f"  {users} users processed, {changed} changed")
+
+  if not dry_run:
+    # cached search results are stale now:
+    with datatier.transaction(dbConn) as dbCursor:
+      resultcache.bump_version(dbCursor)
+
+  return users, changed
+
+
+if __name__ == "__main__":
+  args = sys.argv[1:]
+  dry_run = '--dry-run' in args
+  args = [arg for arg in args if arg != '--dry-run']
+  batch_size = int(args[0]) if args else 500
+
+  config_file = 'resumeapp-config.ini'
+  os.environ['AWS_SHARED_CREDENTIALS_FILE'] = config_file
+
+  configur = ConfigParser()
+  configur.read(config_file)
+
+  rds_endpoint = configur.get('rds', 'endpoint')
+  rds_portnum = int(configur.get('rds', 'port_number'))
+  rds_username = configur.get('rds', 'user_name')
+  rds_pwd = configur.get('rds', 'user_pwd')
+  rds_dbname = configur.get('rds', 'db_name')
+
+  dbConn = datatier.get_dbConn(rds_endpoint, rds_portnum, rds_username, rds_pwd, rds_dbname)
+
+  print("**Re-canonicalizing skills**" + (" (dry run)" if dry_run else ""))
+  users, changed = recanonicalize(dbConn, batch_size, dry_run)
+
+  if not dry_run:
+    resultcache.publish_version(resultcache.make_shared_tier(configur))
+
+  print(f"**DONE: {users} users, {changed} skills strings changed**")
+  dbConn.close()
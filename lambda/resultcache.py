@@ -0,0 +1,289 @@
+#
+# resultcache.py
+#
+# Read-through cache for the read-only endpoints (proj05_skills,
+# proj05_users_by_skill). Two tiers:
+#
+#   - LocalCache: TTL + LRU, per warm container,
+#   - an optional shared tier behind a small get/set interface, so
+#     containers share results: RedisSharedTier in production,
+#     MemorySharedTier as an in-process stand-in for local runs.
+#
+# Entries are keyed by a data version that the parse Lambda changes
+# whenever it writes users, so a fresh parse is visible on the very
+# next call; old entries are never read again and age out. The
+# version lives in the cache_meta table and, when a shared tier is
+# configured, in the shared tier too, so that cache hits need no
+# database round trip at all. Without a shared tier, each container
+# remembers the version it read for version_ttl_secs (a few seconds),
+# so a burst of hits opens no connection either; a new parse then
+# shows up within that bound.
+#
+
+import json
+import time
+import uuid
+import threading
+
+from collections import OrderedDict
+
+
+VERSION_NAME = 'users'
+SHARED_VERSION_KEY = 'version:' + VERSION_NAME
+
+
+###################################################################
+#
+# LocalCache
+#
+class LocalCache:
+    """
+    Thread-safe LRU cache whose entries expire ttl_secs after they
+    are stored
+    """
+
+    def __init__(self, max_entries=1024, ttl_secs=300, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl_secs = ttl_secs
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self.stats = {'evictions': 0, 'expirations': 0}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if self._clock() >= expires_at:
+                del self._entries[key]
+                self.stats['expirations'] += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._entries[key] = (self._clock() + self.ttl_secs, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.stats['evictions'] += 1
+
+    def __len__(self):
+        return len(self._entries)
+
+
+###################################################################
+#
+# shared tiers: get(key) -> value or None, set(key, value, ttl_secs)
+# where ttl_secs=None means no expiry. Values are JSON-compatible.
+#
+class MemorySharedTier:
+    def __init__(self, clock=time.monotonic):
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, raw = entry
+            if expires_at is not None and self._clock() >= expires_at:
+                del self._entries[key]
+                return None
+            # stored serialized, like a real shared tier:
+            return json.loads(raw)
+
+    def set(self, key, value, ttl_secs=None):
+        expires_at = None if ttl_secs is None else self._clock() + ttl_secs
+        with self._lock:
+            self._entries[key] = (expires_at, json.dumps(value))
+
+
+class RedisSharedTier:
+    """
+    Shared tier on Redis (e.g. ElastiCache). Needs the redis package
+    deployed with the Lambda.
+    """
+
+    def __init__(self, url, prefix='resumeapp:'):
+        try:
+            import redis
+        except ImportError:
+            raise Exception("[cache] shared = redis requires the redis package")
+        self._client = redis.Redis.from_url(url, socket_timeout=0.5)
+        self._prefix = prefix
+
+    def get(self, key):
+        raw = self._client.get(self._prefix + key)
+        return None if raw is None else json.loads(raw)
+
+    def set(self, key, value, ttl_secs=None):
+        self._client.set(self._prefix + key, json.dumps(value), ex=ttl_secs)
+
+
+def make_shared_tier(configur):
+    """
+    Returns the shared tier configured in the [cache] section, or None
+    """
+    kind = configur.get('cache', 'shared', fallback='none')
+    if kind == 'none':
+        return None
+    if kind == 'memory':
+        return MemorySharedTier()
+    if kind == 'redis':
+        return RedisSharedTier(configur.get('cache', 'redis_url'))
+    raise Exception(f"unknown [cache] shared tier '{kind}'")
+
+
+###################################################################
+#
+# data version
+#
+def read_version(dbConn):
+    """
+    Returns the users data version from cache_meta (0 if unset)
+    """
+    dbCursor = dbConn.cursor()
+    try:
+        dbCursor.execute("SELECT version FROM cache_meta WHERE name = %s;", [VERSION_NAME])
+        row = dbCursor.fetchone()
+        return row[0] if row else 0
+    finally:
+        dbCursor.close()
+
+
+def bump_version(dbCursor):
+    """
+    Changes the users data version; run it in the transaction that
+    writes the users so readers can't see the new version early
+    """
+    dbCursor.execute(
+        "INSERT INTO cache_meta (name, version) VALUES (%s, 1) "
+        "ON DUPLICATE KEY UPDATE version = version + 1;",
+        [VERSION_NAME])
+
+
+def publish_version(shared):
+    """
+    Gives the shared tier a new version token; call it after the
+    transaction that bumped cache_meta has committed
+    """
+    if shared is None:
+        return
+    try:
+        shared.set(SHARED_VERSION_KEY, uuid.uuid4().hex)
+    except Exception as err:
+        # the write itself succeeded; stale shared entries still
+        # expire after their TTL
+        print("**WARNING: shared cache version publish failed:", str(err))
+
+
+###################################################################
+#
+# ResultCache
+#
+class ResultCache:
+    """
+    Read-through cache over LocalCache and an optional shared tier.
+    Shared-tier errors are counted and treated as misses, so the
+    endpoints keep answering from the database if it is down.
+    """
+
+    def __init__(self, namespace, local, shared=None, shared_ttl_secs=None, version_ttl_secs=5):
+        self.namespace = namespace
+        self.local = local
+        self.shared = shared
+        self.shared_ttl_secs = shared_ttl_secs or local.ttl_secs
+        # the version read from cache_meta, reused for version_ttl_secs:
+        self._versions = LocalCache(max_entries=1, ttl_secs=version_ttl_secs, clock=local._clock)
+        self._lock = threading.Lock()
+        self.stats = {'local_hits': 0, 'shared_hits': 0, 'misses': 0, 'shared_errors': 0, 'version_reads': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self.stats[name] += 1
+
+    def version(self, db_factory):
+        """
+        Returns the current data version: from the shared tier when
+        there is one, else from cache_meta, read at most once per
+        version_ttl_secs. db_factory() returns a database connection
+        and is only called when needed.
+        """
+        if self.shared is not None:
+            try:
+                token = self.shared.get(SHARED_VERSION_KEY)
+                if token is None:
+                    # lost (eviction, flush): a new token can only
+                    # cause misses, never stale hits
+                    token = uuid.uuid4().hex
+                    self.shared.set(SHARED_VERSION_KEY, token)
+                return 's' + token
+            except Exception as err:
+                print("**WARNING: shared cache version lookup failed:", str(err))
+                self._count('shared_errors')
+
+        version = self._versions.get(VERSION_NAME)
+        if version is None:
+            self._count('version_reads')
+            version = 'd' + str(read_version(db_factory()))
+            self._versions.put(VERSION_NAME, version)
+        return version
+
+    def get_or_load(self, key, version, loader):
+        """
+        Returns the cached value of key at the given version, calling
+        loader() and caching its (JSON-compatible) result on a miss
+        """
+        full_key = f"{self.namespace}:{version}:{key}"
+
+        value = self.local.get(full_key)
+        if value is not None:
+            self._count('local_hits')
+            return value
+
+        if self.shared is not None:
+            try:
+                value = self.shared.get(full_key)
+            except Exception as err:
+                print("**WARNING: shared cache get failed:", str(err))
+                self._count('shared_errors')
+            if value is not None:
+                self._count('shared_hits')
+                self.local.put(full_key, value)
+                return value
+
+        self._count('misses')
+        value = loader()
+        self.local.put(full_key, value)
+        if self.shared is not None:
+            try:
+                self.shared.set(full_key, value, self.shared_ttl_secs)
+            except Exception as err:
+                print("**WARNING: shared cache set failed:", str(err))
+                self._count('shared_errors')
+        return value
+
+    def hit_rate(self):
+        hits = self.stats['local_hits'] + self.stats['shared_hits']
+        total = hits + self.stats['misses']
+        return hits / total if total else 0.0
+
+    def snapshot(self):
+        return {**self.stats, **self.local.stats, 'entries': len(self.local)}
+
+
+def from_config(configur, namespace):
+    """
+    Builds a ResultCache from the [cache] section of the config
+    """
+    local = LocalCache(
+        max_entries=configur.getint('cache', 'max_entries', fallback=1024),
+        ttl_secs=configur.getint('cache', 'ttl_secs', fallback=300))
+    return ResultCache(namespace, local, make_shared_tier(configur),
+                       version_ttl_secs=configur.getint('cache', 'version_ttl_secs', fallback=5))
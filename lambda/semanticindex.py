@@ -0,0 +1,299 @@
+#
+# semanticindex.py
+#
+# Local, CPU-only semantic matching of job descriptions to resumes.
+#
+# Embedding (HashedEmbedder): resume text is tokenized like the
+# full-text search (fulltext.tokenize), unigrams and bigrams are
+# weighted by sublinear TF times IDF, and projected to dim dimensions
+# with a sparse random projection: every feature is hashed (blake2b, so
+# it is stable across processes) to `spread` signed coordinates. The
+# result is L2-normalized, so a dot product is the cosine similarity.
+# IDF comes from a table over hashed feature buckets (fit_idf), built
+# from the corpus by build_semantic_index.py; without it every feature
+# weighs the same. Same text + same IDF table = same vector.
+#
+# Index (VectorIndex): a float32 matrix with one row per user, which
+# can be saved as .npy and memory-mapped back, answering top-k cosine
+# queries with one matrix-vector product. build_ivf() optionally
+# partitions the rows with spherical k-means, so that a query only
+# scores the rows of the nprobe closest partitions.
+#
+# Vectors are written to the resume_vectors table by the parse Lambda
+# and loaded incrementally (by seq) by proj05_match.
+#
+
+import json
+import math
+import hashlib
+
+import numpy as np
+
+import datatier
+import fulltext
+
+
+DEFAULT_DIM = 256
+DEFAULT_SPREAD = 4
+IDF_BUCKETS = 1 << 18
+
+
+###################################################################
+#
+# embedding
+#
+def features(text):
+    """
+    Returns {feature: term frequency} over the unigrams and bigrams of
+    a text
+    """
+    tokens = fulltext.tokenize(text)
+    counts = {}
+    for token in tokens:
+        counts[token] = counts.get(token, 0) + 1
+    for first, second in zip(tokens, tokens[1:]):
+        bigram = first + ' ' + second
+        counts[bigram] = counts.get(bigram, 0) + 1
+    return counts
+
+
+def fit_idf(texts, buckets=IDF_BUCKETS):
+    """
+    Returns a float32 IDF table over hashed feature buckets, computed
+    from an iterable of document texts
+    """
+    df = np.zeros(buckets, dtype=np.int64)
+    documents = 0
+    for text in texts:
+        documents += 1
+        seen = {HashedEmbedder.bucket_of(feature, buckets) for feature in features(text)}
+        df[list(seen)] += 1
+    return (np.log((1 + documents) / (1 + df)) + 1).astype(np.float32)
+
+
+class HashedEmbedder:
+    def __init__(self, dim=DEFAULT_DIM, spread=DEFAULT_SPREAD, idf=None):
+        self.dim = dim
+        self.spread = spread
+        self.idf = idf
+        self._projections = {}   # feature -> (coordinates, signs)
+
+        idf_digest = hashlib.sha256(idf.tobytes()).hexdigest()[:8] if idf is not None else 'noidf'
+        self.model_id = f"hashproj-d{dim}-s{spread}-{idf_digest}"
+
+    @staticmethod
+    def bucket_of(feature, buckets=IDF_BUCKETS):
+        digest = hashlib.blake2b(feature.encode(), digest_size=4, person=b'idf').digest()
+        return int.from_bytes(digest, 'little') % buckets
+
+    def _projection(self, feature):
+        # (coordinates, signed weights) of a feature, with the IDF
+        # and projection scale folded into the weights
+        projection = self._projections.get(feature)
+        if projection is None:
+            digest = hashlib.blake2b(feature.encode(), digest_size=4 * self.spread, person=b'proj').digest()
+            weight = 1 / math.sqrt(self.spread)
+            if self.idf is not None:
+                weight *= float(self.idf[self.bucket_of(feature, len(self.idf))])
+            coordinates = []
+            weights = []
+            for i in range(self.spread):
+                value = int.from_bytes(digest[4 * i:4 * i + 4], 'little')
+                coordinates.append((value >> 1) % self.dim)
+                weights.append(weight if value & 1 else -weight)
+            projection = (coordinates, weights)
+            if len(self._projections) < 500000:
+                self._projections[feature] = projection
+        return projection
+
+    def embed(self, text):
+        """
+        Returns the unit-length float32 embedding of a text (all zeros
+        if the text has no tokens)
+        """
+        coordinates = []
+        weights = []
+        for feature, tf in features(text).items():
+            tf_weight = 1 + math.log(tf)
+            feature_coordinates, feature_weights = self._projection(feature)
+            coordinates.extend(feature_coordinates)
+            weights.extend(weight * tf_weight for weight in feature_weights)
+
+        vector = np.bincount(coordinates, weights=weights, minlength=self.dim).astype(np.float32) \
+            if coordinates else np.zeros(self.dim, dtype=np.float32)
+
+        norm = np.linalg.norm(vector)
+        if norm > 0:
+            vector /= norm
+        return vector
+
+
+def load_embedder(configur):
+    """
+    Builds the embedder from the [semantic] section of the config
+    """
+    idf_path = configur.get('semantic', 'idf_path', fallback='')
+    idf = np.load(idf_path) if idf_path else None
+    return HashedEmbedder(
+        dim=configur.getint('semantic', 'dim', fallback=DEFAULT_DIM),
+        spread=configur.getint('semantic', 'spread', fallback=DEFAULT_SPREAD),
+        idf=idf)
+
+
+###################################################################
+#
+# VectorIndex
+#
+class VectorIndex:
+    """
+    Rows of a float32 matrix, one per userid. Rows are updated in
+    place when a user's vector changes. The matrix grows by doubling;
+    only the first len(self) rows are live.
+    """
+
+    def __init__(self, dim=DEFAULT_DIM, model_id=None):
+        self.dim = dim
+        self.model_id = model_id  # embedder the vectors came from
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+        self.userids = []
+        self.rows = {}            # userid -> row number
+        self.high_water_mark = 0  # largest resume_vectors.seq applied
+        self.centroids = None     # IVF, see build_ivf
+        self.lists = None         # list number -> row numbers
+
+    def __len__(self):
+        return len(self.userids)
+
+    def _ensure_capacity(self, rows):
+        if rows <= self.matrix.shape[0] and self.matrix.flags.writeable:
+            return
+        capacity = max(rows, 2 * self.matrix.shape[0], 1024)
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:len(self)] = self.matrix[:len(self)]
+        self.matrix = matrix
+
+    def add(self, userid, vector):
+        row = self.rows.get(userid)
+        if row is None:
+            row = len(self.userids)
+            self._ensure_capacity(row + 1)
+            self.userids.append(userid)
+            self.rows[userid] = row
+            if self.centroids is not None:
+                # new rows join the closest list; the partitions drift
+                # until the next build_ivf, which only costs recall
+                self.lists[int(np.argmax(self.centroids @ vector))].append(row)
+        else:
+            self._ensure_capacity(len(self))
+        self.matrix[row] = vector
+
+    def apply_rows(self, rows, model_id):
+        """
+        Adds (seq, userid, model, vector bytes) rows; vectors made by
+        another model are skipped. Returns the number applied.
+        """
+        applied = 0
+        for seq, userid, model, blob in rows:
+            self.high_water_mark = max(self.high_water_mark, seq)
+            if model != model_id:
+                continue
+            self.add(userid, np.frombuffer(blob, dtype=np.float32))
+            applied += 1
+        return applied
+
+    def refresh(self, dbConn, model_id):
+        """
+        Loads the resume_vectors rows above the high-water mark
+        """
+        sql = "SELECT seq, userid, model, vector FROM resume_vectors WHERE seq > %s ORDER BY seq;"
+        return self.apply_rows(datatier.iter_rows(dbConn, sql, [self.high_water_mark]), model_id)
+
+    def build_ivf(self, nlist, iterations=10, seed=0):
+        """
+        Partitions the rows into nlist lists with spherical k-means
+        """
+        live = self.matrix[:len(self)]
+        nlist = max(1, min(nlist, len(live)))
+        rng = np.random.default_rng(seed)
+        centroids = live[rng.choice(len(live), nlist, replace=False)].copy()
+
+        for _ in range(iterations):
+            assignment = np.argmax(live @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assignment, live)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            # an empty list keeps its old centroid:
+            sums[empty] = centroids[empty]
+            norms[empty] = 1
+            centroids = sums / norms
+
+        assignment = np.argmax(live @ centroids.T, axis=1)
+        self.centroids = centroids.astype(np.float32)
+        self.lists = [np.flatnonzero(assignment == i).tolist() for i in range(nlist)]
+
+    def search(self, query, k=10, nprobe=None):
+        """
+        Returns [(userid, cosine)] for the k rows closest to a unit
+        query vector. With an IVF built and nprobe set, only the rows
+        of the nprobe closest lists are scored.
+        """
+        if len(self) == 0:
+            return []
+
+        if nprobe and self.centroids is not None:
+            probes = np.argsort(-(self.centroids @ query))[:nprobe]
+            candidates = np.fromiter((row for i in probes for row in self.lists[i]), dtype=np.int64)
+            scores = self.matrix[candidates] @ query
+        else:
+            candidates = None
+            scores = self.matrix[:len(self)] @ query
+
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        rows = candidates[top] if candidates is not None else top
+        return [(self.userids[row], float(score)) for row, score in zip(rows, scores[top])]
+
+    def save(self, path):
+        """
+        Writes path.npy (the live rows) and path.json (userids and
+        high-water mark)
+        """
+        np.save(path + '.npy', np.ascontiguousarray(self.matrix[:len(self)]))
+        with open(path + '.json', 'w') as outfile:
+            json.dump({'dim': self.dim, 'model_id': self.model_id, 'userids': self.userids,
+                       'high_water_mark': self.high_water_mark}, outfile)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """
+        Loads an index written by save(); with mmap the matrix is
+        memory-mapped read-only and copied only when rows are added
+        """
+        with open(path + '.json') as infile:
+            meta = json.load(infile)
+        index = cls(meta['dim'], meta.get('model_id'))
+        index.matrix = np.load(path + '.npy', mmap_mode='r' if mmap else None)
+        index.userids = meta['userids']
+        index.rows = {userid: row for row, userid in enumerate(index.userids)}
+        index.high_water_mark = meta['high_water_mark']
+        return index
+
+
+###################################################################
+#
+# storage
+#
+def vector_row(userid, embedder, text):
+    """
+    Returns the (userid, model, vector bytes) parameters for
+    UPSERT_VECTOR_SQL
+    """
+    return (userid, embedder.model_id, embedder.embed(text or '').tobytes())
+
+
+# REPLACE gives the row a new seq, so refreshes pick up the change:
+UPSERT_VECTOR_SQL = "REPLACE INTO resume_vectors (userid, model, vector) VALUES (%s, %s, %s);"
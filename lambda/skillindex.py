@@ -0,0 +1,290 @@
+#
+# skillindex.py
+#
+# In-process inverted index for boolean skill queries such as
+#
+#     python AND (aws OR gcp) AND NOT php
+#
+# Each normalized skill maps to a sorted array('I') of user ordinals
+# (small integers assigned to userids as they are first seen). Queries
+# are answered with AND / OR / AND-NOT over bitmaps (Python ints, one
+# bit per ordinal) that are derived from the posting lists on first
+# use and cached until the skill's posting list changes.
+#
+# The index is built from the user_skills table once per warm
+# container and then refreshed incrementally from a high-water mark on
+# user_skills.id, with a periodic full rebuild to pick up deletions and
+# rows whose transactions committed out of id order.
+#
+
+import re
+import time
+import bisect
+from array import array
+
+import datatier
+import skillnorm
+
+
+class QueryError(ValueError):
+    pass
+
+
+###################################################################
+#
+# query parser
+#
+# grammar (NOT binds tighter than AND, AND tighter than OR; adjacent
+# bare words form one multi-word skill, e.g. machine learning):
+#
+#   or_expr  := and_expr ('OR' and_expr)*
+#   and_expr := not_expr ('AND' not_expr)*
+#   not_expr := 'NOT' not_expr | '(' or_expr ')' | term
+#   term     := word+ | "quoted skill"
+#
+TOKEN_RE = re.compile(r'\s*(?:(\()|(\))|"([^"]*)"|([^\s()"]+))')
+OPERATORS = {'AND', 'OR', 'NOT'}
+
+
+def tokenize(query):
+    tokens = []
+    pos = 0
+    query = query.strip()
+    while pos < len(query):
+        match = TOKEN_RE.match(query, pos)
+        if not match or match.end() == pos:
+            raise QueryError(f"unexpected character at position {pos}")
+        pos = match.end()
+        lparen, rparen, quoted, word = match.groups()
+        if lparen:
+            tokens.append(('(', None))
+        elif rparen:
+            tokens.append((')', None))
+        elif quoted is not None:
+            tokens.append(('WORD', quoted))
+        elif word.upper() in OPERATORS:
+            tokens.append((word.upper(), None))
+        else:
+            tokens.append(('WORD', word))
+    return tokens
+
+
+def parse_query(query):
+    """
+    Parses a boolean skill query into a tree of tuples:
+    ('term', skill_norm), ('not', node), ('and', [nodes]), ('or', [nodes])
+    """
+    tokens = tokenize(query)
+    pos = 0
+
+    def peek():
+        return tokens[pos][0] if pos < len(tokens) else None
+
+    def take(kind):
+        nonlocal pos
+        if peek() != kind:
+            raise QueryError(f"expected {kind} but found {peek() or 'end of query'}")
+        pos += 1
+        return tokens[pos - 1][1]
+
+    def or_expr():
+        nodes = [and_expr()]
+        while peek() == 'OR':
+            take('OR')
+            nodes.append(and_expr())
+        return nodes[0] if len(nodes) == 1 else ('or', nodes)
+
+    def and_expr():
+        nodes = [not_expr()]
+        while peek() == 'AND':
+            take('AND')
+            nodes.append(not_expr())
+        return nodes[0] if len(nodes) == 1 else ('and', nodes)
+
+    def not_expr():
+        if peek() == 'NOT':
+            take('NOT')
+            return ('not', not_expr())
+        if peek() == '(':
+            take('(')
+            node = or_expr()
+            take(')')
+            return node
+        words = [take('WORD')]
+        while peek() == 'WORD':
+            words.append(take('WORD'))
+        term = skillnorm.canonical_id(' '.join(words))
+        if not term:
+            raise QueryError("empty skill in query")
+        return ('term', term)
+
+    if not tokens:
+        raise QueryError("empty query")
+    tree = or_expr()
+    if pos != len(tokens):
+        raise QueryError(f"unexpected {peek()} in query")
+    return tree
+
+
+###################################################################
+#
+# bitmaps
+#
+def bitmap_from_posting(posting):
+    bits = bytearray((posting[-1] >> 3) + 1 if posting else 0)
+    for ordinal in posting:
+        bits[ordinal >> 3] |= 1 << (ordinal & 7)
+    return int.from_bytes(bits, 'little')
+
+
+def bitmap_ordinals(bitmap, limit=None):
+    """
+    Returns the ordinals set in bitmap, ascending, at most limit of them
+    """
+    ordinals = []
+    data = bitmap.to_bytes((bitmap.bit_length() + 7) // 8, 'little')
+    for byteno, byte in enumerate(data):
+        if not byte:
+            continue
+        for bit in range(8):
+            if byte >> bit & 1:
+                ordinals.append(byteno * 8 + bit)
+                if limit is not None and len(ordinals) >= limit:
+                    return ordinals
+    return ordinals
+
+
+def bitmap_count(bitmap):
+    return bin(bitmap).count('1')
+
+
+###################################################################
+#
+# SkillIndex
+#
+class SkillIndex:
+    def __init__(self, full_refresh_secs=300):
+        self.full_refresh_secs = full_refresh_secs
+        self.high_water_mark = 0
+        self.last_full_refresh = 0.0
+        self._reset()
+
+    def _reset(self):
+        self.postings = {}        # skill_norm -> array('I') of ordinals
+        self.bitmaps = {}         # skill_norm -> bitmap, built lazily
+        self.user_skills = []     # ordinal -> set of skill_norms
+        self.userids = []         # ordinal -> userid
+        self.ordinals = {}        # userid -> ordinal
+        self.high_water_mark = 0
+
+    def _ordinal(self, userid):
+        ordinal = self.ordinals.get(userid)
+        if ordinal is None:
+            ordinal = len(self.userids)
+            self.ordinals[userid] = ordinal
+            self.userids.append(userid)
+            self.user_skills.append(set())
+        return ordinal
+
+    def _add_posting(self, skill_norm, ordinal):
+        self.bitmaps.pop(skill_norm, None)
+        posting = self.postings.get(skill_norm)
+        if posting is None:
+            self.postings[skill_norm] = array('I', [ordinal])
+        elif posting[-1] < ordinal:
+            posting.append(ordinal)
+        else:
+            i = bisect.bisect_left(posting, ordinal)
+            if i == len(posting) or posting[i] != ordinal:
+                posting.insert(i, ordinal)
+
+    def apply_rows(self, rows):
+        """
+        Adds (id, userid, skill_norm) rows, in id order, to the users'
+        skills. An incremental refresh may see only part of a user's
+        rows (the rest lie below the high-water mark), so rows are
+        merged, never replace a user's skills; skills a user lost are
+        dropped by the next full rebuild.
+        """
+        for rowid, userid, skill_norm in rows:
+            self.high_water_mark = max(self.high_water_mark, rowid)
+            ordinal = self._ordinal(userid)
+            skills = self.user_skills[ordinal]
+            if skill_norm not in skills:
+                skills.add(skill_norm)
+                self._add_posting(skill_norm, ordinal)
+
+    def refresh(self, dbConn, full=False):
+        """
+        Loads user_skills rows above the high-water mark (or all rows
+        on a full refresh, which also happens every full_refresh_secs)
+
+        Returns
+        -------
+        number of rows applied
+        """
+        now = time.monotonic()
+        if full or now - self.last_full_refresh >= self.full_refresh_secs:
+            self._reset()
+            self.last_full_refresh = now
+
+        # streamed, so a full rebuild never holds the whole table as
+        # tuples on top of the index itself:
+        sql = "SELECT id, userid, skill_norm FROM user_skills WHERE id > %s ORDER BY id;"
+        applied = 0
+
+        def counted(rows):
+            nonlocal applied
+            for row in rows:
+                applied += 1
+                yield row
+
+        self.apply_rows(counted(datatier.iter_rows(dbConn, sql, [self.high_water_mark])))
+        return applied
+
+    def bitmap(self, skill_norm):
+        bitmap = self.bitmaps.get(skill_norm)
+        if bitmap is None:
+            bitmap = bitmap_from_posting(self.postings.get(skill_norm, ()))
+            self.bitmaps[skill_norm] = bitmap
+        return bitmap
+
+    def evaluate(self, node):
+        """
+        Returns the bitmap of user ordinals matching a parsed query
+        """
+        kind = node[0]
+        if kind == 'term':
+            return self.bitmap(node[1])
+        if kind == 'not':
+            all_users = (1 << len(self.userids)) - 1
+            return all_users & ~self.evaluate(node[1])
+        if kind == 'or':
+            result = 0
+            for child in node[1]:
+                result |= self.evaluate(child)
+            return result
+        if kind == 'and':
+            # AND-NOT the negated children instead of building their
+            # complements:
+            positives = [child for child in node[1] if child[0] != 'not']
+            negatives = [child[1] for child in node[1] if child[0] == 'not']
+            result = (1 << len(self.userids)) - 1
+            for child in positives:
+                result &= self.evaluate(child)
+            for child in negatives:
+                if not result:
+                    break
+                result &= ~self.evaluate(child)
+            return result
+        raise QueryError(f"unknown query node {kind}")
+
+    def userids_of(self, bitmap, limit=None):
+        return [self.userids[ordinal] for ordinal in bitmap_ordinals(bitmap, limit)]
+
+    def search(self, query, limit=None):
+        """
+        Returns the userids matching a boolean skill query, in ordinal
+        (first seen) order
+        """
+        return self.userids_of(self.evaluate(parse_query(query)), limit)
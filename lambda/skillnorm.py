@@ -0,0 +1,266 @@
+#
+# skillnorm.py
+#
+# Normalization and canonicalization of skill names, shared by the
+# parse Lambda (which writes the user_skills table), the search
+# Lambdas (which look skills up by their canonical id) and the
+# migration scripts.
+#
+# Bedrock returns free-form skills ("JS", "JavaScript (ES6)", "node",
+# "Node.js", "Python 3.10"). SkillCanonicalizer maps each one to a
+# canonical display name ("JavaScript", "Node.js", "Python") through a
+# synonym table compiled into a hash map; the canonical id stored in
+# user_skills.skill_norm is the normalized form of that name.
+#
+
+import re
+
+
+WHITESPACE_RE = re.compile(r"\s+")
+
+# longest skill name stored in user_skills.skill_norm:
+MAX_SKILL_LENGTH = 128
+
+# "JavaScript (ES6)", "AWS [EC2, S3]": the qualifier is dropped
+QUALIFIER_RE = re.compile(r"\s*[(\[][^)\]]*[)\]]")
+
+# "Python 3.10", "python3", "Angular 2+", "Java 8", "Vue v3", "5.x"
+VERSION_RE = re.compile(r"[\s-]*v?\d+(?:\.\d+)*(?:\.x|\+)?$")
+
+# bullets and stray punctuation around a skill:
+EDGE_PUNCTUATION = " \t-*\u2022\u00b7.,;:'\"/|"
+
+# separators ignored when matching against the synonym table, so that
+# "Node JS", "node.js" and "nodejs" are the same key; '+' and '#' are
+# kept ("C++", "C#")
+KEY_SEPARATORS_RE = re.compile(r"[\s._-]+")
+
+
+#
+# canonical name -> other spellings. The canonical name itself always
+# matches too. Versions and qualifiers are stripped before lookup, so
+# "Python 3" or "React (Hooks)" need no entry of their own.
+#
+SKILL_SYNONYMS = {
+    'Python': ['py', 'python programming'],
+    'Java': ['core java', 'java se', 'java ee', 'j2ee'],
+    'JavaScript': ['js', 'ecmascript', 'es6', 'es2015', 'vanilla js'],
+    'TypeScript': ['ts'],
+    'C': ['c language', 'ansi c'],
+    'C++': ['cpp', 'c plus plus'],
+    'C#': ['csharp', 'c sharp'],
+    'Go': ['golang', 'go lang'],
+    'Rust': [],
+    'Ruby': [],
+    'Ruby on Rails': ['rails', 'ror'],
+    'PHP': [],
+    'Scala': [],
+    'Kotlin': [],
+    'Swift': [],
+    'R': ['r programming', 'r language'],
+    'MATLAB': [],
+    'Bash': ['shell scripting', 'bash scripting'],
+    'SQL': ['structured query language'],
+    'MySQL': [],
+    'PostgreSQL': ['postgres', 'psql', 'postgre sql'],
+    'MongoDB': ['mongo'],
+    'Redis': [],
+    'HTML': ['html5'],
+    'CSS': ['css3'],
+    'React': ['react.js', 'reactjs', 'react js'],
+    'Angular': ['angularjs', 'angular.js'],
+    'Vue.js': ['vue', 'vuejs'],
+    'Node.js': ['node', 'nodejs', 'node js'],
+    'Express.js': ['express', 'expressjs'],
+    'Django': [],
+    'Flask': [],
+    'Spring': ['spring boot', 'springboot', 'spring framework'],
+    '.NET': ['dotnet', 'dot net', '.net core', 'asp.net'],
+    'AWS': ['amazon web services', 'amazon aws'],
+    'GCP': ['google cloud', 'google cloud platform'],
+    'Azure': ['microsoft azure', 'ms azure'],
+    'Docker': ['docker containers'],
+    'Kubernetes': ['k8s', 'kube'],
+    'Terraform': [],
+    'Linux': ['unix/linux', 'gnu/linux'],
+    'Git': ['git/github'],
+    'Jenkins': [],
+    'CI/CD': ['cicd', 'ci cd', 'continuous integration'],
+    'Spark': ['apache spark', 'pyspark'],
+    'Hadoop': ['apache hadoop'],
+    'Kafka': ['apache kafka'],
+    'Pandas': [],
+    'NumPy': [],
+    'scikit-learn': ['sklearn', 'scikit learn'],
+    'TensorFlow': ['tensor flow'],
+    'PyTorch': [],
+    'Machine Learning': ['ml'],
+    'Deep Learning': ['dl'],
+    'NLP': ['natural language processing'],
+    'Computer Vision': [],
+    'Data Analysis': ['data analytics'],
+    'Tableau': [],
+    'Power BI': ['powerbi'],
+    'Excel': ['ms excel', 'microsoft excel'],
+    'REST': ['restful', 'rest api', 'rest apis', 'restful apis'],
+    'GraphQL': [],
+    'Agile': ['scrum', 'agile/scrum'],
+}
+
+#
+# canonical name -> spellings that used to map to it but are ambiguous
+# ("CV" is usually the curriculum vitae, "shell" is not only Bash).
+# recanonicalize_skills.py uses them to undo the mapping for users
+# whose resume only has the retired spelling.
+#
+RETIRED_SYNONYMS = {
+    'Bash': ['shell'],
+    'Git': ['version control'],
+    'PyTorch': ['torch'],
+    'Computer Vision': ['cv'],
+}
+
+
+def normalize_skill(skill):
+    """
+    Returns the normalized form of a skill name: trimmed, lower case,
+    inner whitespace collapsed ('' if nothing is left)
+    """
+    if skill is None:
+        return ''
+    return WHITESPACE_RE.sub(' ', str(skill)).strip().lower()[:MAX_SKILL_LENGTH]
+
+
+def skill_key(text):
+    """
+    Returns the lookup key of a skill spelling: normalized, with
+    spaces, dots, dashes and underscores removed
+    """
+    return KEY_SEPARATORS_RE.sub('', normalize_skill(text))
+
+
+class SkillCanonicalizer:
+    """
+    Maps skill spellings to canonical names through a hash map from
+    skill_key(spelling) to canonical name. Unknown skills keep their
+    own (cleaned) spelling.
+    """
+
+    def __init__(self, synonyms):
+        self.lookup = {}
+        for canonical, spellings in synonyms.items():
+            for spelling in [canonical] + list(spellings):
+                key = skill_key(spelling)
+                if key in self.lookup and self.lookup[key] != canonical:
+                    raise ValueError(f"'{spelling}' maps to both {self.lookup[key]} and {canonical}")
+                self.lookup[key] = canonical
+
+    def canonicalize(self, skill):
+        """
+        Returns the canonical name of a skill ('' if nothing is left)
+        """
+        if skill is None:
+            return ''
+        cleaned = WHITESPACE_RE.sub(' ', str(skill)).strip(EDGE_PUNCTUATION)
+        if not cleaned:
+            return ''
+
+        canonical = self.lookup.get(skill_key(cleaned))
+        if canonical:
+            return canonical
+
+        unqualified = QUALIFIER_RE.sub('', cleaned).strip(EDGE_PUNCTUATION) or cleaned
+        canonical = self.lookup.get(skill_key(unqualified))
+        if canonical:
+            return canonical
+
+        # versions are only stripped to reach a known skill, so "S3"
+        # or "EC2" are left alone:
+        unversioned = VERSION_RE.sub('', unqualified)
+        if unversioned:
+            canonical = self.lookup.get(skill_key(unversioned))
+            if canonical:
+                return canonical
+
+        return unqualified[:MAX_SKILL_LENGTH]
+
+    def canonicalize_all(self, skills):
+        """
+        Canonicalizes a comma-joined skills string or a list of skills
+        and returns the distinct canonical names, in their original
+        order
+        """
+        if not skills:
+            return []
+        if isinstance(skills, str):
+            skills = skills.split(',')
+
+        seen = set()
+        result = []
+        for skill in skills:
+            canonical = self.canonicalize(skill)
+            skill_id = normalize_skill(canonical)
+            if skill_id and skill_id not in seen:
+                seen.add(skill_id)
+                result.append(canonical)
+        return result
+
+
+default_canonicalizer = SkillCanonicalizer(SKILL_SYNONYMS)
+
+
+def canonicalize_skills(skills):
+    """
+    Returns the distinct canonical names of a skills string or list
+    """
+    return default_canonicalizer.canonicalize_all(skills)
+
+
+def canonical_id(skill):
+    """
+    Returns the id a skill is stored and searched under in
+    user_skills.skill_norm: the normalized canonical name
+    """
+    return normalize_skill(default_canonicalizer.canonicalize(skill))
+
+
+def split_skills(skills):
+    """
+    Splits a comma-joined skills string (or a list of skills) into the
+    list of distinct canonical ids, in their original order
+    """
+    return [normalize_skill(skill) for skill in canonicalize_skills(skills)]
+
+
+def _find_spelling(spelling, text):
+    """
+    Returns the first occurrence of a spelling in text as written
+    there, matched as whole words and ignoring case (None if absent)
+    """
+    pattern = r"(?<![\w+#])" + r"\s+".join(map(re.escape, normalize_skill(spelling).split(' '))) + r"(?![\w+#])"
+    match = re.search(pattern, text, re.IGNORECASE)
+    return match.group(0) if match else None
+
+
+def restore_retired(skills, resume_text):
+    """
+    Undoes retired synonyms in a list of canonical names: a name the
+    resume never spells out in a current form, but does in a retired
+    one, is replaced by that spelling as the resume writes it. Other
+    names, and all names when there is no resume text, are kept.
+    """
+    if not resume_text:
+        return list(skills)
+
+    result = []
+    for skill in skills:
+        retired = RETIRED_SYNONYMS.get(skill)
+        if retired:
+            current = [skill] + SKILL_SYNONYMS.get(skill, [])
+            if not any(_find_spelling(spelling, resume_text) for spelling in current):
+                found = [_find_spelling(spelling, resume_text) for spelling in retired]
+                found = [spelling for spelling in found if spelling]
+                if found:
+                    skill = WHITESPACE_RE.sub(' ', found[0])
+        result.append(skill)
+    return result
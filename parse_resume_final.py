@@ -2,13 +2,27 @@ import json
 import uuid
 import boto3
 import pymysql
-from urllib.parse import unquote, unquote_plus
-from pypdf import PdfReader
-from io import BytesIO
+from botocore.config import Config
+from urllib.parse import unquote_plus
 import os
+import time
+import threading
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
 
 from configparser import ConfigParser
 
+import parsecache
+import pdftext
+import fastpath
+import compaction
+import bedrockcall
+import jsonstream
+import batchextract
+import skillnorm
+import datatier
+import resultcache
+
 config_file = 'resumeapp-config.ini'
 os.environ['AWS_SHARED_CREDENTIALS_FILE'] = config_file
 
@@ -21,56 +35,246 @@ rds_username = configur.get('rds', 'user_name')
 rds_pwd = configur.get('rds', 'user_pwd')
 rds_dbname = configur.get('rds', 'db_name')
 
+# number of S3 records parsed concurrently within one SQS batch:
+parse_max_workers = configur.getint('parse', 'max_workers', fallback=4)
 
-def get_s3_file(bucket_name, file_key):
-    s3 = boto3.client('s3')
-    response = s3.get_object(Bucket=bucket_name, Key=file_key)
-    return response['Body'].read()
+# when a batch has several records, their resumes are saved this many
+# per transaction:
+parse_save_chunk_size = configur.getint('parse', 'save_chunk_size', fallback=100)
 
-def extract_pdf_text(pdf_bytes):
-    pdf_stream = BytesIO(pdf_bytes)
-    reader = PdfReader(pdf_stream)
-    
-    text = ""
-    for page in reader.pages:
-        page_text = page.extract_text()
-        if page_text:
-            text += page_text + "\n"
-    return text
+# parse results are cached by content hash; mysql | sqlite | memory | none
+parse_cache_backend = configur.get('parse', 'cache_backend', fallback='mysql')
+parse_cache_path = configur.get('parse', 'cache_path', fallback='/tmp/parse_cache.db')
 
-def process_with_bedrock(resume_text):
-    session = boto3.Session()
-    bedrock_runtime = session.client('bedrock-runtime', region_name='us-east-2')
+# bounds on ingestion: PDFs larger than spool_max_mb spill to /tmp,
+# and extraction stops at max_pages pages or max_chars characters:
+parse_spool_max_bytes = configur.getint('parse', 'spool_max_mb', fallback=16) * 1024 * 1024
+parse_max_pages = configur.getint('parse', 'max_pages', fallback=50)
+parse_max_chars = configur.getint('parse', 'max_chars', fallback=200000)
 
-    prompt = f"""
-    You are an expert recruiter. Extract the following details from this resume text:
-    - Full Name
-    - Email (if available)
-    - List of skills (comma-separated)
-    Resume Text:
-    {resume_text}
+# text is extracted serially, streaming page by page from the spool.
+# With extract_workers > 1 (or 0 = one per vCPU), PDFs of at least
+# parallel_min_pages pages are instead read into memory and extracted
+# on a process pool; meant for local runs, not the threaded handler:
+parse_extract_workers = configur.getint('parse', 'extract_workers', fallback=1)
+parse_parallel_min_pages = configur.getint('parse', 'parallel_min_pages', fallback=16)
 
-    Provide the output in JSON format with keys: 'fullname', 'email', 'skills'.
+# how fields are extracted from the text: llm | offline | hybrid
+# (hybrid uses the local extractor and only calls Bedrock when its
+# confidence is below hybrid_min_confidence):
+parse_extract_mode = configur.get('parse', 'extract_mode', fallback='llm')
+parse_hybrid_min_confidence = configur.getfloat('parse', 'hybrid_min_confidence', fallback=0.8)
+
+# the text sent to Bedrock is compacted and cut to this many
+# (estimated) tokens; 0 disables the budget:
+parse_prompt_token_budget = configur.getint('parse', 'prompt_token_budget', fallback=6000)
+
+# client-side limits on Bedrock calls from this container: request
+# rate (token bucket), adaptive concurrency bounds and retries:
+bedrock_rate_per_sec = configur.getfloat('bedrock', 'rate_per_sec', fallback=5)
+bedrock_burst = configur.getint('bedrock', 'burst', fallback=10)
+bedrock_initial_concurrency = configur.getint('bedrock', 'initial_concurrency', fallback=4)
+bedrock_max_concurrency = configur.getint('bedrock', 'max_concurrency', fallback=16)
+bedrock_max_attempts = configur.getint('bedrock', 'max_attempts', fallback=6)
+
+# stream the response and stop reading at the end of the JSON object:
+bedrock_stream = configur.getboolean('bedrock', 'stream', fallback=True)
+
+# resumes per Bedrock call when an SQS batch has several records that
+# need the LLM (1 = one call per resume):
+bedrock_batch_size = configur.getint('bedrock', 'batch_size', fallback=1)
+
+# stop retrying this long before the Lambda would time out:
+LAMBDA_SAFETY_MARGIN_SECS = 10
+
+# embed the resume text for semantic matching (proj05_match) as it is
+# saved; needs numpy:
+parse_embed = configur.getboolean('semantic', 'embed_at_parse', fallback=False)
+if parse_embed:
+    import semanticindex
+    embedder = semanticindex.load_embedder(configur)
+else:
+    embedder = None
+
+# the read endpoints cache their results per data version; every
+# write of users changes it (see resultcache.py):
+result_cache_shared = resultcache.make_shared_tier(configur)
+
+bedrock_model_id = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
+
+# bump whenever the prompt in process_with_bedrock changes, so cached
+# results produced by the old prompt are no longer used:
+PROMPT_VERSION = 'v2'
+
+
+class ResourceRegistry:
+    """
+    Lazily creates the S3 and bedrock-runtime clients and the MySQL
+    connection once per container, and hands the same objects out
+    again on warm invocations. boto3 clients are thread-safe and are
+    shared freely; the MySQL connection is not, so it is lent out
+    under a lock and health-checked (ping + reconnect) on every use.
     """
-    model_id = "us.anthropic.claude-3-7-sonnet-20250219-v1:0"
 
-    response = bedrock_runtime.invoke_model(
-        modelId=model_id,
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()
+        self._s3 = None
+        self._bedrock = None
+        self._db_conn = None
+        self.stats = {
+            's3_created': 0, 's3_reused': 0,
+            'bedrock_created': 0, 'bedrock_reused': 0,
+            'db_created': 0, 'db_reused': 0, 'db_reconnected': 0,
+        }
+
+    def s3(self):
+        with self._lock:
+            if self._s3 is None:
+                self._s3 = boto3.client('s3')
+                self.stats['s3_created'] += 1
+            else:
+                self.stats['s3_reused'] += 1
+            return self._s3
+
+    def bedrock(self):
+        with self._lock:
+            if self._bedrock is None:
+                # retries are done by bedrock_invoker, which backs off
+                # adaptively, so botocore's own retries are turned off:
+                self._bedrock = boto3.Session().client(
+                    'bedrock-runtime',
+                    region_name='us-east-2',
+                    config=Config(retries={'total_max_attempts': 1, 'mode': 'standard'})
+                )
+                self.stats['bedrock_created'] += 1
+            else:
+                self.stats['bedrock_reused'] += 1
+            return self._bedrock
+
+    @contextmanager
+    def db_connection(self):
+        with self._db_lock:
+            if self._db_conn is None:
+                self._db_conn = self._connect()
+                self.stats['db_created'] += 1
+            else:
+                try:
+                    # raises if the server closed the connection while
+                    # the container was frozen:
+                    self._db_conn.ping(reconnect=False)
+                    self.stats['db_reused'] += 1
+                except Exception:
+                    self._close_db()
+                    self._db_conn = self._connect()
+                    self.stats['db_reconnected'] += 1
+            try:
+                yield self._db_conn
+            except pymysql.err.OperationalError:
+                # connection is suspect, rebuild it on next use:
+                self._close_db()
+                raise
+
+    def _connect(self):
+        return pymysql.connect(
+            host=rds_endpoint,
+            port=rds_portnum,
+            user=rds_username,
+            password=rds_pwd,
+            database=rds_dbname
+        )
+
+    def _close_db(self):
+        try:
+            self._db_conn.close()
+        except Exception:
+            pass
+        self._db_conn = None
+
+
+# module-level, so it survives across warm invocations:
+resources = ResourceRegistry()
+
+
+def make_parse_cache(backend_name):
+    if backend_name == 'none':
+        return None
+    if backend_name == 'memory':
+        return parsecache.ParseCache(parsecache.MemoryBackend())
+    if backend_name == 'sqlite':
+        return parsecache.ParseCache(parsecache.SQLiteBackend(parse_cache_path))
+    if backend_name == 'mysql':
+        return parsecache.ParseCache(parsecache.MySQLBackend(resources.db_connection))
+    raise Exception(f"unknown parse cache backend '{backend_name}'")
+
+parse_cache = make_parse_cache(parse_cache_backend)
+
+bedrock_invoker = bedrockcall.ThrottledInvoker(
+    bedrockcall.TokenBucket(bedrock_rate_per_sec, bedrock_burst),
+    bedrockcall.AdaptiveLimiter(initial=bedrock_initial_concurrency, maximum=bedrock_max_concurrency),
+    max_attempts=bedrock_max_attempts
+)
+
+
+def get_s3_file(bucket_name, file_key):
+    # returns (spooled file, sha256 of its contents):
+    s3 = resources.s3()
+    return pdftext.spool_s3_object(s3, bucket_name, file_key, parse_spool_max_bytes)
+
+def extract_pdf_pages(pdf_file):
+    if parse_extract_workers == 1:
+        return list(pdftext.iter_page_text(pdf_file, max_pages=parse_max_pages, max_chars=parse_max_chars))
+    return pdftext.extract_pdf_pages_parallel(
+        pdf_file,
+        max_pages=parse_max_pages,
+        max_chars=parse_max_chars,
+        workers=parse_extract_workers or None,
+        min_pages=parse_parallel_min_pages
+    )
+
+def read_bedrock_stream(response):
+    # feeds streamed text deltas to the incremental JSON extractor and
+    # stops reading at the closing brace of the object:
+    extractor = jsonstream.IncrementalJSONExtractor(
+        on_field=lambda key, value: print(f'Bedrock field ready: {key} = {value}')
+    )
+    stream = response['body']
+    try:
+        for event in stream:
+            chunk = event.get('chunk')
+            if not chunk:
+                continue
+            payload = json.loads(chunk['bytes'])
+            if payload.get('type') == 'content_block_delta':
+                if extractor.feed(payload['delta'].get('text', '')):
+                    break
+    finally:
+        stream.close()
+    return extractor.close()
+
+def bedrock_request_body(prompt, max_tokens=4000):
+    return json.dumps({
+        "anthropic_version": "bedrock-2023-05-31",
+        "max_tokens": max_tokens,  # Required field for Claude 3.7
+        "messages": [{
+            "role": "user",
+            "content": [{
+                "type": "text",
+                "text": prompt
+            }]
+        }]
+    })
+
+def invoke_bedrock_text(prompt, max_tokens=4000, deadline=None):
+    # non-streaming call through the throttle-aware invoker; returns
+    # the text of the model's reply:
+    bedrock_runtime = resources.bedrock()
+    response = bedrock_invoker.call(lambda: bedrock_runtime.invoke_model(
+        modelId=bedrock_model_id,
         contentType='application/json',
         accept='application/json',
-        body=json.dumps({
-            "anthropic_version": "bedrock-2023-05-31",
-            "max_tokens": 4000,  # Required field for Claude 3.7
-            "messages": [{
-                "role": "user",
-                "content": [{
-                    "type": "text",
-                    "text": prompt
-                }]
-            }]
-        })
-    )
-    
+        body=bedrock_request_body(prompt, max_tokens)
+    ), deadline=deadline)
 
     response_body = response['body'].read().decode('utf-8')
     print('Bedrock response:')
@@ -78,61 +282,200 @@ def process_with_bedrock(resume_text):
     parsed_response = json.loads(response_body)
 
     # Get the text content which contains the markdown-formatted JSON
-    json_response = parsed_response['content'][0]['text']
+    return parsed_response['content'][0]['text']
 
-    # Remove the markdown code block formatting (```json and ```)
-    clean_json_str = json_response.strip('```json\n').strip('\n```')
+def process_with_bedrock(resume_text, deadline=None, stream=None):
+    stream = bedrock_stream if stream is None else stream
+
+    prompt = f"""
+    You are an expert recruiter. Extract the following details from this resume text:
+    - Full Name
+    - Email (if available)
+    - List of skills (comma-separated)
+    Resume Text:
+    {resume_text}
+
+    Provide the output in JSON format with keys: 'fullname', 'email', 'skills'.
+    """
+
+    if stream:
+        # the whole stream is consumed inside the retried call, so a
+        # throttle that arrives mid-stream is retried too:
+        bedrock_runtime = resources.bedrock()
+        resume_data = bedrock_invoker.call(lambda: read_bedrock_stream(
+            bedrock_runtime.invoke_model_with_response_stream(
+                modelId=bedrock_model_id,
+                contentType='application/json',
+                accept='application/json',
+                body=bedrock_request_body(prompt)
+            )
+        ), deadline=deadline)
+    else:
+        json_response = invoke_bedrock_text(prompt, deadline=deadline)
 
-    # Parse the cleaned JSON string
-    resume_data = json.loads(clean_json_str)
+        # Parse the JSON object, skipping any markdown fence or prose
+        # around it
+        resume_data = jsonstream.extract_json_object(json_response)
 
     # Now you have the extracted resume data as a Python dict
     print('resume_data')
     print(resume_data)
     return resume_data
 
-def save_to_mysql(user_id, fname, lname, email, skills, resume_text, resume_file):
-    connection = pymysql.connect(
-        host=rds_endpoint,
-        user=rds_username,
-        password=rds_pwd,
-        database=rds_dbname
-    )
-    with connection.cursor() as cursor:
-        sql = """
-        INSERT INTO users (userid, firstname, lastname, email, skills, resume_text, resume_file)
-        VALUES (%s, %s, %s, %s, %s, %s, %s)
-        ON DUPLICATE KEY UPDATE skills=%s, resume_text=%s;
-        """
-        cursor.execute(sql, (user_id, fname, lname, email, skills, resume_text, resume_file, skills, resume_text))
-    connection.commit()
-    connection.close()
+extract_stats_lock = threading.Lock()
+extract_stats = {
+    'offline': 0, 'llm': 0, 'llm_calls_saved': 0,
+    'prompt_tokens_before': 0, 'prompt_tokens_after': 0,
+    'throttle_fallbacks': 0,
+}
 
-def lambda_handler(event, context):
+batch_stats = batchextract.BatchStats()
+
+# resumes saved through save_messages, and how often a failed batched
+# save had to be redone one message at a time:
+db_stats = {'batched_saves': 0, 'batched_resumes': 0, 'batch_fallbacks': 0}
+
+def count_extract(name, amount=1):
+    with extract_stats_lock:
+        extract_stats[name] += amount
 
-    sqs_message = json.loads(event['Records'][0]['body'])
-    body = sqs_message['Records'][0]
-    print('event received ', body)
+def compact_for_prompt(pages):
+    prompt_text, stats = compaction.compact(pages, parse_prompt_token_budget or None)
+    print(f"Prompt compaction: {stats['tokens_before']} -> {stats['tokens_after']} tokens, "
+          f"{stats['lines_removed']} repeated lines removed, truncated={stats['truncated']}")
+    count_extract('prompt_tokens_before', stats['tokens_before'])
+    count_extract('prompt_tokens_after', stats['tokens_after'])
+    return prompt_text
+
+
+class ResumeJob:
+    """
+    One resume on its way through the pipeline: fields is None until
+    the resume has been resolved from the cache, locally or by Bedrock;
+    local_fields holds a low-confidence local result to fall back on
+    when Bedrock throttles.
+    """
 
-    bucket_name = body['s3']['bucket']['name']
-    resume_file_key = unquote(body['s3']['object']['key'])
+    def __init__(self, resume_file, sha256):
+        self.resume_file = resume_file
+        self.sha256 = sha256
+        self.pages = None
+        self.resume_text = None
+        self.fields = None
+        self.local_fields = None
+        self.error = None
+
+
+def prepare_resume(bucket_name, resume_file_key, mode=None):
+    # fetches and extracts the resume, and resolves its fields from the
+    # parse cache or the local extractor when possible:
+    mode = mode or parse_extract_mode
+    if mode not in ('llm', 'offline', 'hybrid'):
+        raise Exception(f"unknown extract mode '{mode}'")
 
     print(f'Fetching file from S3: {bucket_name}/{resume_file_key}')
     
-    pdf_bytes = get_s3_file(bucket_name, resume_file_key)
+    pdf_file, sha256 = get_s3_file(bucket_name, resume_file_key)
+    job = ResumeJob(resume_file_key, sha256)
+
+    with pdf_file:
+        #
+        # identical PDFs (same bytes, same prompt, same model) are parsed
+        # once; later uploads go straight to the database:
+        #
+        cached = parse_cache.get(sha256, PROMPT_VERSION, bedrock_model_id) if parse_cache else None
+
+        if cached:
+            print(f'Parse cache hit for {sha256}')
+            job.resume_text, job.fields = cached
+            return job
 
-    resume_text = extract_pdf_text(pdf_bytes)
+        job.pages = extract_pdf_pages(pdf_file)
+
+    job.resume_text = pdftext.join_pages(job.pages)
 
     print('Extracted Resume Text Preview:')
-    print(resume_text[:500])
+    print(job.resume_text[:500])
+
+    if mode != 'llm':
+        # the local extractor sees the full text, Bedrock a compacted
+        # copy of the pages:
+        local_result = fastpath.extract(job.resume_text)
+        print('Offline extraction:', local_result)
+
+        if mode == 'offline' or local_result['confidence'] >= parse_hybrid_min_confidence:
+            count_extract('offline')
+            if mode == 'hybrid':
+                count_extract('llm_calls_saved')
+            job.fields = local_result
+        else:
+            job.local_fields = local_result
 
-    bedrock_response = process_with_bedrock(resume_text)
+    return job
+
+def accept_llm_fields(job, fields):
+    job.fields = fields
+    count_extract('llm')
+    # only LLM results are worth caching, offline ones are cheap:
+    if parse_cache:
+        parse_cache.put(job.sha256, PROMPT_VERSION, bedrock_model_id, job.resume_text, fields)
+
+def fall_back_to_local(job, err):
+    # shed load: a low-confidence local result beats a redelivery
+    if job.local_fields is None:
+        raise err
+    print('Bedrock throttled, falling back to offline extraction:', str(err))
+    count_extract('throttle_fallbacks')
+    job.fields = job.local_fields
+
+def extract_with_bedrock(job, deadline=None):
+    try:
+        fields = process_with_bedrock(compact_for_prompt(job.pages), deadline)
+    except bedrockcall.BedrockThrottled as err:
+        fall_back_to_local(job, err)
+        return
+    accept_llm_fields(job, fields)
+
+def extract_with_bedrock_batched(jobs, deadline=None):
+    # one Bedrock call for several resumes; failures are recorded on
+    # the jobs rather than raised, so one bad resume does not fail the
+    # others:
+    docs = [(f'd{i}', compact_for_prompt(job.pages)) for i, job in enumerate(jobs)]
+    try:
+        results, failed = batchextract.extract_batch(
+            docs,
+            lambda prompt, max_tokens: invoke_bedrock_text(prompt, max_tokens, deadline),
+            batch_stats
+        )
+    except Exception as err:
+        results, failed = {}, {doc_id: err for doc_id, _ in docs}
+
+    for (doc_id, _), job in zip(docs, jobs):
+        if doc_id in results:
+            accept_llm_fields(job, results[doc_id])
+            continue
+
+        reason = failed.get(doc_id)
+        try:
+            if isinstance(reason, bedrockcall.BedrockThrottled):
+                fall_back_to_local(job, reason)
+            else:
+                raise Exception(f'batched extraction failed: {reason}')
+        except Exception as err:
+            job.error = err
+
+def resume_row(job):
+    # (userid, firstname, lastname, email, skills, resume_text,
+    # resume_file, resume_sha256) for a job whose fields have been
+    # extracted:
+    bedrock_response = job.fields
 
     fullname = bedrock_response.get('fullname', '')
     email = bedrock_response.get('email', 'unknown@example.com')
 
-    skills_list = bedrock_response.get('skills', [])
-    skills = ", ".join(skills_list) if isinstance(skills_list, list) else skills_list
+    # free-form skills ("JS", "JavaScript (ES6)") become distinct
+    # canonical names ("JavaScript") before they are stored:
+    skills = ", ".join(skillnorm.canonicalize_skills(bedrock_response.get('skills', [])))
     if fullname:
         name_parts = fullname.strip().split()
         firstname = name_parts[0]
@@ -141,13 +484,250 @@ def lambda_handler(event, context):
         firstname = ''
         lastname = ''
 
-    user_id = ''  # Populate appropriately
-    random_uuid = uuid.uuid4()
-    user_id = str(random_uuid)
+    user_id = str(uuid.uuid4())
     print('user_id', user_id, ' firstname ', firstname, ' lastname ', lastname, ' email ', email, ' skills ', skills)
-    save_to_mysql(user_id, firstname, lastname, email, skills, resume_text, resume_file_key)
+    return (user_id, firstname, lastname, email, skills, job.resume_text, job.resume_file, job.sha256)
+
+def save_resume(job):
+    save_to_mysql(*resume_row(job))
+
+# VALUES() keeps the statement in the form pymysql folds into one
+# multi-row INSERT under executemany:
+UPSERT_USER_SQL = """
+INSERT INTO users (userid, firstname, lastname, email, skills, resume_text, resume_file, resume_sha256)
+VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+ON DUPLICATE KEY UPDATE skills=VALUES(skills), resume_text=VALUES(resume_text),
+                        resume_file=VALUES(resume_file), resume_sha256=VALUES(resume_sha256);
+"""
+
+def save_user_skills(cursor, skills_by_userid):
+    # replaces the users' rows in the normalized user_skills table,
+    # which the by-skill search looks up through its index:
+    userids = list(skills_by_userid)
+    if not userids:
+        return
+    placeholders = ", ".join(["%s"] * len(userids))
+    cursor.execute(f"DELETE FROM user_skills WHERE userid IN ({placeholders});", userids)
+
+    pairs = [(userid, skill_norm)
+             for userid, skills in skills_by_userid.items()
+             for skill_norm in skillnorm.split_skills(skills)]
+    if pairs:
+        cursor.executemany("INSERT IGNORE INTO user_skills (userid, skill_norm) VALUES (%s, %s);", pairs)
+
+def save_to_mysql(user_id, fname, lname, email, skills, resume_text, resume_file, resume_sha256=None):
+    with resources.db_connection() as connection:
+        with datatier.transaction(connection) as cursor:
+            cursor.execute(UPSERT_USER_SQL, (user_id, fname, lname, email, skills, resume_text, resume_file,
+                                             resume_sha256))
+
+            # rowcount is 1 for a new row; otherwise an existing
+            # user (same email) was updated and keeps its userid:
+            if cursor.rowcount != 1:
+                cursor.execute("SELECT userid FROM users WHERE email = %s;", [email])
+                row = cursor.fetchone()
+                if row:
+                    user_id = row[0]
+
+            save_user_skills(cursor, {user_id: skills})
+            if embedder:
+                cursor.execute(semanticindex.UPSERT_VECTOR_SQL,
+                               semanticindex.vector_row(user_id, embedder, resume_text))
+            resultcache.bump_version(cursor)
+
+    resultcache.publish_version(result_cache_shared)
+
+def save_resumes(jobs):
+    # saves several resumes in one transaction: one multi-row upsert
+    # into users, one lookup of the resulting userids (existing users
+    # keep theirs), then one rewrite of their user_skills rows
+    rows = [resume_row(job) for job in jobs]
+
+    # the last resume per email wins, as it would saving one by one;
+    # rows without an email get no user_skills or vector rows:
+    skills_by_email = {row[3].lower(): row[4] for row in rows if row[3]}
+    text_by_email = {row[3].lower(): row[5] for row in rows if row[3]}
+
+    with resources.db_connection() as connection:
+        with datatier.transaction(connection) as cursor:
+            cursor.executemany(UPSERT_USER_SQL, rows)
+
+            userids = {}
+            emails = list(skills_by_email)
+            if emails:
+                placeholders = ", ".join(["%s"] * len(emails))
+                cursor.execute(f"SELECT email, userid FROM users WHERE email IN ({placeholders});", emails)
+                userids = {email.lower(): userid for email, userid in cursor.fetchall()}
+
+            save_user_skills(cursor, {userids[email]: skills
+                                      for email, skills in skills_by_email.items() if email in userids})
+            if embedder:
+                cursor.executemany(semanticindex.UPSERT_VECTOR_SQL, [
+                    semanticindex.vector_row(userids[email], embedder, text)
+                    for email, text in text_by_email.items() if email in userids])
+            resultcache.bump_version(cursor)
+
+    resultcache.publish_version(result_cache_shared)
+
+def save_messages(jobs_by_message):
+    # saves the extracted resumes of several SQS messages,
+    # save_chunk_size resumes per transaction; returns the set of
+    # failed message ids. If a chunk fails it is rolled back and its
+    # messages are saved one by one, so only the bad ones fail.
+    failed_ids = set()
+
+    chunks = [[]]
+    for message_id, jobs in jobs_by_message.items():
+        errors = [job.error for job in jobs if job.error]
+        if errors:
+            print('**ERROR** processing message', message_id)
+            print(str(errors[0]))
+            failed_ids.add(message_id)
+            continue
+        if chunks[-1] and sum(len(jobs) for _, jobs in chunks[-1]) + len(jobs) > parse_save_chunk_size:
+            chunks.append([])
+        chunks[-1].append((message_id, jobs))
+
+    for chunk in chunks:
+        jobs = [job for _, message_jobs in chunk for job in message_jobs]
+        if not jobs:
+            continue
+        try:
+            save_resumes(jobs)
+            db_stats['batched_saves'] += 1
+            db_stats['batched_resumes'] += len(jobs)
+            continue
+        except Exception as err:
+            print(f'**ERROR** batched save of {len(jobs)} resumes failed, saving one message at a time')
+            print(str(err))
+            db_stats['batch_fallbacks'] += 1
+
+        for message_id, message_jobs in chunk:
+            try:
+                for job in message_jobs:
+                    save_resume(job)
+            except Exception as err:
+                print('**ERROR** processing message', message_id)
+                print(str(err))
+                failed_ids.add(message_id)
+
+    return failed_ids
+
+def process_resume(bucket_name, resume_file_key, deadline=None):
+    job = prepare_resume(bucket_name, resume_file_key)
+    if job.fields is None:
+        extract_with_bedrock(job, deadline)
+    save_resume(job)
+
+def s3_records(record):
+    # each SQS message wraps an S3 event notification, which can itself
+    # carry more than one S3 record; yields (bucket, key) pairs:
+    sqs_message = json.loads(record['body'])
+    for body in sqs_message.get('Records', []):
+        print('event received ', body)
+
+        bucket_name = body['s3']['bucket']['name']
+        resume_file_key = unquote_plus(body['s3']['object']['key'])
+
+        yield bucket_name, resume_file_key
+
+def process_sqs_record(record, deadline=None):
+    for bucket_name, resume_file_key in s3_records(record):
+        process_resume(bucket_name, resume_file_key, deadline)
+
+def extract_sqs_record(record, deadline=None):
+    # process_sqs_record without the save, so that the handler can
+    # save the whole SQS batch together:
+    jobs = prepare_sqs_record(record)
+    for job in jobs:
+        if job.fields is None:
+            extract_with_bedrock(job, deadline)
+    return jobs
+
+def prepare_sqs_record(record):
+    return [prepare_resume(bucket_name, resume_file_key) for bucket_name, resume_file_key in s3_records(record)]
+
+def process_records_batched(records, deadline=None):
+    # like process_sqs_record over every record, except that resumes
+    # needing Bedrock are sent bedrock_batch_size at a time; returns
+    # the set of failed message ids
+    failed_ids = set()
+    workers = max(1, min(parse_max_workers, len(records)))
+
+    jobs_by_message = {}
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(prepare_sqs_record, record): record for record in records}
+        for future, record in futures.items():
+            try:
+                jobs_by_message[record.get('messageId')] = future.result()
+            except Exception as err:
+                print('**ERROR** processing message', record.get('messageId'))
+                print(str(err))
+                failed_ids.add(record.get('messageId'))
+
+    pending = [job for jobs in jobs_by_message.values() for job in jobs if job.fields is None]
+    batches = [pending[i:i + bedrock_batch_size] for i in range(0, len(pending), bedrock_batch_size)]
+    if batches:
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(batches)))) as executor:
+            list(executor.map(lambda batch: extract_with_bedrock_batched(batch, deadline), batches))
+
+    return failed_ids | save_messages(jobs_by_message)
+
+def lambda_handler(event, context):
+
+    records = event.get('Records', [])
+    print(f'Processing {len(records)} SQS record(s)')
+
+    # Bedrock retries must finish within the invocation:
+    deadline = None
+    if context is not None and hasattr(context, 'get_remaining_time_in_millis'):
+        deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000 - LAMBDA_SAFETY_MARGIN_SECS
+
+    if bedrock_batch_size > 1 and len(records) > 1:
+        failed_ids = process_records_batched(records, deadline)
+        failures = [{'itemIdentifier': message_id} for message_id in failed_ids]
+    else:
+        #
+        # parse every record in the batch on a bounded worker pool; the
+        # work is dominated by S3, Bedrock and MySQL round trips, so
+        # threads are enough. With several records the workers only
+        # extract, and the results are saved together afterwards:
+        #
+        failed_ids = set()
+        jobs_by_message = {}
+        work = process_sqs_record if len(records) == 1 else extract_sqs_record
+        with ThreadPoolExecutor(max_workers=max(1, min(parse_max_workers, len(records) or 1))) as executor:
+            futures = {executor.submit(work, record, deadline): record for record in records}
+            for future, record in futures.items():
+                try:
+                    jobs = future.result()
+                    if jobs is not None:
+                        jobs_by_message[record.get('messageId')] = jobs
+                except Exception as err:
+                    print('**ERROR** processing message', record.get('messageId'))
+                    print(str(err))
+                    failed_ids.add(record.get('messageId'))
+
+        failed_ids |= save_messages(jobs_by_message)
+        failures = [{'itemIdentifier': message_id} for message_id in failed_ids]
+
+    #
+    # report partial batch failures so that SQS only redelivers the
+    # messages that failed (requires ReportBatchItemFailures on the
+    # event source mapping):
+    #
+    print(f'Done: {len(records) - len(failures)} succeeded, {len(failures)} failed')
+    print('Resource stats:', resources.stats)
+    print('DB write stats:', db_stats)
+    print('Extraction stats:', extract_stats)
+    print('Bedrock stats:', bedrock_invoker.snapshot())
+    if bedrock_batch_size > 1:
+        print('Bedrock batch stats:', batch_stats.snapshot())
+    if parse_cache:
+        print('Parse cache stats:', parse_cache.stats, f'hit rate {parse_cache.hit_rate():.1%}')
 
     return {
         'statusCode': 200,
-        'body': json.dumps('Resume processed successfully!')
-    }
\ No newline at end of file
+        'body': json.dumps('Resume processed successfully!'),
+        'batchItemFailures': failures
+    }